@@ -0,0 +1,250 @@
+"""
+Load test the FastAPI server in-process.
+
+Requests to /process and /transform are driven through httpx's ASGI
+transport at a fixed concurrency (closed loop) or a Poisson arrival rate
+(open loop), using documents from sample/. Storage is the in-memory
+stand-in; --stub replaces the converter (and optionally sorting) with
+canned synthetic results so serving overhead can be measured on its own.
+
+    python benchmarks/loadtest.py --concurrency 8 --requests 200 --stub pipeline
+    python benchmarks/loadtest.py --rate 2 --duration 60 --output load.json
+
+Requires httpx.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.suite import percentile  # noqa: E402
+from benchmarks.synthetic import generate_document  # noqa: E402
+from octosage.settings import settings  # noqa: E402
+
+
+class StubConverter:
+    """Stands in for DocConverter, returning a canned document per file"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def convert(self, source: str) -> dict:
+        document = generate_document(num_elements=200, seed=len(Path(source).name))
+        document["metadata"]["filename"] = Path(source).name
+        return document
+
+
+class StubSortOperation:
+    """Stands in for SortOperation, keeping the document order"""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def sort(self, data: dict) -> dict:
+        elements = [
+            dict(element, orders=float(index))
+            for index, element in enumerate(data["elements"])
+            if element["label"] not in ("page_footer", "caption")
+        ]
+        return {**data, "elements": elements}
+
+
+def install_stubs(stub: str):
+    # server imports these lazily from their modules on each request
+    if stub in ("converter", "pipeline"):
+        from octosage.converters import doc_converter
+
+        doc_converter.DocConverter = StubConverter
+    if stub == "pipeline":
+        from octosage.operations import sort_operation
+
+        sort_operation.SortOperation = StubSortOperation
+
+
+async def monitor_loop_lag(interval: float, lags: List[float], stop: asyncio.Event):
+    """Record how late the event loop wakes a sleeping task"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def send(client, endpoint: str, source: Path, form: dict, results: list):
+    started = time.perf_counter()
+    try:
+        with source.open("rb") as f:
+            response = await client.post(
+                endpoint,
+                files={"file": (source.name, f.read(), "application/pdf")},
+                data=form,
+            )
+        status = response.status_code
+    except Exception as e:
+        status = type(e).__name__
+    results.append(
+        {
+            "endpoint": endpoint,
+            "source": source.name,
+            "status": status,
+            "seconds": time.perf_counter() - started,
+        }
+    )
+
+
+async def run(args) -> dict:
+    import httpx
+    import server
+
+    install_stubs(args.stub)
+
+    sources = sorted(Path(args.samples).glob("*.pdf"))
+    if not sources:
+        raise SystemExit(f"No PDFs found in {args.samples}")
+
+    rng = random.Random(args.seed)
+    form = {"ocr_mode": args.ocr_mode}
+    results: List[Dict] = []
+    lags: List[float] = []
+    stop = asyncio.Event()
+
+    def next_request():
+        return rng.choice(args.endpoints), rng.choice(sources)
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with server.app.router.lifespan_context(server.app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://loadtest", timeout=None
+        ) as client:
+            monitor = asyncio.create_task(monitor_loop_lag(0.01, lags, stop))
+            started = time.perf_counter()
+            deadline = started + args.duration if args.duration else None
+
+            def more() -> bool:
+                if deadline is not None:
+                    return time.perf_counter() < deadline
+                return len(planned) < args.requests
+
+            planned = []
+            if args.rate:
+                # Open loop: Poisson arrivals regardless of completions
+                tasks = []
+                while more():
+                    endpoint, source = next_request()
+                    planned.append(source)
+                    tasks.append(
+                        asyncio.create_task(
+                            send(client, endpoint, source, form, results)
+                        )
+                    )
+                    await asyncio.sleep(rng.expovariate(args.rate))
+                await asyncio.gather(*tasks)
+            else:
+                # Closed loop: each worker sends its next request on completion
+                async def worker():
+                    while more():
+                        endpoint, source = next_request()
+                        planned.append(source)
+                        await send(client, endpoint, source, form, results)
+
+                await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await monitor
+
+    return build_report(args, results, lags, elapsed)
+
+
+def latency_summary(values: List[float]) -> dict:
+    if not values:
+        return {}
+    return {
+        "p50": round(percentile(values, 50), 4),
+        "p95": round(percentile(values, 95), 4),
+        "p99": round(percentile(values, 99), 4),
+        "max": round(max(values), 4),
+    }
+
+
+def build_report(args, results: List[Dict], lags: List[float], elapsed: float):
+    by_endpoint = defaultdict(list)
+    for result in results:
+        by_endpoint[result["endpoint"]].append(result)
+
+    def section(items):
+        ok = [item["seconds"] for item in items if item["status"] == 200]
+        statuses = Counter(str(item["status"]) for item in items)
+        return {
+            "requests": len(items),
+            "errors": len(items) - len(ok),
+            "error_rate": (
+                round((len(items) - len(ok)) / len(items), 4) if items else None
+            ),
+            "statuses": dict(sorted(statuses.items())),
+            "latency": latency_summary(ok),
+        }
+
+    return {
+        "config": {
+            "endpoints": args.endpoints,
+            "concurrency": None if args.rate else args.concurrency,
+            "rate": args.rate,
+            "requests": args.requests,
+            "duration": args.duration,
+            "stub": args.stub,
+            "ocr_mode": args.ocr_mode,
+            "seed": args.seed,
+        },
+        "elapsed": round(elapsed, 3),
+        "throughput": round(len(results) / elapsed, 3) if elapsed else None,
+        **section(results),
+        "endpoints": {
+            endpoint: section(items) for endpoint, items in sorted(by_endpoint.items())
+        },
+        "event_loop_lag": latency_summary(lags),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", default=str(ROOT / "sample"))
+    parser.add_argument("--endpoints", nargs="+", default=["/process", "/transform"])
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--rate", type=float, help="Open-loop arrival rate in requests/sec"
+    )
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument(
+        "--duration", type=float, help="Run for this many seconds instead"
+    )
+    parser.add_argument(
+        "--stub", choices=["none", "converter", "pipeline"], default="none"
+    )
+    parser.add_argument("--ocr-mode", default=settings.OCR_MODE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    # In-process storage instead of MinIO
+    settings.DRIVE = "memory"
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Compare OCR engines on the sample/ PDFs.
+
+Every document is converted with full-page OCR once per engine. The report
+lists pages/sec per engine and the text agreement of each engine with the
+reference engine (difflib ratio over the concatenated element text).
+
+    python benchmarks/ocr_engines.py --engines easyocr tesseract --output ocr.json
+"""
+
+import argparse
+import difflib
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from octosage.settings import settings  # noqa: E402
+
+
+def document_text(result: dict) -> str:
+    return "\n".join(
+        element["content"] for element in result["elements"] if element.get("content")
+    )
+
+
+def run_engine(engine: str, sources, languages) -> dict:
+    from octosage.converters.doc_converter import DocConverter
+
+    converter = DocConverter(
+        languages=languages,
+        force_full_page_ocr=True,
+        ocr_mode="on",
+        ocr_engine=engine,
+    )
+    # Warm up so model loading is not counted as throughput
+    converter.convert(str(sources[0]))
+
+    documents = {}
+    total_pages = 0
+    total_seconds = 0.0
+    for source in sources:
+        started = time.perf_counter()
+        result = converter.convert(str(source))
+        seconds = time.perf_counter() - started
+        pages = len(result["metadata"]["pages"])
+        total_pages += pages
+        total_seconds += seconds
+        documents[source.name] = {
+            "pages": pages,
+            "seconds": round(seconds, 3),
+            "text": document_text(result),
+        }
+
+    return {
+        "pages": total_pages,
+        "seconds": round(total_seconds, 3),
+        "pages_per_sec": (
+            round(total_pages / total_seconds, 3) if total_seconds else None
+        ),
+        "documents": documents,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--engines", nargs="+", default=["easyocr", "tesseract"])
+    parser.add_argument("--languages", nargs="+", default=["tr", "en"])
+    parser.add_argument("--samples", default=str(ROOT / "sample"))
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    sources = sorted(Path(args.samples).glob("*.pdf"))
+    if not sources:
+        print(f"No PDFs found in {args.samples}", file=sys.stderr)
+        return 1
+
+    # Keep crops off the configured bucket
+    settings.DRIVE = "memory"
+
+    runs = {
+        engine: run_engine(engine, sources, args.languages) for engine in args.engines
+    }
+
+    reference = args.engines[0]
+    report = {"reference": reference, "engines": {}}
+    for engine, run in runs.items():
+        agreement = {
+            name: round(
+                difflib.SequenceMatcher(
+                    None, runs[reference]["documents"][name]["text"], doc["text"]
+                ).ratio(),
+                4,
+            )
+            for name, doc in run["documents"].items()
+        }
+        report["engines"][engine] = {
+            "pages": run["pages"],
+            "seconds": run["seconds"],
+            "pages_per_sec": run["pages_per_sec"],
+            "agreement": agreement,
+            "documents": {
+                name: {"pages": doc["pages"], "seconds": doc["seconds"]}
+                for name, doc in run["documents"].items()
+            },
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Measure server cold start: time to import the server module and time to
+the first healthy /health response, each in a fresh interpreter as an
+autoscaled pod or forked worker would see it. Also lists which heavy
+dependencies were already loaded when /health first answered.
+
+    python benchmarks/startup.py --repeat 5 --output startup.json
+
+Requires httpx.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.suite import percentile  # noqa: E402
+
+HEAVY_MODULES = [
+    "torch",
+    "transformers",
+    "docling",
+    "easyocr",
+    "tesserocr",
+    "reportlab",
+    "PyPDF2",
+    "minio",
+]
+
+# Runs in the child interpreter; prints one JSON line
+PROBE = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import server
+imported = time.perf_counter()
+
+async def first_health():
+    import httpx
+    transport = httpx.ASGITransport(app=server.app)
+    async with server.app.router.lifespan_context(server.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/health")
+            response.raise_for_status()
+
+asyncio.run(first_health())
+healthy = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - started,
+    "healthy_seconds": healthy - started,
+    "loaded": [name for name in HEAVY if name in sys.modules],
+}))
+"""
+
+
+def probe_once(python: str) -> dict:
+    code = f"HEAVY = {HEAVY_MODULES!r}\n{PROBE}"
+    completed = subprocess.run(
+        [python, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(repeat: int, python: str) -> dict:
+    probes = [probe_once(python) for _ in range(repeat)]
+
+    def stats(key):
+        values = [probe[key] for probe in probes]
+        return {
+            "p50": round(percentile(values, 50), 4),
+            "max": round(max(values), 4),
+        }
+
+    return {
+        "repeat": repeat,
+        "import_seconds": stats("import_seconds"),
+        "time_to_healthy_seconds": stats("healthy_seconds"),
+        "heavy_modules_loaded": probes[-1]["loaded"],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--python", default=sys.executable)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.repeat, args.python)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
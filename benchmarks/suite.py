@@ -0,0 +1,246 @@
+"""
+Benchmark every pipeline stage over the sample/ corpus and synthetic
+documents, and fail when a stage regresses against a stored baseline.
+
+Corpus stages are read from the pipeline's own stage timings (conversion,
+ocr, process_document, png_encode, upload, sort_prepare, sort_inference,
+sort_decode, transform, draw_annotations). Synthetic stages run the
+pure-Python code on generated documents of --elements elements. Crops are
+written to in-memory storage.
+
+    python benchmarks/suite.py --output report.json --baseline benchmarks/baseline.json
+    python benchmarks/suite.py --synthetic-only --update-baseline
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import (  # noqa: E402
+    blank_pdf,
+    generate_document,
+    generate_sorted_document,
+)
+from octosage.settings import settings  # noqa: E402
+from octosage.utils.metrics import collect_timings, peak_rss_bytes  # noqa: E402
+
+DEFAULT_BASELINE = ROOT / "benchmarks" / "baseline.json"
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, dict]:
+    return {
+        stage: {
+            "count": len(values),
+            "p50": round(percentile(values, 50), 6),
+            "p95": round(percentile(values, 95), 6),
+            "total": round(sum(values), 6),
+        }
+        for stage, values in sorted(samples.items())
+        if values
+    }
+
+
+def run_corpus(samples_dir: Path, repeat: int, languages: List[str]) -> dict:
+    from octosage.converters.doc_converter import DocConverter
+    from octosage.operations.sort_operation import SortOperation
+    from octosage.operations.transform_operation import TransformOperation
+    from octosage.services.pdf_drawing_service import PDFDrawingService
+
+    sources = sorted(samples_dir.glob("*.pdf"))
+    if not sources:
+        raise SystemExit(f"No PDFs found in {samples_dir}")
+
+    converter = DocConverter(languages=languages)
+    drawing_service = PDFDrawingService()
+    # Warm up so one-off model downloads are not measured
+    converter.convert(str(sources[0]))
+
+    samples = defaultdict(list)
+    pages = 0
+    seconds = 0.0
+    for _ in range(repeat):
+        for source in sources:
+            started = time.perf_counter()
+            with collect_timings() as timings:
+                result = converter.convert(str(source))
+                sorted_result = SortOperation().sort(result)
+                TransformOperation(sorted_result).transform()
+                drawing_service.draw_annotations(str(source), sorted_result["elements"])
+            elapsed = time.perf_counter() - started
+
+            pages += len(result["metadata"]["pages"])
+            seconds += elapsed
+            samples["end_to_end"].append(elapsed)
+            for stage, value in timings.items():
+                samples[stage].append(value)
+
+    return {
+        "documents": len(sources),
+        "pages": pages,
+        "pages_per_sec": round(pages / seconds, 3) if seconds else None,
+        "stages": summarize(samples),
+    }
+
+
+def _timeit(func, repeat: int) -> List[float]:
+    values = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        values.append(time.perf_counter() - started)
+    return values
+
+
+def run_synthetic(num_elements: int, repeat: int) -> dict:
+    from octosage.operations.sort_operation import SortOperation
+    from octosage.operations.transform_operation import TransformOperation
+
+    document = generate_document(num_elements)
+    sorted_document = generate_sorted_document(num_elements)
+    sort_operator = SortOperation()
+
+    def sort_prepare():
+        data = sort_operator._preprocess_data(document)
+        for element in data["elements"]:
+            page_meta = data["metadata"]["pages"][element["page"]]
+            sort_operator._process_element(element, page_meta)
+
+    def transform():
+        TransformOperation(sorted_document).transform()
+
+    samples = {
+        "synthetic_sort_prepare": _timeit(sort_prepare, repeat),
+        "synthetic_transform": _timeit(transform, repeat),
+    }
+
+    try:
+        import torch
+        from octosage.utils.helpers import parse_logits
+
+        generator = torch.Generator().manual_seed(0)
+        logits = torch.randn(512, 512, generator=generator)
+        samples["synthetic_parse_logits"] = _timeit(
+            lambda: parse_logits(logits, 510), repeat
+        )
+    except ImportError:
+        pass
+
+    try:
+        from octosage.services.pdf_drawing_service import PDFDrawingService
+
+        drawing_service = PDFDrawingService()
+    except Exception as e:
+        # Missing fonts or reportlab; keep the rest of the report
+        print(f"Skipping synthetic_draw_annotations: {e}", file=sys.stderr)
+    else:
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as pdf:
+            pdf.write(blank_pdf(len(sorted_document["metadata"]["pages"])))
+            pdf.flush()
+            samples["synthetic_draw_annotations"] = _timeit(
+                lambda: drawing_service.draw_annotations(
+                    pdf.name, sorted_document["elements"]
+                ),
+                repeat,
+            )
+
+    stages = summarize(samples)
+    for stage in stages.values():
+        stage["elements_per_sec"] = (
+            round(num_elements / stage["p50"], 1) if stage["p50"] else None
+        )
+    return {"elements": num_elements, "stages": stages}
+
+
+def find_regressions(report: dict, baseline: dict, threshold: float) -> List[dict]:
+    """Stages whose p50 grew by more than threshold (a fraction) over the baseline"""
+    regressions = []
+    for section in ("corpus", "synthetic"):
+        current = report.get(section, {}).get("stages", {})
+        previous = baseline.get(section, {}).get("stages", {})
+        for stage, stats in current.items():
+            if stage not in previous or not previous[stage]["p50"]:
+                continue
+            ratio = stats["p50"] / previous[stage]["p50"]
+            if ratio > 1 + threshold:
+                regressions.append(
+                    {
+                        "section": section,
+                        "stage": stage,
+                        "baseline_p50": previous[stage]["p50"],
+                        "p50": stats["p50"],
+                        "ratio": round(ratio, 3),
+                    }
+                )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", default=str(ROOT / "sample"))
+    parser.add_argument("--languages", nargs="+", default=["tr", "en"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--elements", type=int, default=10000)
+    parser.add_argument("--synthetic-only", action="store_true")
+    parser.add_argument("--corpus-only", action="store_true")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed p50 slowdown per stage, as a fraction (0.2 = 20%%)",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    # Keep crops off the configured bucket
+    settings.DRIVE = "memory"
+
+    report = {}
+    if not args.synthetic_only:
+        report["corpus"] = run_corpus(Path(args.samples), args.repeat, args.languages)
+    if not args.corpus_only:
+        report["synthetic"] = run_synthetic(args.elements, args.repeat)
+    report["peak_rss_bytes"] = peak_rss_bytes()
+
+    baseline_path = Path(args.baseline)
+    regressions = []
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+    elif baseline_path.exists():
+        baseline = json.loads(baseline_path.read_text())
+        regressions = find_regressions(report, baseline, args.threshold)
+    report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression['section']}/{regression['stage']}: "
+            f"p50 {regression['p50']}s vs {regression['baseline_p50']}s "
+            f"(x{regression['ratio']})",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Synthetic documents in the ProcessManager output format, for exercising the
+pure-Python stages at scales the sample corpus does not reach.
+"""
+
+import random
+from typing import Dict, List
+
+PAGE_WIDTH = 612.0
+PAGE_HEIGHT = 792.0
+
+# (label, weight) roughly matching what docling emits for reports
+LABEL_WEIGHTS = [
+    ("text", 55),
+    ("section_header", 8),
+    ("list_item", 15),
+    ("table", 4),
+    ("picture", 4),
+    ("page_header", 3),
+    ("page_footer", 3),
+    ("caption", 3),
+    ("formula", 2),
+    ("checkbox_selected", 1),
+    ("checkbox_unselected", 2),
+]
+
+WORDS = (
+    "revenue stock quarter survey market report total balance share price "
+    "growth annual net profit asset index value period rate table figure"
+).split()
+
+
+def _sentence(rng: random.Random, min_words: int, max_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+def _element(
+    rng: random.Random, label: str, page: int, bbox: tuple, group_id=None
+) -> Dict:
+    element = {
+        "type": "text",
+        "page": page,
+        "label": label,
+        "bbox": bbox,
+        "group_id": group_id,
+    }
+    if label == "table":
+        element.update(
+            type="table",
+            captions=_sentence(rng, 3, 8),
+            data="|    | a | b |\n|---:|---|---|\n|  0 | 1 | 2 |",
+            path=f"memory://table_{page}_{rng.random():.6f}.png",
+        )
+    elif label == "picture":
+        element.update(
+            type="picture",
+            captions=_sentence(rng, 3, 8),
+            path=f"memory://picture_{page}_{rng.random():.6f}.png",
+        )
+    elif label in ("section_header", "page_header", "page_footer"):
+        element["content"] = _sentence(rng, 2, 6)
+    else:
+        element["content"] = _sentence(rng, 4, 60)
+    return element
+
+
+def generate_document(
+    num_elements: int = 10000, elements_per_page: int = 40, seed: int = 0
+) -> Dict:
+    """
+    Build a document with two-column pages of mixed elements. Boxes use the
+    bottom-left origin (l, t, r, b) like docling provenance.
+
+    Args:
+        num_elements: Total number of elements
+        elements_per_page: Elements laid out on each page
+        seed: Random seed, so runs are comparable
+
+    Returns:
+        dict: Document with "metadata" and "elements" keys
+    """
+    rng = random.Random(seed)
+    labels = [label for label, _ in LABEL_WEIGHTS]
+    weights = [weight for _, weight in LABEL_WEIGHTS]
+
+    elements: List[Dict] = []
+    pages = {}
+    page = 0
+    group = 0
+    while len(elements) < num_elements:
+        page += 1
+        pages[page] = {"width": PAGE_WIDTH, "height": PAGE_HEIGHT}
+        count = min(elements_per_page, num_elements - len(elements))
+        rows = (count + 1) // 2
+        row_height = (PAGE_HEIGHT - 80) / max(rows, 1)
+        group_id = None
+        for index in range(count):
+            label = rng.choices(labels, weights)[0]
+            column = index % 2
+            row = index // 2
+            left = 40 + column * (PAGE_WIDTH - 80) / 2
+            right = left + (PAGE_WIDTH - 100) / 2
+            top = PAGE_HEIGHT - 40 - row * row_height
+            bottom = top - row_height * rng.uniform(0.5, 0.95)
+            if label in ("table", "picture") and column == 0:
+                # Wide blocks spanning both columns
+                right = PAGE_WIDTH - 40
+
+            if label == "list_item":
+                if group_id is None:
+                    group += 1
+                    group_id = f"list/{group}"
+            else:
+                group_id = None
+
+            elements.append(
+                _element(rng, label, page, (left, top, right, bottom), group_id)
+            )
+
+    return {
+        "metadata": {
+            "pages": pages,
+            "filename": f"synthetic_{num_elements}.pdf",
+            "hash": f"synthetic-{seed}-{num_elements}",
+        },
+        "elements": elements,
+    }
+
+
+def generate_sorted_document(num_elements: int = 10000, seed: int = 0) -> Dict:
+    """Document as SortOperation returns it, ready for TransformOperation"""
+    document = generate_document(num_elements, seed=seed)
+    document["elements"] = [
+        dict(element, orders=float(index))
+        for index, element in enumerate(document["elements"])
+        if element["label"] not in ("page_footer", "caption")
+    ]
+    return document
+
+
+def blank_pdf(pages: int) -> bytes:
+    """A PDF with empty pages matching the synthetic page size"""
+    import io
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=(PAGE_WIDTH, PAGE_HEIGHT))
+    for _ in range(pages):
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
@@ -0,0 +1,125 @@
+"""
+Benchmark table serialization on large spreadsheet-like tables: the
+DataFrame/tabulate round-trip against the direct serializer, checking that
+the markdown output is identical.
+
+    python benchmarks/tables.py --rows 2000 --cols 12 --repeat 5
+
+Requires pandas and tabulate for the reference path.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.suite import percentile  # noqa: E402
+
+# Cell values seen in stock and financial report tables
+VALUES = [
+    "",
+    "-",
+    "12",
+    "1,234",
+    "1,234.56",
+    "-0.75",
+    "3.50",
+    "12%",
+    "(1,200)",
+    "N/A",
+    "Şirket A.Ş.",
+    "İstanbul",
+    "2024",
+    "0.0001",
+]
+
+
+def generate_table(num_rows: int, num_cols: int, header_rows: int = 1, seed: int = 0):
+    """TableItem with header_rows column-header rows and mostly numeric columns"""
+    from docling_core.types.doc import DocItemLabel, TableCell, TableData, TableItem
+
+    rng = random.Random(seed)
+    # Each column draws from a few values so numeric columns stay numeric
+    column_values = [rng.sample(VALUES, 4) for _ in range(num_cols)]
+    cells = []
+    for row in range(num_rows):
+        for col in range(num_cols):
+            header = row < header_rows
+            text = f"Column {col}" if header else rng.choice(column_values[col])
+            cells.append(
+                TableCell(
+                    text=text,
+                    start_row_offset_idx=row,
+                    end_row_offset_idx=row + 1,
+                    start_col_offset_idx=col,
+                    end_col_offset_idx=col + 1,
+                    column_header=header,
+                )
+            )
+    return TableItem(
+        self_ref="#/tables/0",
+        label=DocItemLabel.TABLE,
+        data=TableData(num_rows=num_rows, num_cols=num_cols, table_cells=cells),
+    )
+
+
+def _timeit(func, repeat: int):
+    values = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        values.append(time.perf_counter() - started)
+    return values, result
+
+
+def run(num_rows: int, num_cols: int, repeat: int) -> dict:
+    from octosage.processors.table_serializer import serialize_table
+
+    table = generate_table(num_rows, num_cols)
+
+    reference_times, reference = _timeit(
+        lambda: table.export_to_dataframe().to_markdown(), repeat
+    )
+    report = {
+        "rows": num_rows,
+        "cols": num_cols,
+        "dataframe_markdown": {"p50": round(percentile(reference_times, 50), 6)},
+    }
+    for table_format in ("markdown", "csv", "json"):
+        times, output = _timeit(
+            lambda: serialize_table(table, None, table_format), repeat
+        )
+        p50 = percentile(times, 50)
+        report[f"direct_{table_format}"] = {
+            "p50": round(p50, 6),
+            "speedup": round(report["dataframe_markdown"]["p50"] / p50, 2),
+        }
+        if table_format == "markdown":
+            report["markdown_identical"] = output == reference
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--cols", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.rows, args.cols, args.repeat)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output)
+    print(output)
+    return 0 if report["markdown_identical"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+import sys
+
+from octosage.cli import main
+
+sys.exit(main())
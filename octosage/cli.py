@@ -0,0 +1,267 @@
+import argparse
+import json
+import sys
+
+from octosage.services.batch_service import BatchService, collect_sources
+
+
+def batch_command(args: argparse.Namespace) -> int:
+    sources = collect_sources(args.inputs, args.list_file)
+    if not sources:
+        print("No documents found", file=sys.stderr)
+        return 1
+
+    service = BatchService(
+        options={
+            "languages": args.languages,
+            "force_full_page_ocr": args.force_full_page_ocr,
+            "images_scale": args.images_scale,
+            "num_threads": args.num_threads,
+            "ocr_mode": args.ocr_mode,
+            "ocr_engine": args.ocr_engine,
+            "bounded_memory": args.bounded_memory,
+            "store_intermediates": args.store_intermediates,
+            "table_format": args.table_format,
+            "incremental": args.incremental,
+            "image_scale_mode": args.image_scale_mode,
+            "extraction_profile": args.extraction_profile,
+            "include_labels": args.include_labels,
+            "exclude_labels": args.exclude_labels,
+            "transform": args.transform,
+        },
+        manifest_path=args.manifest,
+        workers=args.workers,
+        run_name=args.run_name,
+    )
+    summary = service.run(sources)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
+
+
+def prefetch_command(args: argparse.Namespace) -> int:
+    from octosage.utils.model_store import ModelStore
+
+    store = ModelStore(args.model_dir)
+    fetched = {}
+    if "layoutreader" in args.models:
+        fetched["layoutreader"] = store.prefetch_layoutreader(revision=args.revision)
+    if "docling" in args.models:
+        fetched["docling"] = store.prefetch_docling()
+    if "easyocr" in args.models:
+        fetched["easyocr"] = store.prefetch_easyocr(args.languages)
+    print(json.dumps({"model_dir": str(store.root), "models": fetched}, indent=2))
+    return 0
+
+
+def rerun_command(args: argparse.Namespace) -> int:
+    from octosage.services.intermediate_service import IntermediateService
+
+    service = IntermediateService()
+    try:
+        if args.transform:
+            result = service.transform(
+                args.document_hash, args.conversion_key, resort=args.resort
+            )
+        else:
+            result = service.sort(args.document_hash, args.conversion_key)
+    except FileNotFoundError:
+        print("No stored conversion found", file=sys.stderr)
+        return 1
+
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+
+def migrate_storage_command(args: argparse.Namespace) -> int:
+    from pathlib import Path
+
+    from octosage.settings import settings
+    from octosage.storage.local import LocalStorage, migrate_flat_layout
+
+    storage = LocalStorage(
+        args.path or settings.OUTPUT_DIR,
+        dedup=settings.LOCAL_DEDUP,
+        mmap_min_bytes=settings.LOCAL_MMAP_MIN_BYTES,
+    )
+    summary = migrate_flat_layout(
+        storage,
+        skip=[Path(settings.BATCH_MANIFEST_PATH)],
+        dry_run=args.dry_run,
+    )
+    if args.collect_garbage and not args.dry_run:
+        summary["blobs_removed"] = storage.collect_garbage()
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+def sort_parity_command(args: argparse.Namespace) -> int:
+    from octosage.operations.sort_parity import sort_parity
+    from octosage.services.intermediate_service import (
+        IntermediateService,
+        _decode_result,
+    )
+
+    documents = []
+    for path in args.inputs:
+        with open(path, "rb") as f:
+            documents.append(_decode_result(f.read()))
+    service = IntermediateService()
+    for document_hash, conversion_key in args.stored or []:
+        try:
+            documents.append(service.load_elements(document_hash, conversion_key))
+        except FileNotFoundError:
+            print(f"No stored conversion found: {document_hash}", file=sys.stderr)
+            return 1
+    if not documents:
+        print("No documents given", file=sys.stderr)
+        return 1
+
+    report = sort_parity(documents)
+    if not args.details:
+        report.pop("details")
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="octosage")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    batch = subparsers.add_parser(
+        "batch", help="Process many documents through one warm pipeline"
+    )
+    batch.add_argument("inputs", nargs="*", help="Files or directories")
+    batch.add_argument("--list-file", help="Text file with one document path per line")
+    batch.add_argument("--languages", nargs="+", default=["tr", "en"])
+    batch.add_argument(
+        "--no-full-page-ocr", dest="force_full_page_ocr", action="store_false"
+    )
+    batch.add_argument("--ocr-mode", choices=["on", "auto", "off"])
+    batch.add_argument("--ocr-engine", choices=["easyocr", "tesseract", "none"])
+    batch.add_argument(
+        "--bounded-memory",
+        action="store_true",
+        default=None,
+        help="Upload element images page by page during conversion",
+    )
+    batch.add_argument(
+        "--store-intermediates",
+        action="store_true",
+        default=None,
+        help="Keep conversions in storage so sort/transform can be re-run",
+    )
+    batch.add_argument("--table-format", choices=["markdown", "csv", "json"])
+    batch.add_argument(
+        "--incremental",
+        action="store_true",
+        default=None,
+        help="Only convert PDF pages not seen before with the same options",
+    )
+    batch.add_argument("--images-scale", type=float, default=2.0)
+    batch.add_argument(
+        "--image-scale-mode",
+        choices=["fixed", "adaptive"],
+        help="Crop pictures and tables at one scale or per element",
+    )
+    batch.add_argument(
+        "--extraction-profile",
+        choices=["full", "text+tables", "text-only"],
+        help="What to extract; the rest is not computed",
+    )
+    batch.add_argument(
+        "--include-labels", nargs="+", help="Keep only elements of these labels"
+    )
+    batch.add_argument(
+        "--exclude-labels", nargs="+", help="Drop elements of these labels"
+    )
+    batch.add_argument("--num-threads", type=int, default=4)
+    batch.add_argument(
+        "--transform", action="store_true", help="Store transformed chunks"
+    )
+    batch.add_argument("--workers", type=int, help="Worker processes")
+    batch.add_argument("--manifest", help="Path of the resume manifest")
+    batch.add_argument("--run-name", help="Prefix of the stored JSONL parts")
+    batch.set_defaults(func=batch_command)
+
+    rerun = subparsers.add_parser(
+        "rerun", help="Re-run sort or transform from a stored conversion"
+    )
+    rerun.add_argument("document_hash")
+    rerun.add_argument("conversion_key")
+    rerun.add_argument(
+        "--transform", action="store_true", help="Transform instead of only sorting"
+    )
+    rerun.add_argument(
+        "--resort",
+        action="store_true",
+        help="Sort again instead of transforming the stored sort result",
+    )
+    rerun.add_argument("--output", help="Write the result to this file")
+    rerun.set_defaults(func=rerun_command)
+
+    prefetch = subparsers.add_parser(
+        "prefetch", help="Download model artifacts into the local model store"
+    )
+    prefetch.add_argument(
+        "--models",
+        nargs="+",
+        choices=["layoutreader", "docling", "easyocr"],
+        default=["layoutreader", "docling", "easyocr"],
+    )
+    prefetch.add_argument("--model-dir", help="Defaults to settings.MODEL_DIR")
+    prefetch.add_argument(
+        "--revision", help="LayoutReader commit or tag to pin (default: latest)"
+    )
+    prefetch.add_argument(
+        "--languages", nargs="+", default=["tr", "en"], help="EasyOCR languages"
+    )
+    prefetch.set_defaults(func=prefetch_command)
+
+    migrate = subparsers.add_parser(
+        "migrate-storage", help="Move a flat local output directory to sharded layout"
+    )
+    migrate.add_argument("--path", help="Defaults to settings.OUTPUT_DIR")
+    migrate.add_argument(
+        "--dry-run", action="store_true", help="Only count the files to move"
+    )
+    migrate.add_argument(
+        "--collect-garbage",
+        action="store_true",
+        help="Also remove deduplicated blobs no object links to",
+    )
+    migrate.set_defaults(func=migrate_storage_command)
+
+    parity = subparsers.add_parser(
+        "sort-parity",
+        help="Compare flat and hierarchical sorting on converted documents",
+    )
+    parity.add_argument(
+        "inputs", nargs="*", help="Pre-sort results (stored elements.json files)"
+    )
+    parity.add_argument(
+        "--stored",
+        nargs=2,
+        action="append",
+        metavar=("HASH", "KEY"),
+        help="Stored conversion to compare on; repeatable",
+    )
+    parity.add_argument(
+        "--details", action="store_true", help="Include per-page agreement"
+    )
+    parity.set_defaults(func=sort_parity_command)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,43 @@
+import hashlib
+import tempfile
+from collections import defaultdict
+from pathlib import Path
 from docling.document_converter import DocumentConverter, PdfFormatOption
 from docling.backend.docling_parse_v2_backend import DoclingParseV2DocumentBackend
 from docling.datamodel.base_models import InputFormat
 from docling.datamodel.pipeline_options import (
-    PdfPipelineOptions,
     AcceleratorOptions,
     AcceleratorDevice,
     EasyOcrOptions,
+    TesseractOcrOptions,
 )
+from octosage.converters.image_scale import IMAGE_SCALE_MODES
+from octosage.converters.ocr_gate import pop_ocr_decisions
+from octosage.converters.page_fingerprint import extract_pages, page_fingerprints
+from octosage.converters.page_images import PageImageSink, stream_page_images
+from octosage.converters.pdf_pipeline import (
+    OctosagePdfPipeline,
+    OctosagePdfPipelineOptions,
+)
+from octosage.converters.tesseract_ocr import to_tesseract_languages
 from octosage.processors.manager import ProcessManager
-from typing import List
+from octosage.processors.table_serializer import TABLE_FORMATS
+from octosage.services.intermediate_service import (
+    IntermediateService,
+    conversion_key,
+)
+from octosage.services.page_cache_service import PageCacheService
+from octosage.utils.device import get_device
+from octosage.utils.memory import wait_for_memory
+from octosage.utils.metrics import PAGES, PAGES_REUSED, timed
+from octosage.utils.model_store import DOCLING_DIR, EASYOCR_DIR, ModelStore
+from typing import List, Optional, Tuple
 from octosage.settings import settings
+from octosage.types.profiles import get_profile
+
+# Formats docling reads with declarative backends: no OCR, layout or table
+# models, and a reading order given by the file itself
+OFFICE_FORMATS = {".docx": InputFormat.DOCX, ".pptx": InputFormat.PPTX}
 
 
 class DocConverter:
@@ -19,6 +47,16 @@ class DocConverter:
         force_full_page_ocr: bool = True,
         images_scale: float = 2.0,
         num_threads: int = 4,
+        ocr_mode: str = None,
+        ocr_engine: str = None,
+        bounded_memory: bool = None,
+        store_intermediates: bool = None,
+        table_format: str = None,
+        incremental: bool = None,
+        image_scale_mode: str = None,
+        extraction_profile: str = None,
+        include_labels: Optional[List[str]] = None,
+        exclude_labels: Optional[List[str]] = None,
     ):
         """
         Initialize the document converter with customizable parameters.
@@ -28,12 +66,61 @@ class DocConverter:
             force_full_page_ocr: Whether to force full page OCR
             images_scale: Scale factor for generated images
             num_threads: Number of threads for processing
+            ocr_mode: "on" to OCR every page, "auto" to OCR only pages without
+                a usable native text layer, "off" to never OCR
+            ocr_engine: "easyocr", "tesseract" or "none"
+            bounded_memory: Upload picture and table crops page by page while
+                converting instead of keeping every page image until the end
+            store_intermediates: Keep the DoclingDocument and pre-sort
+                elements in storage so sort/transform can be re-run later
+            table_format: Serialization of table data: "markdown", "csv"
+                or "json"
+            incremental: Fingerprint PDF pages and only convert those not
+                converted before with the same options, reusing the stored
+                results of the others
+            image_scale_mode: "fixed" to crop pictures and tables at
+                images_scale, "adaptive" to render each at a scale picked
+                from its size (at most images_scale by default)
+            extraction_profile: "full", "text+tables" or "text-only"; what
+                a profile leaves out is not computed at all
+            include_labels: Keep only elements of these docling labels
+            exclude_labels: Drop elements of these docling labels
         """
         self.languages = languages
         self.force_full_page_ocr = force_full_page_ocr
         self.images_scale = images_scale
         self.num_threads = num_threads
-        self.process_manager = ProcessManager()
+        self.ocr_mode = ocr_mode or settings.OCR_MODE
+        if self.ocr_mode not in ("on", "auto", "off"):
+            raise ValueError(f"Unsupported OCR mode: {self.ocr_mode}")
+        self.ocr_engine = ocr_engine or settings.OCR_ENGINE
+        if self.ocr_engine not in ("easyocr", "tesseract", "none"):
+            raise ValueError(f"Unsupported OCR engine: {self.ocr_engine}")
+        if self.ocr_engine == "none":
+            self.ocr_mode = "off"
+        self.bounded_memory = (
+            settings.BOUNDED_MEMORY if bounded_memory is None else bounded_memory
+        )
+        self.store_intermediates = (
+            settings.STORE_INTERMEDIATES
+            if store_intermediates is None
+            else store_intermediates
+        )
+        self.table_format = table_format or settings.TABLE_FORMAT
+        if self.table_format not in TABLE_FORMATS:
+            raise ValueError(f"Unsupported table format: {self.table_format}")
+        self.incremental = settings.INCREMENTAL if incremental is None else incremental
+        self.image_scale_mode = image_scale_mode or settings.IMAGE_SCALE_MODE
+        if self.image_scale_mode not in IMAGE_SCALE_MODES:
+            raise ValueError(f"Unsupported image scale mode: {self.image_scale_mode}")
+        self.profile = get_profile(
+            extraction_profile or settings.EXTRACTION_PROFILE,
+            settings.INCLUDE_LABELS if include_labels is None else include_labels,
+            settings.EXCLUDE_LABELS if exclude_labels is None else exclude_labels,
+        )
+        self.process_manager = ProcessManager(self.table_format, profile=self.profile)
+        self._doc_converter = None
+        self._office_converter = None
 
     def convert(self, source: str) -> list:
         """
@@ -45,40 +132,319 @@ class DocConverter:
         Returns:
             list: Processed document elements
         """
+        if self.incremental and Path(source).suffix.lower() == ".pdf":
+            processed, document = self._convert_incremental(source)
+        else:
+            processed, document = self._convert(source)
+
+        if self.store_intermediates:
+            IntermediateService(self.process_manager.storage).save_conversion(
+                document, processed, self.conversion_options
+            )
+        return processed
+
+    def save_sorted(self, sorted_result: dict):
+        """Store what sorting produced for later re-runs and revisions"""
+        if self.store_intermediates:
+            IntermediateService(self.process_manager.storage).save_sorted(sorted_result)
+        if self.incremental:
+            PageCacheService(self.process_manager.storage).save_orders(sorted_result)
+
+    def _convert(self, source: str) -> tuple:
+        """Convert and process a whole document; returns the result and document"""
+        if Path(source).suffix.lower() in OFFICE_FORMATS:
+            return self._convert_office(source)
+
+        doc_converter = self.get_doc_converter()
+        uploaded_images = None
+        if self.bounded_memory:
+            # Slow intake instead of starting a document over the ceiling
+            wait_for_memory(self.memory_ceiling_bytes, settings.MEMORY_WAIT_TIMEOUT)
+        if self.streams_crops:
+            sink = PageImageSink(self.process_manager.storage)
+            with timed("conversion"), stream_page_images(sink):
+                result = doc_converter.convert(source)
+            uploaded_images = sink.paths
+        else:
+            with timed("conversion"):
+                result = doc_converter.convert(source)
+        PAGES.inc(len(result.document.pages))
+
+        ocr_pages = pop_ocr_decisions(result) if self.ocr_mode == "auto" else None
+        if ocr_pages is None:
+            ocr_pages = {
+                page_no: self.ocr_mode == "on" for page_no in result.document.pages
+            }
+
+        processed = self.process_manager.process_document(
+            result.document, ocr_pages, uploaded_images
+        )
+        return processed, result.document
+
+    def _convert_office(self, source: str) -> tuple:
+        """Convert a DOCX or PPTX document without the PDF pipeline"""
+        with timed("conversion"):
+            result = self.get_office_converter().convert(source)
+        PAGES.inc(len(result.document.pages))
+
+        processed = self.process_manager.process_document(
+            result.document, {page_no: False for page_no in result.document.pages}
+        )
+        return processed, result.document
+
+    def _convert_incremental(self, source: str) -> Tuple[dict, None]:
+        """
+        Convert only the pages of a PDF whose fingerprint has no stored
+        result, as one PDF of those pages, and splice the stored results of
+        the others in. Page numbers are mapped back to the source and group
+        ids renumbered, keeping groups of one conversion together.
+
+        Returns:
+            tuple: The spliced result and None, as there is no DoclingDocument
+                covering every page
+        """
+        fingerprints = page_fingerprints(source, settings.PAGE_FINGERPRINT_SCALE)
+        key = conversion_key(self.conversion_options)
+        page_cache = PageCacheService(self.process_manager.storage)
+        records = page_cache.load_pages(key, fingerprints)
+        changed = [
+            page_no for page_no in sorted(fingerprints) if page_no not in records
+        ]
+
+        converted = {"metadata": {"pages": {}, "hash": None}, "elements": []}
+        if changed:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                subset = source
+                if len(changed) < len(fingerprints):
+                    subset = str(Path(temp_dir) / Path(source).name)
+                    extract_pages(source, changed, subset)
+                converted, _ = self._convert(subset)
+        PAGES_REUSED.inc(len(records))
+
+        # Page numbers of the converted subset to those of the source
+        page_map = {index + 1: page_no for index, page_no in enumerate(changed)}
+        subset_pages = {page_no: index for index, page_no in page_map.items()}
+        converted_pages = defaultdict(list)
+        for element in converted["elements"]:
+            converted_pages[page_map.get(element["page"])].append(element)
+
+        group_ids = {}
+
+        def stitch(group_id: Optional[str], origin) -> Optional[str]:
+            if group_id is None:
+                return None
+            if (origin, group_id) not in group_ids:
+                label = group_id.split("/")[0]
+                group_ids[(origin, group_id)] = f"{label}/{len(group_ids)}"
+            return group_ids[(origin, group_id)]
+
+        pages = {}
+        elements = []
+        for page_no in sorted(fingerprints):
+            record = records.get(page_no)
+            if record is None:
+                pages[page_no] = {
+                    **converted["metadata"]["pages"][subset_pages[page_no]],
+                    "fingerprint": fingerprints[page_no],
+                }
+                page_elements = [
+                    {
+                        **element,
+                        "page": page_no,
+                        "group_id": stitch(element["group_id"], None),
+                    }
+                    for element in converted_pages[page_no]
+                ]
+            else:
+                pages[page_no] = {
+                    **record["page"],
+                    "fingerprint": fingerprints[page_no],
+                    "reused": True,
+                }
+                orders = record.get("orders", {}).get(settings.SORT_MODE)
+                if orders is not None:
+                    # Spliced orders only stand for a sort in this mode
+                    pages[page_no]["sort_mode"] = settings.SORT_MODE
+                else:
+                    orders = [None] * len(record["elements"])
+                page_elements = []
+                for element, order in zip(record["elements"], orders):
+                    element = {
+                        **element,
+                        "page": page_no,
+                        "group_id": stitch(element["group_id"], record["source"]),
+                    }
+                    if order is not None:
+                        element["orders"] = order
+                    page_elements.append(element)
+            elements.extend(page_elements)
+        # Elements without a page are not stored, only passed on
+        elements.extend(converted_pages[None])
+
+        result = {
+            "metadata": {
+                "pages": pages,
+                "filename": Path(source).name,
+                "hash": _binary_hash(source),
+                "conversion_key": key,
+                "reused_pages": len(records),
+            },
+            "elements": elements,
+        }
+        # Group ids are unique within this result, so it is their origin
+        page_cache.save_pages(key, str(result["metadata"]["hash"]), result)
+        return result, None
+
+    @property
+    def conversion_options(self) -> dict:
+        """Options that change what a conversion produces"""
+        options = {
+            "languages": self.languages,
+            "force_full_page_ocr": self.force_full_page_ocr,
+            "images_scale": self.images_scale,
+            "ocr_mode": self.ocr_mode,
+            "ocr_engine": self.ocr_engine,
+            "table_format": self.table_format,
+        }
+        if self.image_scale_mode != "fixed":
+            # Only added when set, so fixed-scale keys stay as they were
+            options["image_scale"] = {
+                "mode": self.image_scale_mode,
+                "pixel_budget": settings.IMAGE_PIXEL_BUDGET,
+                "min_scale": settings.IMAGE_MIN_SCALE,
+                "max_scale": self.max_crop_scale,
+                "flat_threshold": settings.IMAGE_FLAT_THRESHOLD,
+            }
+        if not self.profile.is_default:
+            options["profile"] = self.profile.to_dict()
+        return options
+
+    @property
+    def streams_crops(self) -> bool:
+        """Whether picture and table crops are stored while converting"""
+        if not self.profile.needs_images:
+            return False
+        return self.bounded_memory or self.image_scale_mode == "adaptive"
+
+    @property
+    def max_crop_scale(self) -> float:
+        return settings.IMAGE_MAX_SCALE or self.images_scale
+
+    @property
+    def memory_ceiling_bytes(self):
+        if not settings.MEMORY_CEILING_MB:
+            return None
+        return settings.MEMORY_CEILING_MB * 1024 * 1024
+
+    def get_doc_converter(self) -> DocumentConverter:
+        """
+        Build the docling converter once and reuse it, so its pipeline
+        models stay loaded across documents.
+        """
+        if self._doc_converter is None:
+            self._doc_converter = self._build_doc_converter()
+        return self._doc_converter
+
+    def get_office_converter(self) -> DocumentConverter:
+        """
+        Converter for Office documents using docling's default backends and
+        simple pipeline; building it touches no model or device.
+        """
+        if self._office_converter is None:
+            self._office_converter = DocumentConverter(
+                allowed_formats=list(OFFICE_FORMATS.values())
+            )
+        return self._office_converter
 
+    def _build_doc_converter(self) -> DocumentConverter:
         # Determine the device based on settings
-        if settings.DEVICE.startswith("cuda"):
+        if get_device().startswith("cuda"):
             device = AcceleratorDevice.CUDA
         else:
             device = AcceleratorDevice.CPU
 
-        pipeline_options = PdfPipelineOptions()
-        pipeline_options.do_ocr = True
-        pipeline_options.ocr_options = EasyOcrOptions(
-            lang=self.languages,
-            force_full_page_ocr=self.force_full_page_ocr,
-        )
+        pipeline_options = OctosagePdfPipelineOptions()
+        pipeline_options.do_ocr = self.ocr_mode != "off"
+        pipeline_options.ocr_auto = self.ocr_mode == "auto"
+        pipeline_options.ocr_options = self._build_ocr_options()
+
+        # Prefetched layout and table models, instead of docling's download
+        artifacts_path = ModelStore().require(DOCLING_DIR)
+        if artifacts_path is not None:
+            pipeline_options.artifacts_path = str(artifacts_path)
 
-        pipeline_options.generate_picture_images = True
+        # Tables left out by the profile skip structure recognition
+        pipeline_options.do_table_structure = self.profile.keeps_tables
+
+        # In bounded-memory and adaptive-scale modes crops are streamed out
+        # during assembly rather than kept on the document until the end
+        keeps_pictures = self.profile.keeps_pictures
+        keeps_table_images = self.profile.keeps_table_images
+        pipeline_options.generate_picture_images = (
+            keeps_pictures and not self.streams_crops
+        )
         pipeline_options.images_scale = self.images_scale
-        pipeline_options.generate_table_images = True
+        pipeline_options.generate_table_images = (
+            keeps_table_images and not self.streams_crops
+        )
+        pipeline_options.stream_picture_images = keeps_pictures and self.streams_crops
+        pipeline_options.stream_table_images = keeps_table_images and self.streams_crops
+        pipeline_options.memory_ceiling_bytes = self.memory_ceiling_bytes
+        if self.image_scale_mode == "adaptive":
+            # Crops are rendered at their own scale, so pages are only
+            # rendered at the 1x the layout model needs anyway
+            pipeline_options.images_scale = 1.0
+            pipeline_options.crop_scale_mode = "adaptive"
+            pipeline_options.crop_pixel_budget = settings.IMAGE_PIXEL_BUDGET
+            pipeline_options.crop_min_scale = settings.IMAGE_MIN_SCALE
+            pipeline_options.crop_max_scale = self.max_crop_scale
+            pipeline_options.crop_flat_threshold = settings.IMAGE_FLAT_THRESHOLD
+        if not self.profile.needs_images:
+            # Nothing is cropped, so pages are only rendered at the 1x the
+            # layout model needs
+            pipeline_options.images_scale = 1.0
         pipeline_options.accelerator_options = AcceleratorOptions(
             num_threads=self.num_threads, device=device
         )
 
-        doc_converter = DocumentConverter(
-            allowed_formats=[
-                InputFormat.PDF,
-                InputFormat.DOCX,
-                InputFormat.PPTX,
-            ],
+        return DocumentConverter(
+            allowed_formats=[InputFormat.PDF],
             format_options={
                 InputFormat.PDF: PdfFormatOption(
+                    pipeline_cls=OctosagePdfPipeline,
                     pipeline_options=pipeline_options,
                     backend=DoclingParseV2DocumentBackend,
                 )
             },
         )
-        result = doc_converter.convert(source)
 
-        return self.process_manager.process_document(result.document)
+    def _build_ocr_options(self):
+        # Pages reaching OCR in auto mode have no usable text layer
+        force_full_page_ocr = self.force_full_page_ocr or self.ocr_mode == "auto"
+
+        if self.ocr_engine == "tesseract":
+            return TesseractOcrOptions(
+                lang=to_tesseract_languages(self.languages),
+                path=settings.TESSERACT_PATH,
+                force_full_page_ocr=force_full_page_ocr,
+            )
+
+        ocr_options = EasyOcrOptions(
+            lang=self.languages,
+            force_full_page_ocr=force_full_page_ocr,
+        )
+        if self.ocr_mode != "off":
+            model_path = ModelStore().require(EASYOCR_DIR)
+            if model_path is not None:
+                ocr_options.model_storage_directory = str(model_path)
+                ocr_options.download_enabled = False
+        return ocr_options
+
+
+def _binary_hash(source: str) -> int:
+    """The document hash docling reports: a SHA-256 of the file cut to 64 bits"""
+    hasher = hashlib.sha256()
+    with open(source, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            hasher.update(block)
+    return int(hasher.hexdigest(), 16) & 0xFFFFFFFFFFFFFFFF
@@ -0,0 +1,81 @@
+import threading
+import weakref
+from typing import Dict, Iterable, Optional
+
+from docling.datamodel.base_models import Page
+from docling.datamodel.document import ConversionResult
+from docling.models.base_model import BasePageModel
+
+# OCR decisions per conversion, keyed by id() of the ConversionResult. An
+# entry is dropped when its ConversionResult is collected, so a conversion
+# that raised leaves nothing behind and an id reused by a later result
+# never finds an earlier document's decisions
+_decisions: Dict[int, Dict[int, bool]] = {}
+_decisions_lock = threading.Lock()
+
+
+def pop_ocr_decisions(conv_res: ConversionResult) -> Optional[Dict[int, bool]]:
+    """
+    Return and forget the per-page OCR decisions of a finished conversion,
+    keyed by 1-based page number like DoclingDocument.pages.
+    """
+    with _decisions_lock:
+        return _decisions.pop(id(conv_res), None)
+
+
+class NativeTextOcrGate(BasePageModel):
+    """
+    Page model wrapping the OCR model. Pages whose native text layer is
+    rich enough skip OCR; scanned or text-poor pages are handed to the
+    wrapped model.
+    """
+
+    def __init__(
+        self,
+        ocr_model: BasePageModel,
+        min_chars: int,
+        max_bitmap_coverage: float,
+    ):
+        """
+        Args:
+            ocr_model: The OCR model to run on pages that need it
+            min_chars: Pages with fewer native characters are OCRed
+            max_bitmap_coverage: Pages with a larger fraction covered by
+                bitmaps are OCRed
+        """
+        self.ocr_model = ocr_model
+        self.min_chars = min_chars
+        self.max_bitmap_coverage = max_bitmap_coverage
+
+    def needs_ocr(self, page: Page) -> bool:
+        """Check the page's native text layer through the parse backend"""
+        backend = page._backend
+        if backend is None or page.size is None:
+            return True
+
+        chars = sum(len(cell.text.strip()) for cell in backend.get_text_cells())
+        if chars < self.min_chars:
+            return True
+
+        page_area = page.size.width * page.size.height
+        if page_area <= 0:
+            return True
+        bitmap_area = sum(rect.area() for rect in backend.get_bitmap_rects())
+        return bitmap_area / page_area > self.max_bitmap_coverage
+
+    def __call__(
+        self, conv_res: ConversionResult, page_batch: Iterable[Page]
+    ) -> Iterable[Page]:
+        for page in page_batch:
+            needs_ocr = self.needs_ocr(page)
+            with _decisions_lock:
+                decisions = _decisions.get(id(conv_res))
+                if decisions is None:
+                    decisions = _decisions[id(conv_res)] = {}
+                    weakref.finalize(conv_res, _decisions.pop, id(conv_res), None)
+                decisions[page.page_no + 1] = needs_ocr
+
+            if needs_ocr:
+                yield from self.ocr_model(conv_res, [page])
+            else:
+                yield page
@@ -0,0 +1,62 @@
+import hashlib
+from pathlib import Path
+from typing import Dict, List
+
+from octosage.utils.metrics import timed
+
+
+def page_fingerprints(source: str, scale: float = 0.25) -> Dict[int, str]:
+    """
+    Fingerprint every page of a PDF by its size, rotation, text layer and a
+    low-resolution rendering, so a page is recognised across revisions of
+    the document whatever else changed around it.
+
+    Args:
+        source: Path to the PDF
+        scale: Rendering scale of the thumbnail (1.0 is 72 dpi)
+
+    Returns:
+        dict: Page number (1-based, as in docling) to hex digest
+    """
+    import pypdfium2 as pdfium
+
+    fingerprints = {}
+    with timed("page_fingerprint"):
+        pdf = pdfium.PdfDocument(source)
+        try:
+            for index in range(len(pdf)):
+                page = pdf[index]
+                hasher = hashlib.sha256()
+                width, height = page.get_size()
+                hasher.update(
+                    f"{width:.2f}x{height:.2f}/{page.get_rotation()}".encode()
+                )
+
+                textpage = page.get_textpage()
+                hasher.update(textpage.get_text_range().encode("utf-8"))
+                textpage.close()
+
+                # Catches changed images and vector content the text misses
+                bitmap = page.render(scale=scale)
+                hasher.update(bytes(bitmap.buffer))
+                bitmap.close()
+                page.close()
+
+                fingerprints[index + 1] = hasher.hexdigest()[:32]
+        finally:
+            pdf.close()
+    return fingerprints
+
+
+def extract_pages(source: str, page_numbers: List[int], target: Path):
+    """Write the given pages of a PDF, in order, to a new PDF"""
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(source)
+    subset = pdfium.PdfDocument.new()
+    try:
+        subset.import_pages(pdf, [page_no - 1 for page_no in page_numbers])
+        subset.save(target)
+    finally:
+        subset.close()
+        pdf.close()
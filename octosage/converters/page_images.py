@@ -0,0 +1,132 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional
+
+from docling.datamodel.base_models import Page
+from docling.datamodel.document import ConversionResult
+from docling.models.base_model import BasePageModel
+from docling.models.layout_model import LayoutModel
+from octosage.converters.image_scale import ScalePolicy
+from octosage.processors.base import image_key, save_png
+from octosage.storage.base import BaseStorage
+from octosage.utils.memory import wait_for_memory
+from octosage.utils.metrics import timed
+
+# Sink of the conversion running in the current thread
+_image_sink: ContextVar[Optional["PageImageSink"]] = ContextVar(
+    "page_image_sink", default=None
+)
+
+
+class PageImageSink:
+    """
+    Receives picture and table crops page by page during conversion and
+    uploads them straight away, keeping only their storage paths.
+    """
+
+    def __init__(self, storage: BaseStorage):
+        self.storage = storage
+        self.paths: Dict[tuple, str] = {}
+
+    def handle_page(
+        self,
+        conv_res: ConversionResult,
+        page: Page,
+        policy: ScalePolicy,
+        pictures: bool,
+        tables: bool,
+    ):
+        """
+        Crop the pictures and tables the layout model found on a page. Runs
+        before assembly, which drops the page images and, on older docling
+        releases, unloads the page backend adaptive crops render from.
+        """
+        if page.predictions.layout is None or page.size is None:
+            return
+        if policy.adaptive:
+            # Crops are rendered one by one; the layout model's 1x page
+            # image serves as their preview
+            image = page.get_image(scale=1.0)
+        else:
+            image = page.get_image(scale=policy.fixed_scale)
+        if image is None:
+            return
+
+        page_no = page.page_no + 1
+        for cluster in page.predictions.layout.clusters:
+            # The labels assembly turns into FigureElement and Table
+            if cluster.label == LayoutModel.FIGURE_LABEL and pictures:
+                kind = "pictures"
+            elif cluster.label in LayoutModel.TABLE_LABELS and tables:
+                kind = "tables"
+            else:
+                continue
+
+            bbox = cluster.bbox
+            if policy.adaptive:
+                with timed("image_crop"):
+                    preview = image.crop(bbox.as_tuple())
+                    scale = policy.scale_for(bbox.width, bbox.height, preview)
+                    cropped = page._backend.get_page_image(scale=scale, cropbox=bbox)
+            else:
+                with timed("image_crop"):
+                    cropped = image.crop(
+                        bbox.scaled(scale=policy.fixed_scale).as_tuple()
+                    )
+            filename = f"{conv_res.input.document_hash}_pages_{page_no}_{kind}_{cluster.id}.png"
+            self.paths[image_key(page_no, bbox.as_tuple())] = save_png(
+                self.storage, cropped, filename
+            )
+
+
+@contextmanager
+def stream_page_images(sink: PageImageSink):
+    """Route the crops of conversions run inside the block to the sink"""
+    token = _image_sink.set(sink)
+    try:
+        yield sink
+    finally:
+        _image_sink.reset(token)
+
+
+class PageImageStreamModel(BasePageModel):
+    """
+    Page model of the streaming pipeline (bounded memory or adaptive crop
+    scales), placed right before PageAssembleModel: hands each page to the
+    current sink while its images and backend are still there. Assembly
+    then drops the page images as usual.
+    """
+
+    def __init__(self, policy: ScalePolicy, pictures: bool, tables: bool):
+        self.policy = policy
+        self.pictures = pictures
+        self.tables = tables
+
+    def __call__(
+        self, conv_res: ConversionResult, page_batch: Iterable[Page]
+    ) -> Iterable[Page]:
+        for page in page_batch:
+            sink = _image_sink.get()
+            if sink is not None:
+                sink.handle_page(
+                    conv_res, page, self.policy, self.pictures, self.tables
+                )
+            yield page
+
+
+class MemoryThrottleModel(BasePageModel):
+    """
+    First page model of the bounded-memory pipeline: holds back new pages
+    while the process is above its memory ceiling.
+    """
+
+    def __init__(self, ceiling_bytes: Optional[int], timeout: float):
+        self.ceiling_bytes = ceiling_bytes
+        self.timeout = timeout
+
+    def __call__(
+        self, conv_res: ConversionResult, page_batch: Iterable[Page]
+    ) -> Iterable[Page]:
+        for page in page_batch:
+            wait_for_memory(self.ceiling_bytes, self.timeout)
+            yield page
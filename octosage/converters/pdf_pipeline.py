@@ -0,0 +1,106 @@
+from typing import Optional
+
+from docling.datamodel.pipeline_options import PdfPipelineOptions, TesseractOcrOptions
+from docling.models.page_assemble_model import PageAssembleModel
+from docling.pipeline.standard_pdf_pipeline import StandardPdfPipeline
+from octosage.converters.image_scale import ScalePolicy
+from octosage.converters.ocr_gate import NativeTextOcrGate
+from octosage.converters.page_images import MemoryThrottleModel, PageImageStreamModel
+from octosage.converters.tesseract_ocr import PooledTesseractOcrModel, TimedOcrModel
+from octosage.settings import settings
+
+
+class OctosagePdfPipelineOptions(PdfPipelineOptions):
+    """PDF pipeline options extended with Octosage's conversion modes"""
+
+    # Only OCR pages without a usable native text layer
+    ocr_auto: bool = False
+    # Upload picture/table crops page by page instead of keeping them in
+    # the DoclingDocument; generate_*_images must then be False
+    stream_picture_images: bool = False
+    stream_table_images: bool = False
+    memory_ceiling_bytes: Optional[int] = None
+    # Scale policy of streamed crops (see octosage.converters.image_scale);
+    # images_scale is the fixed scale, crop_scale_mode "adaptive" renders
+    # each crop on its own instead of cutting it from a page image
+    crop_scale_mode: str = "fixed"
+    crop_pixel_budget: int = 1_000_000
+    crop_min_scale: float = 0.5
+    crop_max_scale: Optional[float] = None
+    crop_flat_threshold: Optional[float] = None
+
+
+class OctosagePdfPipeline(StandardPdfPipeline):
+    """
+    Standard PDF pipeline with pooled Tesseract OCR, timed OCR, optional
+    per-page OCR gating and optional bounded-memory image streaming.
+    """
+
+    def __init__(self, pipeline_options: OctosagePdfPipelineOptions):
+        super().__init__(pipeline_options)
+        self.pipeline_options: OctosagePdfPipelineOptions
+
+        if self._streams_images():
+            self.build_pipe.insert(
+                0,
+                MemoryThrottleModel(
+                    pipeline_options.memory_ceiling_bytes,
+                    settings.MEMORY_WAIT_TIMEOUT,
+                ),
+            )
+            # Crops are taken before assembly drops the page images and
+            # (docling <= 2.15) unloads the page backend
+            assemble_at = next(
+                (
+                    index
+                    for index, model in enumerate(self.build_pipe)
+                    if isinstance(model, PageAssembleModel)
+                ),
+                len(self.build_pipe),
+            )
+            self.build_pipe.insert(
+                assemble_at,
+                PageImageStreamModel(
+                    policy=ScalePolicy(
+                        mode=pipeline_options.crop_scale_mode,
+                        fixed_scale=pipeline_options.images_scale,
+                        pixel_budget=pipeline_options.crop_pixel_budget,
+                        min_scale=pipeline_options.crop_min_scale,
+                        max_scale=pipeline_options.crop_max_scale,
+                        flat_threshold=pipeline_options.crop_flat_threshold,
+                    ),
+                    pictures=pipeline_options.stream_picture_images,
+                    tables=pipeline_options.stream_table_images,
+                ),
+            )
+
+    def _streams_images(self) -> bool:
+        return (
+            self.pipeline_options.stream_picture_images
+            or self.pipeline_options.stream_table_images
+        )
+
+    def get_ocr_model(self, *args, **kwargs):
+        if isinstance(self.pipeline_options.ocr_options, TesseractOcrOptions):
+            ocr_model = PooledTesseractOcrModel(
+                enabled=self.pipeline_options.do_ocr,
+                options=self.pipeline_options.ocr_options,
+            )
+        else:
+            ocr_model = super().get_ocr_model(*args, **kwargs)
+
+        if ocr_model is None or not self.pipeline_options.do_ocr:
+            return ocr_model
+
+        ocr_model = TimedOcrModel(ocr_model)
+        if self.pipeline_options.ocr_auto:
+            ocr_model = NativeTextOcrGate(
+                ocr_model,
+                min_chars=settings.OCR_AUTO_MIN_CHARS,
+                max_bitmap_coverage=settings.OCR_AUTO_MAX_BITMAP_COVERAGE,
+            )
+        return ocr_model
+
+    @classmethod
+    def get_default_options(cls) -> OctosagePdfPipelineOptions:
+        return OctosagePdfPipelineOptions()
@@ -0,0 +1,177 @@
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from docling_core.types.doc import BoundingBox, CoordOrigin
+from docling.datamodel.base_models import OcrCell, Page
+from docling.datamodel.document import ConversionResult
+from docling.datamodel.pipeline_options import TesseractOcrOptions
+from docling.models.base_model import BasePageModel
+from docling.models.base_ocr_model import BaseOcrModel
+from docling.utils.profiling import TimeRecorder
+from octosage.utils.metrics import timed
+
+# ISO 639-1 codes used by the API (and EasyOCR) mapped to Tesseract's codes
+TESSERACT_LANGUAGES = {
+    "ar": "ara",
+    "de": "deu",
+    "en": "eng",
+    "es": "spa",
+    "fr": "fra",
+    "it": "ita",
+    "nl": "nld",
+    "pt": "por",
+    "ru": "rus",
+    "tr": "tur",
+}
+
+
+def to_tesseract_languages(languages: List[str]) -> List[str]:
+    """Translate language codes to Tesseract's, leaving unknown codes as-is"""
+    return [TESSERACT_LANGUAGES.get(lang, lang) for lang in languages]
+
+
+class TesseractPool:
+    """
+    Per-thread pool of initialised PyTessBaseAPI instances, one per language
+    set. Initialising Tesseract loads its traineddata, so instances are kept
+    for the life of the thread instead of being built for every document.
+    PyTessBaseAPI is not thread-safe, hence one instance per thread.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self, lang: str, path: Optional[str] = None):
+        """
+        Return this thread's API for the language set, creating it on first use.
+
+        Args:
+            lang: Tesseract language string, e.g. "tur+eng"
+            path: Optional tessdata directory
+        """
+        import tesserocr
+
+        apis: Dict[tuple, object] = self._local.__dict__.setdefault("apis", {})
+        key = (lang, path)
+        api = apis.get(key)
+        if api is None:
+            kwargs = {"path": path} if path is not None else {}
+            api = tesserocr.PyTessBaseAPI(
+                lang=lang,
+                psm=tesserocr.PSM.AUTO,
+                init=True,
+                oem=tesserocr.OEM.DEFAULT,
+                **kwargs,
+            )
+            apis[key] = api
+        return api
+
+
+tesseract_pool = TesseractPool()
+
+
+class PooledTesseractOcrModel(BaseOcrModel):
+    """
+    Tesseract OCR model drawing its PyTessBaseAPI from the shared pool.
+    Mirrors docling's TesseractOcrModel.
+    """
+
+    def __init__(self, enabled: bool, options: TesseractOcrOptions):
+        super().__init__(enabled=enabled, options=options)
+        self.options: TesseractOcrOptions
+
+        self.scale = 3  # multiplier for 72 dpi == 216 dpi.
+        self.lang = "+".join(self.options.lang)
+
+        if self.enabled:
+            try:
+                import tesserocr
+            except ImportError:
+                raise ImportError(
+                    "tesserocr is not correctly installed. "
+                    "Please install it via `pip install tesserocr`."
+                )
+            _, tesserocr_languages = tesserocr.get_languages()
+            if not tesserocr_languages:
+                raise ImportError(
+                    "tesserocr is not correctly configured. No language models "
+                    "have been detected. Please ensure that the TESSDATA_PREFIX "
+                    "envvar points to tesseract languages dir."
+                )
+            self.reader_RIL = tesserocr.RIL
+
+    def __call__(
+        self, conv_res: ConversionResult, page_batch: Iterable[Page]
+    ) -> Iterable[Page]:
+
+        if not self.enabled:
+            yield from page_batch
+            return
+
+        reader = tesseract_pool.get(self.lang, self.options.path)
+
+        for page in page_batch:
+            assert page._backend is not None
+            if not page._backend.is_valid():
+                yield page
+                continue
+
+            with TimeRecorder(conv_res, "ocr"):
+                ocr_rects = self.get_ocr_rects(page)
+
+                all_ocr_cells = []
+                for ocr_rect in ocr_rects:
+                    # Skip zero area boxes
+                    if ocr_rect.area() == 0:
+                        continue
+                    high_res_image = page._backend.get_page_image(
+                        scale=self.scale, cropbox=ocr_rect
+                    )
+
+                    # Retrieve text snippets with their bounding boxes
+                    reader.SetImage(high_res_image)
+                    boxes = reader.GetComponentImages(self.reader_RIL.TEXTLINE, True)
+
+                    for ix, (_, box, _, _) in enumerate(boxes):
+                        # Set the area of interest. Tesseract uses Bottom-Left for the origin
+                        reader.SetRectangle(box["x"], box["y"], box["w"], box["h"])
+
+                        # Extract text within the bounding box
+                        text = reader.GetUTF8Text().strip()
+                        confidence = reader.MeanTextConf()
+                        left = box["x"] / self.scale
+                        bottom = box["y"] / self.scale
+                        right = (box["x"] + box["w"]) / self.scale
+                        top = (box["y"] + box["h"]) / self.scale
+
+                        all_ocr_cells.append(
+                            OcrCell(
+                                id=ix,
+                                text=text,
+                                confidence=confidence,
+                                bbox=BoundingBox.from_tuple(
+                                    coord=(left, top, right, bottom),
+                                    origin=CoordOrigin.TOPLEFT,
+                                ),
+                            )
+                        )
+
+                # Post-process the cells
+                page.cells = self.post_process_cells(all_ocr_cells, page.cells)
+
+            yield page
+
+
+class TimedOcrModel(BasePageModel):
+    """Page model reporting the time spent in the wrapped OCR model"""
+
+    def __init__(self, ocr_model: BasePageModel):
+        self.ocr_model = ocr_model
+
+    def __call__(
+        self, conv_res: ConversionResult, page_batch: Iterable[Page]
+    ) -> Iterable[Page]:
+        for page in page_batch:
+            with timed("ocr"):
+                pages = list(self.ocr_model(conv_res, [page]))
+            yield from pages
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from octosage.settings import settings
+from octosage.storage.cache import DiskCache
+from octosage.utils.metrics import registry
+from octosage.utils.model_store import layoutreader_revision
+
+SORT_ORDER_CACHE = registry.counter(
+    "octosage_sort_order_cache_total",
+    "Page order lookups by result (hit, near_hit, miss)",
+    ["result"],
+)
+
+# Recent pages per box count scanned for a tolerance match when the
+# quantized key misses
+NEAR_CANDIDATES = 16
+
+HIT = "hit"
+NEAR_HIT = "near_hit"
+MISS = "miss"
+
+
+class OrderCache:
+    """
+    Bounded LRU of LayoutReader orders keyed by a page's box set.
+
+    LayoutReader sees nothing but the scaled boxes, so pages of the same
+    template get the same order. Boxes are quantized before hashing; with a
+    tolerance, a cached order is reused when every coordinate of the page is
+    within it of the cached page's, which is checked against the entry under
+    the same key and then against the last few pages with as many boxes.
+    An optional disk tier keeps orders across restarts; keys include the
+    model revision and quantum, so it never serves orders of other weights.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        tolerance: int = 0,
+        disk: Optional[DiskCache] = None,
+        model_revision: str = "",
+    ):
+        """
+        Args:
+            max_entries: Pages kept in memory
+            tolerance: Coordinate difference still treated as the same page
+            disk: Optional persistent tier
+            model_revision: LayoutReader weights the orders come from
+        """
+        self.max_entries = max_entries
+        self.tolerance = tolerance
+        self.quantum = 2 * tolerance + 1
+        self.disk = disk
+        self._namespace = json.dumps(
+            {"model": model_revision, "quantum": self.quantum}, sort_keys=True
+        ).encode("utf-8")
+        self._entries: "OrderedDict[str, Tuple[List[List[int]], List[int]]]" = (
+            OrderedDict()
+        )
+        self._by_count: Dict[int, "OrderedDict[str, None]"] = {}
+        self._lock = threading.Lock()
+
+    def key(self, boxes: List[List[int]]) -> str:
+        quantized = array(
+            "i", (coord // self.quantum for box in boxes for coord in box)
+        )
+        digest = hashlib.sha256(self._namespace)
+        digest.update(quantized.tobytes())
+        return digest.hexdigest()
+
+    def _remember(self, key: str, boxes: List[List[int]], orders: List[int]):
+        with self._lock:
+            self._entries[key] = (boxes, orders)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if self.tolerance:
+                # Keys evicted from _entries are skipped when scanned
+                candidates = self._by_count.setdefault(len(boxes), OrderedDict())
+                candidates[key] = None
+                candidates.move_to_end(key)
+                while len(candidates) > NEAR_CANDIDATES:
+                    candidates.popitem(last=False)
+
+    def _matches(self, boxes: List[List[int]], cached: List[List[int]]) -> bool:
+        if len(boxes) != len(cached):
+            return False
+        return all(
+            abs(a - b) <= self.tolerance
+            for box, cached_box in zip(boxes, cached)
+            for a, b in zip(box, cached_box)
+        )
+
+    def get(self, boxes: List[List[int]]) -> Tuple[Optional[List[int]], str]:
+        """
+        Returns:
+            tuple: Cached order (None on a miss) and the lookup result
+        """
+        key = self.key(boxes)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None and self.disk is not None:
+            cached = self.disk.get(key)
+            if cached is not None:
+                stored = json.loads(cached[0])
+                entry = (stored["boxes"], stored["orders"])
+                self._remember(key, *entry)
+
+        if entry is not None and entry[0] == boxes:
+            result = (entry[1], HIT)
+        elif entry is not None and self._matches(boxes, entry[0]):
+            result = (entry[1], NEAR_HIT)
+        else:
+            near = self._near(boxes) if self.tolerance else None
+            result = (near, NEAR_HIT) if near is not None else (None, MISS)
+        SORT_ORDER_CACHE.inc(result=result[1])
+        return result
+
+    def _near(self, boxes: List[List[int]]) -> Optional[List[int]]:
+        with self._lock:
+            candidates = list(self._by_count.get(len(boxes), ()))
+            entries = [self._entries.get(key) for key in reversed(candidates)]
+        for entry in entries:
+            if entry is not None and self._matches(boxes, entry[0]):
+                return entry[1]
+        return None
+
+    def put(self, boxes: List[List[int]], orders: List[int]):
+        key = self.key(boxes)
+        self._remember(key, boxes, orders)
+        if self.disk is not None:
+            content = json.dumps({"boxes": boxes, "orders": orders})
+            self.disk.put(key, content.encode("utf-8"), etag=None, validated=True)
+
+
+_order_cache: Optional[OrderCache] = None
+_order_cache_lock = threading.Lock()
+
+
+def get_order_cache() -> Optional[OrderCache]:
+    """Process-wide order cache built from settings, or None when disabled"""
+    global _order_cache
+    if settings.SORT_ORDER_CACHE_SIZE <= 0:
+        return None
+    with _order_cache_lock:
+        if _order_cache is None:
+            disk = None
+            if settings.SORT_ORDER_CACHE_DIR:
+                disk = DiskCache(
+                    settings.SORT_ORDER_CACHE_DIR,
+                    max_bytes=settings.SORT_ORDER_CACHE_MAX_MB * 1024 * 1024,
+                    name="sort_order",
+                )
+            _order_cache = OrderCache(
+                settings.SORT_ORDER_CACHE_SIZE,
+                tolerance=settings.SORT_ORDER_CACHE_TOLERANCE,
+                disk=disk,
+                model_revision=layoutreader_revision(),
+            )
+        return _order_cache
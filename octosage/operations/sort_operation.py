@@ -1,11 +1,24 @@
 import copy
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import torch
 from octosage.utils.helpers import prepare_inputs, boxes2inputs, parse_logits
 from collections import defaultdict
 from transformers import LayoutLMv3ForTokenClassification
-from octosage.settings import settings
+from octosage.utils.device import empty_device_cache, get_device
 from contextlib import ContextDecorator
+from octosage.utils.metrics import BOXES, timed
+from octosage.utils.model_store import load_layoutreader
+from octosage.operations.order_cache import HIT, MISS, NEAR_HIT, get_order_cache
+from octosage.settings import settings
+from octosage.types.profiles import ExtractionProfile
+
+# Labels left out of every sort result
+DROPPED_LABELS = ("page_footer", "caption")
+
+SORT_MODES = ("flat", "hierarchical")
+
+# Default of SortOperation's order_cache: the process-wide cache
+_DEFAULT_CACHE = object()
 
 
 class ModelManager(ContextDecorator):
@@ -15,68 +28,183 @@ class ModelManager(ContextDecorator):
         self.model = None
 
     def __enter__(self):
-        self.model = LayoutLMv3ForTokenClassification.from_pretrained(
-            "hantian/layoutreader"
-        )
-        self.model.to(settings.DEVICE)
+        with timed("sort_model_load"):
+            self.model = load_layoutreader()
+            self.model.to(get_device())
         return self.model
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self.model is not None:
             self.model.cpu()  # Move model back to CPU
             del self.model  # Remove model reference
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()  # Clear CUDA cache
+            empty_device_cache()  # Clear CUDA cache
         return False  # Propagate exceptions if any
 
 
 class SortOperation:
-    def __init__(self):
-        """Initialize without loading model"""
+    def __init__(
+        self,
+        scheduler=None,
+        order_cache=_DEFAULT_CACHE,
+        profile: Optional[ExtractionProfile] = None,
+        mode: Optional[str] = None,
+    ):
+        """
+        Initialize without loading model
+
+        Args:
+            scheduler: Optional shared SortScheduler. When given, page sort jobs
+                are batched with those of concurrent requests instead of
+                loading a private model.
+            order_cache: OrderCache to look pages up in before running the
+                model; defaults to the process-wide one from settings, None
+                disables caching
+            profile: ExtractionProfile whose label filters apply to the
+                input, which may come from intermediates stored without them
+            mode: "flat" sorts every element's grid cells; "hierarchical"
+                sorts each group (e.g. a list) as one unit with a merged bbox
+                and a bounded number of boxes per unit, then expands groups
+                in their native order
+        """
         self.model_manager = ModelManager()
+        self.scheduler = scheduler
+        self.order_cache = (
+            get_order_cache() if order_cache is _DEFAULT_CACHE else order_cache
+        )
+        self.profile = profile
+        self.mode = mode or settings.SORT_MODE
+        if self.mode not in SORT_MODES:
+            raise ValueError(f"Unsupported sort mode: {self.mode}")
+        self.max_unit_boxes = settings.SORT_MAX_UNIT_BOXES
 
     def sort(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Main processing pipeline for document sorting"""
-        processed_data = self._preprocess_data(data)
+        with timed("sort_prepare"):
+            processed_data = self._preprocess_data(data)
 
-        with self.model_manager as model:
-            processed_data["elements"] = self._process_elements(processed_data, model)
+        cache_stats = {HIT: 0, NEAR_HIT: 0, MISS: 0}
+        page_boxes = []
+        processed_data["elements"] = self._process_elements(
+            processed_data, cache_stats, page_boxes
+        )
 
+        lookups = sum(cache_stats.values())
+        hits = cache_stats[HIT] + cache_stats[NEAR_HIT]
+        processed_data["metadata"]["sort_cache"] = {
+            "hits": cache_stats[HIT],
+            "near_hits": cache_stats[NEAR_HIT],
+            "misses": cache_stats[MISS],
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+        # Model input sizes, whether the model ran or the cache answered
+        processed_data["metadata"]["sort_boxes"] = {
+            "mode": self.mode,
+            "pages": len(page_boxes),
+            "boxes": sum(page_boxes),
+            "max_page_boxes": max(page_boxes, default=0),
+        }
         return processed_data
 
     def _preprocess_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Filter and prepare input data by removing unwanted elements"""
-        processed_data = copy.deepcopy(data)
-        processed_data["elements"] = [
+        # Filter first so dropped elements are never copied
+        elements = [
             el
-            for el in processed_data["elements"]
-            if el["label"] not in ["page_footer", "caption"]
+            for el in data["elements"]
+            if el["label"] not in DROPPED_LABELS
+            and (self.profile is None or self.profile.allows(el["label"]))
         ]
-        return processed_data
+        return copy.deepcopy({**data, "elements": elements})
 
     def _process_elements(
-        self, data: Dict[str, Any], model: LayoutLMv3ForTokenClassification
+        self,
+        data: Dict[str, Any],
+        cache_stats: Dict[str, int],
+        page_boxes: Optional[List[int]] = None,
     ) -> List[Dict]:
-        """Process elements with page-wise grouping and sorting"""
+        """
+        Process elements with page-wise grouping and sorting. Pages found in
+        the order cache skip the model, which is only loaded (or the
+        scheduler only used) for the rest. The box count of every page with
+        boxes is appended to page_boxes.
+        """
+        hierarchical = self.mode == "hierarchical"
         elements = []
-        for element in data["elements"]:
-            if "bbox" in element:
-                page_num = element["page"]
-                page_meta = data["metadata"]["pages"][page_num]
-                element = self._process_element(element, page_meta)
-            elements.append(element)
+        with timed("sort_prepare"):
+            for element in data["elements"]:
+                # Elements without provenance (Office documents) have no bbox
+                if element.get("bbox") is not None and not hierarchical:
+                    page_num = element["page"]
+                    page_meta = data["metadata"]["pages"][page_num]
+                    element = self._process_element(element, page_meta)
+                elements.append(element)
 
         # Group elements by page number
         page_groups = defaultdict(list)
         for element in elements:
             page_groups[element["page"]].append(element)
 
-        # Process pages in numerical order
-        sorted_elements = []
-        for page_num in sorted(page_groups.keys()):
-            page_elements = self._sort_elements(page_groups[page_num], model)
-            sorted_elements.extend(page_elements)
+        # [elements, box mapping, orders, units] per page, in numerical order
+        pages = []
+        # Elements without a page keep their native order after the pages
+        for page_num in sorted(page_groups.keys(), key=lambda p: (p is None, p or 0)):
+            page_elements = page_groups[page_num]
+            page_meta = data["metadata"]["pages"].get(page_num, {})
+            if (
+                page_meta.get("reused")
+                and page_meta.get("sort_mode") == self.mode
+                and all("orders" in el for el in page_elements)
+            ):
+                # Page spliced from an earlier revision along with its orders
+                pages.append([page_elements, None, None, None])
+                continue
+            units = None
+            if hierarchical:
+                with timed("sort_prepare"):
+                    units = self._build_units(page_elements, page_meta)
+            mapping = self._map_boxes(units or page_elements)
+            if mapping[0] and page_boxes is not None:
+                page_boxes.append(len(mapping[0]))
+            orders = None
+            if mapping[0] and self.order_cache is not None:
+                with timed("sort_cache"):
+                    orders, result = self.order_cache.get(mapping[0])
+                cache_stats[result] += 1
+            pages.append([page_elements, mapping, orders, units])
+
+        misses = [page for page in pages if page[1] and page[1][0] and page[2] is None]
+        for page in misses:
+            BOXES.inc(len(page[1][0]))
+
+        if misses and self.scheduler is not None:
+            # Submit every page up front so they can share forward passes
+            futures = [self.scheduler.submit(page[1][0]) for page in misses]
+            for page, future in zip(misses, futures):
+                with timed("sort_wait"):
+                    page[2] = future.result()
+        elif misses:
+            with self.model_manager as model:
+                for page in misses:
+                    page[2] = self._infer(page[1][0], model)
+
+        if self.order_cache is not None:
+            for page in misses:
+                self.order_cache.put(page[1][0], page[2])
 
+        sorted_elements = []
+        for page_elements, mapping, orders, units in pages:
+            if mapping is None:
+                for element in page_elements:
+                    element.pop("boxes", None)
+                sorted_elements.extend(sorted(page_elements, key=lambda x: x["orders"]))
+            elif units is not None:
+                sorted_elements.extend(
+                    self._expand_units(page_elements, units, mapping, orders)
+                )
+            else:
+                sorted_elements.extend(
+                    self._apply_orders(page_elements, mapping, orders)
+                )
         return sorted_elements
 
     def _process_element(self, element: Dict, page_meta: Dict) -> Dict:
@@ -88,6 +216,61 @@ class SortOperation:
         )
         return element
 
+    def _build_units(self, elements: List[Dict], page_meta: Dict) -> List[Dict]:
+        """
+        Sort units of a page: one per group, holding the indices of its
+        members in native order and boxes split from their merged bbox, and
+        one per element outside a group. Elements without a bbox get a unit
+        without boxes.
+        """
+        units = []
+        group_units = {}
+        for idx, element in enumerate(elements):
+            group_id = element.get("group_id")
+            if element.get("bbox") is None:
+                units.append({"members": [idx], "bboxes": []})
+            elif group_id is not None and group_id in group_units:
+                group_units[group_id]["members"].append(idx)
+                group_units[group_id]["bboxes"].append(element["bbox"])
+            else:
+                unit = {"members": [idx], "bboxes": [element["bbox"]]}
+                units.append(unit)
+                if group_id is not None:
+                    group_units[group_id] = unit
+
+        for unit in units:
+            bboxes = unit.pop("bboxes")
+            unit["boxes"] = (
+                self._split_bbox(
+                    _merge_bboxes(bboxes),
+                    page_meta["width"],
+                    page_meta["height"],
+                    max_boxes=self.max_unit_boxes,
+                )
+                if bboxes
+                else []
+            )
+        return units
+
+    def _expand_units(
+        self,
+        elements: List[Dict],
+        units: List[Dict],
+        mapping: Tuple[List[List[int]], List[int], List[int]],
+        orders: Optional[List[int]],
+    ) -> List[Dict]:
+        """
+        Order units by the model's orders and lay their members out in
+        native order; each element's order is its rank on the page
+        """
+        sorted_elements = []
+        for unit in self._apply_orders(units, mapping, orders):
+            for idx in unit["members"]:
+                element = elements[idx]
+                element["orders"] = float(len(sorted_elements))
+                sorted_elements.append(element)
+        return sorted_elements
+
     def _split_bbox(
         self,
         bbox: List[float],
@@ -95,8 +278,12 @@ class SortOperation:
         page_h: int,
         target_width: int = 1000,
         target_height: int = 1000,
+        max_boxes: Optional[int] = None,
     ) -> List[List[float]]:
-        """Split bounding box into grid cells based on content analysis"""
+        """
+        Split bounding box into grid cells based on content analysis, into
+        at most max_boxes cells when given
+        """
         left, top, right, bottom = bbox
         block_width = right - left
         block_height = bottom - top
@@ -121,6 +308,10 @@ class SortOperation:
 
         # Determine column count
         cols = self._calculate_columns(block_width, page_w, block_height, page_h)
+        if max_boxes:
+            cols = min(cols, max_boxes)
+            rows = min(rows, max(1, max_boxes // cols))
+            row_height = block_height / rows
 
         # Generate grid cells
         boxes = []
@@ -171,34 +362,53 @@ class SortOperation:
 
         return scaled_boxes
 
-    def _sort_elements(
-        self, elements: List[Dict], model: LayoutLMv3ForTokenClassification
-    ) -> List[Dict]:
-        """Sort elements within a single page using model predictions"""
+    def _infer(
+        self, flat_boxes: List[List[int]], model: LayoutLMv3ForTokenClassification
+    ) -> List[int]:
+        """Reading order of a single page's boxes using model predictions"""
+        # Get model predictions
+        with timed("sort_inference"), torch.no_grad():
+            inputs = boxes2inputs(flat_boxes)
+            inputs = prepare_inputs(inputs, model)
+            outputs = model(**inputs)
+            logits = outputs.logits.cpu().squeeze(0)
+
+        # Parse model output to get reading order
+        with timed("sort_decode"):
+            return parse_logits(logits, len(flat_boxes))
+
+    def _map_boxes(
+        self, elements: List[Dict]
+    ) -> Tuple[List[List[int]], List[int], List[int]]:
+        """Create mapping between elements and their boxes"""
         flat_boxes = []
         element_indices = []
         box_counts = []
 
-        # Create mapping between elements and their boxes
         for idx, element in enumerate(elements):
             boxes = element.get("boxes", [])
             box_counts.append(len(boxes))
             flat_boxes.extend(boxes)
             element_indices.extend([idx] * len(boxes))
-            element["order_sum"] = 0
 
-        if not flat_boxes:
-            return elements
+        return flat_boxes, element_indices, box_counts
 
-        # Get model predictions
-        with torch.no_grad():
-            inputs = boxes2inputs(flat_boxes)
-            inputs = prepare_inputs(inputs, model)
-            outputs = model(**inputs)
-            logits = outputs.logits.cpu().squeeze(0)
+    def _apply_orders(
+        self,
+        elements: List[Dict],
+        mapping: Tuple[List[List[int]], List[int], List[int]],
+        orders: Optional[List[int]],
+    ) -> List[Dict]:
+        """Order elements by the average predicted position of their boxes"""
+        _, element_indices, box_counts = mapping
+        if orders is None:
+            # Nothing to sort by (no element has a bbox): keep native order
+            for idx, element in enumerate(elements):
+                element["orders"] = float(idx)
+            return elements
 
-        # Parse model output to get reading order
-        orders = parse_logits(logits, len(flat_boxes))
+        for element in elements:
+            element["order_sum"] = 0
 
         # Accumulate position scores for each element
         for pos, box_idx in enumerate(orders):
@@ -216,3 +426,17 @@ class SortOperation:
 
         # Return elements sorted by their average position
         return sorted(elements, key=lambda x: x["orders"])
+
+
+def _merge_bboxes(bboxes: List[List[float]]) -> List[float]:
+    """Union of (left, top, right, bottom) boxes in either vertical origin"""
+    left = min(bbox[0] for bbox in bboxes)
+    right = max(bbox[2] for bbox in bboxes)
+    if bboxes[0][1] <= bboxes[0][3]:
+        # Top-left origin: top is the smaller y
+        top = min(bbox[1] for bbox in bboxes)
+        bottom = max(bbox[3] for bbox in bboxes)
+    else:
+        top = max(bbox[1] for bbox in bboxes)
+        bottom = min(bbox[3] for bbox in bboxes)
+    return [left, top, right, bottom]
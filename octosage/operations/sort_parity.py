@@ -0,0 +1,121 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from octosage.operations.sort_operation import SORT_MODES, SortOperation
+from octosage.utils.metrics import collect_timings
+
+# Stages that make up the model's share of a sort
+INFERENCE_STAGES = ("sort_model_load", "sort_inference", "sort_decode", "sort_wait")
+
+
+def kendall_tau(first: List[int], second: List[int]) -> float:
+    """
+    Rank correlation of two orderings of the same items: 1.0 for the same
+    order, -1.0 for the reverse
+    """
+    position = {item: index for index, item in enumerate(second)}
+    ranks = [position[item] for item in first if item in position]
+    n = len(ranks)
+    if n < 2:
+        return 1.0
+    concordant = discordant = 0
+    for i in range(n):
+        for j in range(i + 1, n):
+            if ranks[i] < ranks[j]:
+                concordant += 1
+            else:
+                discordant += 1
+    return (concordant - discordant) / (n * (n - 1) / 2)
+
+
+def _page_orders(sorted_result: dict) -> Dict[Optional[int], List[int]]:
+    pages = defaultdict(list)
+    for element in sorted_result["elements"]:
+        pages[element["page"]].append(element["parity_index"])
+    return pages
+
+
+def sort_parity(documents: Iterable[dict], scheduler=None) -> dict:
+    """
+    Sort ProcessManager results in both modes, bypassing the order cache,
+    and compare model input sizes, inference time and the resulting
+    reading orders.
+
+    Args:
+        documents: Pre-sort results, e.g. stored intermediates' elements
+        scheduler: Optional running SortScheduler to sort through
+
+    Returns:
+        dict: Totals per mode, the box reduction of hierarchical mode, and
+            page-level agreement: mean Kendall tau and the share of pages
+            whose element order is identical
+    """
+    totals = {
+        mode: {"pages": 0, "boxes": 0, "max_page_boxes": 0, "inference_seconds": 0.0}
+        for mode in SORT_MODES
+    }
+    taus = []
+    details = []
+    for data in documents:
+        # Elements are matched across modes by their input position
+        tagged = {
+            **data,
+            "elements": [
+                {**element, "parity_index": index}
+                for index, element in enumerate(data["elements"])
+            ],
+        }
+        orders = {}
+        for mode in SORT_MODES:
+            # Cached orders would hide inference cost and skew the comparison
+            operation = SortOperation(scheduler=scheduler, order_cache=None, mode=mode)
+            with collect_timings() as timings:
+                result = operation.sort(tagged)
+            boxes = result["metadata"]["sort_boxes"]
+            total = totals[mode]
+            total["pages"] += boxes["pages"]
+            total["boxes"] += boxes["boxes"]
+            total["max_page_boxes"] = max(
+                total["max_page_boxes"], boxes["max_page_boxes"]
+            )
+            total["inference_seconds"] += sum(
+                timings.get(stage, 0.0) for stage in INFERENCE_STAGES
+            )
+            orders[mode] = _page_orders(result)
+
+        page_taus = {
+            page: kendall_tau(flat_order, orders["hierarchical"][page])
+            for page, flat_order in orders["flat"].items()
+        }
+        taus.extend(page_taus.values())
+        details.append(
+            {
+                "filename": data["metadata"].get("filename"),
+                "hash": data["metadata"].get("hash"),
+                "pages": {
+                    str(page): round(tau, 4)
+                    for page, tau in sorted(
+                        page_taus.items(),
+                        key=lambda item: (item[0] is None, item[0] or 0),
+                    )
+                },
+            }
+        )
+
+    for total in totals.values():
+        total["inference_seconds"] = round(total["inference_seconds"], 4)
+    flat_boxes = totals["flat"]["boxes"]
+    return {
+        "documents": len(details),
+        "modes": totals,
+        "box_reduction": (
+            round(1 - totals["hierarchical"]["boxes"] / flat_boxes, 4)
+            if flat_boxes
+            else 0.0
+        ),
+        "mean_kendall_tau": round(sum(taus) / len(taus), 4) if taus else 1.0,
+        "identical_pages": (
+            round(sum(1 for tau in taus if tau == 1.0) / len(taus), 4) if taus else 1.0
+        ),
+        "details": details,
+    }
@@ -0,0 +1,172 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import torch
+from octosage.operations.sort_operation import ModelManager
+from octosage.utils.helpers import (
+    MAX_LEN,
+    boxes2batch_inputs,
+    prepare_inputs,
+    parse_logits,
+)
+from octosage.settings import settings
+from octosage.utils.metrics import registry, timed
+
+SORT_QUEUE_DEPTH = registry.gauge(
+    "octosage_sort_queue_depth", "Page sort jobs waiting for the scheduler"
+)
+SORT_BATCH_SIZE = registry.histogram(
+    "octosage_sort_batch_size",
+    "Pages per LayoutReader forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+
+class SortScheduler:
+    """
+    Shared inference scheduler in front of the LayoutReader model.
+
+    Page sort jobs submitted by concurrent requests are collected for up to
+    ``max_wait_ms``, padded into a single batch and run in one forward pass.
+    The per-page orders are routed back to the callers through futures.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+    ):
+        """
+        Initialize the scheduler without loading the model.
+
+        Args:
+            max_batch_size: Maximum number of pages per forward pass
+            max_wait_ms: How long to wait for more jobs once one is pending
+        """
+        self.max_batch_size = max_batch_size or settings.SORT_BATCH_MAX_SIZE
+        self.max_wait = (
+            max_wait_ms if max_wait_ms is not None else settings.SORT_BATCH_MAX_WAIT_MS
+        ) / 1000
+        self.model_manager = ModelManager()
+        self.model = None
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def start(self):
+        """Load the model and start the worker thread"""
+        if self._thread is not None:
+            return
+        self.model = self.model_manager.__enter__()
+        self.model.eval()
+        self._thread = threading.Thread(
+            target=self._run, name="sort-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Drain pending jobs, stop the worker thread and release the model"""
+        if self._thread is None:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join()
+        self._thread = None
+        self.model = None
+        self.model_manager.__exit__(None, None, None)
+
+    def submit(self, boxes: List[List[int]]) -> Future:
+        """
+        Queue the boxes of one page for sorting.
+
+        Args:
+            boxes: Normalized boxes of a page, as produced by SortOperation
+
+        Returns:
+            Future: Resolves to the reading order of the boxes; fails at once
+                for pages with more boxes than the model takes
+        """
+        if self._thread is None:
+            raise RuntimeError("SortScheduler is not running")
+        future = Future()
+        if len(boxes) > MAX_LEN:
+            # Kept out of the queue, where it would fail a shared batch
+            future.set_exception(
+                ValueError(f"Page has {len(boxes)} boxes, at most {MAX_LEN} fit")
+            )
+            return future
+        self._queue.put((boxes, future))
+        SORT_QUEUE_DEPTH.set(self._queue.qsize())
+        return future
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def _collect(self, first) -> Tuple[List[tuple], bool]:
+        """Gather jobs for one batch, waiting at most max_wait after the first"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if timeout > 0:
+                    job = self._queue.get(timeout=timeout)
+                else:
+                    job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is self._STOP:
+                return batch, True
+            batch.append(job)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is self._STOP:
+                break
+            batch, stopping = self._collect(first)
+            SORT_QUEUE_DEPTH.set(self._queue.qsize())
+            jobs = [job for job in batch if job[1].set_running_or_notify_cancel()]
+            if not jobs:
+                continue
+            try:
+                results = self._infer([boxes for boxes, _ in jobs])
+            except Exception as e:
+                if len(jobs) == 1:
+                    jobs[0][1].set_exception(e)
+                else:
+                    self._run_singly(jobs)
+                continue
+            for (_, future), orders in zip(jobs, results):
+                future.set_result(orders)
+
+    def _run_singly(self, jobs: List[tuple]):
+        """
+        Retry the jobs of a failed batch one at a time, so only the pages
+        that fail on their own fail their requests
+        """
+        for boxes, future in jobs:
+            try:
+                future.set_result(self._infer([boxes])[0])
+            except Exception as e:
+                future.set_exception(e)
+
+    def _infer(self, batch: List[List[List[int]]]) -> List[List[int]]:
+        """Run a single forward pass over a padded batch of pages"""
+        SORT_BATCH_SIZE.observe(len(batch))
+        with timed("sort_inference"), torch.no_grad():
+            inputs = boxes2batch_inputs(batch)
+            inputs = prepare_inputs(inputs, self.model)
+            outputs = self.model(**inputs)
+            logits = outputs.logits.cpu()
+
+        with timed("sort_decode"):
+            return [
+                parse_logits(logits[i], len(boxes)) for i, boxes in enumerate(batch)
+            ]
@@ -1,3 +1,6 @@
+from octosage.utils.metrics import timed
+
+
 class TransformOperation:
     def __init__(self, data):
         self.data = data
@@ -18,9 +21,10 @@ class TransformOperation:
         page_elements = []
         i = current_index
         while i < len(self.elements) and len(page_elements) < 5:
-            if self.elements[i]["page"] == page_num:
+            page = self.elements[i]["page"]
+            if page == page_num:
                 page_elements.append(self.elements[i])
-            elif self.elements[i]["page"] > page_num:
+            elif page is None or page_num is None or page > page_num:
                 break
             i += 1
 
@@ -144,6 +148,10 @@ class TransformOperation:
 
     def transform(self):
         """Transform the document data according to requirements"""
+        with timed("transform"):
+            return self._transform()
+
+    def _transform(self):
         current_page = None
         i = 0
 
@@ -1,12 +1,78 @@
 from abc import ABC, abstractmethod
+from io import BytesIO
+from typing import Dict, Optional, Tuple
 from docling_core.types.doc import DocItem, DoclingDocument
+from PIL.Image import Image
 from octosage.types.models import BaseElement
 from octosage.storage.base import BaseStorage
+from octosage.utils.metrics import UPLOAD_BYTES, timed
+
+
+def save_png(storage: BaseStorage, image: Image, filename: str) -> str:
+    """Encode an image as PNG and save it to storage"""
+    with timed("png_encode"):
+        img_byte_arr = BytesIO()
+        image.save(img_byte_arr, format="PNG")
+        content = img_byte_arr.getvalue()
+
+    with timed("upload"):
+        path = storage.save_file(content, filename)
+    UPLOAD_BYTES.inc(len(content))
+    return path
+
+
+# Overlap (intersection over union) an uploaded crop needs with an element
+# bbox to stand in for it when their keys differ
+MIN_IMAGE_OVERLAP = 0.5
+
+
+def image_key(page_no: int, bbox: Tuple[float, float, float, float]) -> tuple:
+    """Key matching an element to an image uploaded during conversion"""
+    return (page_no, *(round(value, 2) for value in bbox))
+
+
+def _overlap(first: tuple, second: tuple) -> float:
+    width = min(first[2], second[2]) - max(first[0], second[0])
+    height = min(first[3], second[3]) - max(first[1], second[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    intersection = width * height
+    union = (
+        (first[2] - first[0]) * (first[3] - first[1])
+        + (second[2] - second[0]) * (second[3] - second[1])
+        - intersection
+    )
+    return intersection / union if union > 0 else 0.0
+
+
+def find_uploaded_image(
+    images: Dict[tuple, str], page_no: int, bbox: Tuple[float, float, float, float]
+) -> Optional[str]:
+    """
+    Path of the image uploaded for an element (bbox in top-left origin).
+    Crops are keyed by the layout cluster's bbox, which can differ from the
+    item's provenance bbox by float error, so when the exact key misses the
+    crop on the page overlapping the bbox most is taken.
+    """
+    path = images.get(image_key(page_no, bbox))
+    if path is not None:
+        return path
+    best, best_overlap = None, MIN_IMAGE_OVERLAP
+    for key, candidate in images.items():
+        if key[0] != page_no:
+            continue
+        overlap = _overlap(key[1:], bbox)
+        if overlap >= best_overlap:
+            best, best_overlap = candidate, overlap
+    return best
 
 
 class BaseProcessor(ABC):
     def __init__(self, storage: BaseStorage):
         self.storage = storage
+        # Paths of element images already uploaded while converting, keyed
+        # by image_key; None when images are cropped from the document
+        self.uploaded_images: Optional[Dict[tuple, str]] = None
 
     @abstractmethod
     def process(self, element: DocItem, document: DoclingDocument) -> BaseElement:
@@ -30,3 +96,32 @@ class BaseProcessor(ABC):
     def get_filename(self, element: DocItem, document: DoclingDocument) -> BaseElement:
         filename = "_".join(element.self_ref.split("/")[1:]) + ".png"
         return f"{document.origin.binary_hash}_{filename}"
+
+    def save_image(
+        self, image: Optional[Image], element: DocItem, document: DoclingDocument
+    ) -> Optional[str]:
+        """Encode an element image as PNG and save it to storage"""
+        if not image:
+            return None
+
+        return save_png(self.storage, image, self.get_filename(element, document))
+
+    def store_element_image(
+        self, element: DocItem, document: DoclingDocument
+    ) -> Optional[str]:
+        """Return the storage path of the element's image, saving it if needed"""
+        if self.uploaded_images is not None:
+            if not element.prov:
+                return None
+            prov = element.prov[0]
+            page = document.pages[prov.page_no]
+            bbox = prov.bbox.to_top_left_origin(page_height=page.size.height)
+            return find_uploaded_image(
+                self.uploaded_images, prov.page_no, bbox.as_tuple()
+            )
+
+        # Get image data from the element
+        with timed("image_crop"):
+            image = element.get_image(document)
+
+        return self.save_image(image, element, document)
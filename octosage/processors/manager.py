@@ -1,4 +1,7 @@
-from typing import Dict, Optional, List, Union
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, List, Tuple
 from docling_core.types.doc import (
     DoclingDocument,
     GroupItem,
@@ -10,58 +13,98 @@ from docling_core.types.doc import (
 from octosage.processors.picture_processor import PictureProcessor
 from octosage.processors.table_processor import TableProcessor
 from octosage.processors.text_processor import TextProcessor
-from octosage.storage.local import LocalStorage
-from octosage.storage.s3 import S3Storage
-from octosage.types.models import BaseElement
 from octosage.settings import settings
+from octosage.storage.factory import get_storage
+from octosage.types.models import BaseElement
+from octosage.types.profiles import ExtractionProfile, get_profile
+from octosage.utils.metrics import ELEMENTS, timed
 
+# Element pools shared by every ProcessManager, keyed by size
+_element_pools: Dict[int, ThreadPoolExecutor] = {}
+_element_pools_lock = threading.Lock()
 
-class ProcessManager:
-    def __init__(self):
-        if settings.DRIVE is "local":
-            self.storage = LocalStorage(settings.OUTPUT_DIR)
-        else:
-            self.storage = S3Storage(
-                bucket_name=settings.S3_BUCKET,
-                access_key=settings.S3_KEY,
-                secret_key=settings.S3_SECRET,
-                endpoint_url=settings.S3_ENDPOINT,
-            )
 
-        self.processors = {
-            PictureItem: PictureProcessor(self.storage),
-            TableItem: TableProcessor(self.storage),
-            TextItem: TextProcessor(self.storage),
-        }
+def get_element_pool(workers: int) -> ThreadPoolExecutor:
+    with _element_pools_lock:
+        if workers not in _element_pools:
+            _element_pools[workers] = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="process-element"
+            )
+        return _element_pools[workers]
 
-    def process_element(
-        self, element: DocItem, document: DoclingDocument
-    ) -> Optional[Union[BaseElement, List[BaseElement]]]:
-        """Process a single document element"""
-        if isinstance(element, GroupItem):
-            processed_elements = []
-            # Extract the numeric ID from self_ref (e.g., '0' from '#/groups/0')
-            group_id = element.self_ref.split("/")[-1]
-            # Combine label and ID to form group_label_id (e.g., 'list_0')
-            group_label_id = f"{element.label.value}/{group_id}"
 
-            for child_ref in element.children:
-                child_element = child_ref.resolve(document)
-                processed_child = self.process_element(child_element, document)
-                if processed_child:
-                    # Add group_label_id to the processed child
-                    setattr(processed_child, "group_id", group_label_id)
-                    processed_elements.append(processed_child)
+class ProcessManager:
+    def __init__(
+        self,
+        table_format: Optional[str] = None,
+        workers: Optional[int] = None,
+        profile: Optional[ExtractionProfile] = None,
+    ):
+        """
+        Args:
+            table_format: Serialization of table data
+            workers: Threads processing elements in parallel; 1 processes
+                them in the calling thread
+            profile: What to extract; element types it leaves out get no
+                processor, so they are dropped without being processed
+        """
+        self.storage = get_storage()
+        self.table_format = table_format or settings.TABLE_FORMAT
+        self.workers = workers or settings.PROCESS_WORKERS
+        self.profile = profile or get_profile()
 
-            return processed_elements
+        self.processors = {TextItem: TextProcessor(self.storage)}
+        if self.profile.keeps_pictures:
+            self.processors[PictureItem] = PictureProcessor(self.storage)
+        if self.profile.keeps_tables:
+            self.processors[TableItem] = TableProcessor(
+                self.storage, self.table_format, images=self.profile.keeps_table_images
+            )
 
+    def process_element(
+        self,
+        element: DocItem,
+        document: DoclingDocument,
+        group_id: Optional[str] = None,
+    ) -> Optional[BaseElement]:
+        """Process a single document element"""
         for element_type, processor in self.processors.items():
             if isinstance(element, element_type):
-                return processor.process(element, document)
+                processed = processor.process(element, document)
+                if processed is not None:
+                    processed.group_id = group_id
+                return processed
 
         return None
 
-    def get_page_metadata(self, document: DoclingDocument) -> Dict[int, dict]:
+    def flatten(self, document: DoclingDocument) -> List[Tuple[DocItem, Optional[str]]]:
+        """
+        Walk the body tree depth-first without recursion and list its
+        elements in document order, each with the id of the group holding it
+        (e.g. 'list/0' for '#/groups/0'). Elements of nested groups get the
+        innermost group's id.
+        """
+        work = []
+        stack = [(child_ref, None) for child_ref in reversed(document.body.children)]
+        while stack:
+            child_ref, group_id = stack.pop()
+            element = child_ref.resolve(document)
+            if isinstance(element, GroupItem):
+                # Combine label and numeric ID to form group_label_id
+                group_label_id = (
+                    f"{element.label.value}/{element.self_ref.split('/')[-1]}"
+                )
+                stack.extend(
+                    (grandchild_ref, group_label_id)
+                    for grandchild_ref in reversed(element.children)
+                )
+            else:
+                work.append((element, group_id))
+        return work
+
+    def get_page_metadata(
+        self, document: DoclingDocument, ocr_pages: Optional[Dict[int, bool]] = None
+    ) -> Dict[int, dict]:
         """Extract page metadata from document"""
         metadata = {}
         for page_number, page in document.pages.items():
@@ -69,27 +112,54 @@ class ProcessManager:
                 "width": page.size.width,
                 "height": page.size.height,
             }
+            if ocr_pages is not None:
+                metadata[page_number]["ocr"] = ocr_pages.get(page_number, False)
         return metadata
 
-    def process_document(self, document: DoclingDocument) -> dict:
+    def process_document(
+        self,
+        document: DoclingDocument,
+        ocr_pages: Optional[Dict[int, bool]] = None,
+        uploaded_images: Optional[Dict[tuple, str]] = None,
+    ) -> dict:
         """Process entire document and convert to dictionary format with metadata"""
-        elements = []
+        for processor in self.processors.values():
+            processor.uploaded_images = uploaded_images
 
-        for child_ref in document.body.children:
-            element = child_ref.resolve(document)
-            processed_element = self.process_element(element, document)
-            if processed_element:
-                if isinstance(processed_element, list):
-                    # Handle group elements which return a list
-                    elements.extend(element.to_dict() for element in processed_element)
-                else:
-                    # Handle single elements
-                    elements.append(processed_element.to_dict())
+        with timed("process_document"):
+            work = [
+                (element, group_id)
+                for element, group_id in self.flatten(document)
+                if self.profile.allows(element.label.value)
+            ]
+            if self.workers > 1 and len(work) > 1:
+                # Contexts carry the request's timing breakdown into the pool
+                futures = [
+                    get_element_pool(self.workers).submit(
+                        contextvars.copy_context().run,
+                        self.process_element,
+                        element,
+                        document,
+                        group_id,
+                    )
+                    for element, group_id in work
+                ]
+                processed = [future.result() for future in futures]
+            else:
+                processed = [
+                    self.process_element(element, document, group_id)
+                    for element, group_id in work
+                ]
+
+            elements = [element.to_dict() for element in processed if element]
+
+        for element in elements:
+            ELEMENTS.inc(type=element["type"])
 
         # Create final output with metadata
         return {
             "metadata": {
-                "pages": self.get_page_metadata(document),
+                "pages": self.get_page_metadata(document, ocr_pages),
                 "filename": document.origin.filename,
                 "hash": document.origin.binary_hash,
             },
@@ -1,4 +1,3 @@
-from io import BytesIO
 from octosage.processors.base import BaseProcessor
 from octosage.types.models import PictureElement
 from docling_core.types.doc import PictureItem, DoclingDocument
@@ -24,17 +23,7 @@ class PictureProcessor(BaseProcessor):
             PictureElement: Processed picture element with metadata, captions, and image path
         """
         metadata = self.get_base_metadata(element)
-        # Get image data from the element
-        image = element.get_image(document)
-
-        path = None
-        if image:
-            # Convert image to bytes and save as PNG
-            img_byte_arr = BytesIO()
-            image.save(img_byte_arr, format="PNG")
-            path = self.storage.save_file(
-                img_byte_arr.getvalue(), self.get_filename(element, document)
-            )
+        path = self.store_element_image(element, document)
 
         return PictureElement(
             **metadata, captions=element.caption_text(document), path=path
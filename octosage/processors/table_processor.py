@@ -1,7 +1,9 @@
-from io import BytesIO
 from octosage.processors.base import BaseProcessor
+from octosage.processors.table_serializer import serialize_table
+from octosage.storage.base import BaseStorage
 from octosage.types.models import TableElement
 from docling_core.types.doc import TableItem, DoclingDocument
+from octosage.utils.metrics import timed
 
 
 class TableProcessor(BaseProcessor):
@@ -10,6 +12,14 @@ class TableProcessor(BaseProcessor):
     Extracts table data, converts to CSV format, and saves table image if available.
     """
 
+    def __init__(
+        self, storage: BaseStorage, table_format: str = "markdown", images: bool = True
+    ):
+        super().__init__(storage)
+        self.table_format = table_format
+        # False leaves table images out: nothing is cropped or uploaded
+        self.images = images
+
     def process(self, element: TableItem, document: DoclingDocument) -> TableElement:
         """
         Process a table element from the document.
@@ -22,23 +32,11 @@ class TableProcessor(BaseProcessor):
             TableElement: Processed table element with metadata, CSV data, and image path
         """
         metadata = self.get_base_metadata(element)
-        # Convert table to pandas DataFrame
-        table_df = element.export_to_dataframe()
+        with timed("table_export"):
+            data = serialize_table(element, document, self.table_format)
         # Get table image if available
-        image = element.get_image(document)
-
-        path = None
-        if image:
-            # Convert image to bytes and save as PNG
-            img_byte_arr = BytesIO()
-            image.save(img_byte_arr, format="PNG")
-            path = self.storage.save_file(
-                img_byte_arr.getvalue(), self.get_filename(element, document)
-            )
+        path = self.store_element_image(element, document) if self.images else None
 
         return TableElement(
-            **metadata,
-            captions=element.caption_text(document),
-            data=table_df.to_markdown(),
-            path=path
+            **metadata, captions=element.caption_text(document), data=data, path=path
         )
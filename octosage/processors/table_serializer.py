@@ -0,0 +1,291 @@
+import csv
+import io
+import json
+import math
+import re
+import unicodedata
+from typing import List, Optional, Tuple
+
+from docling_core.types.doc import DoclingDocument, TableItem
+
+TABLE_FORMATS = ("markdown", "csv", "json")
+
+# tabulate's pattern for numbers written with thousands separators
+_THOUSANDS = re.compile(
+    r"^(([+-]?[0-9]{1,3})(?:,([0-9]{3}))*)?(?(1)\.[0-9]*|\.[0-9]+)?$"
+)
+
+# Column types ordered from least to most generic, as tabulate ranks them
+_NONE, _BOOL, _INT, _FLOAT, _STR = range(5)
+
+# Characters whose display width is not one column (combining marks,
+# format and control characters, and wide scripts from U+1100 on)
+_NARROW_EXCLUDED = {"Mn", "Me", "Cf", "Cc", "Cs", "Co", "Cn", "Zl", "Zp"}
+
+
+def table_frame(element: TableItem) -> Tuple[Optional[List[str]], List[List[str]]]:
+    """
+    Column names and body rows of a table, split the way
+    TableItem.export_to_dataframe does: leading rows holding column headers
+    become the names, joined with "." when there are several.
+
+    Returns:
+        tuple: Column names (None without header rows) and rows of cell text
+    """
+    num_rows = element.data.num_rows
+    num_cols = element.data.num_cols
+
+    # Same placement as TableData.grid (spanning cells fill every slot, later
+    # cells win), without building a TableCell for every empty slot
+    grid = [[None] * num_cols for _ in range(num_rows)]
+    for cell in element.data.table_cells:
+        for i in range(
+            min(cell.start_row_offset_idx, num_rows),
+            min(cell.end_row_offset_idx, num_rows),
+        ):
+            row = grid[i]
+            for j in range(
+                min(cell.start_col_offset_idx, num_cols),
+                min(cell.end_col_offset_idx, num_cols),
+            ):
+                row[j] = cell
+
+    num_headers = 0
+    for row_idx, row in enumerate(grid):
+        if not any(
+            cell is not None
+            and cell.column_header
+            and cell.start_row_offset_idx == row_idx
+            for cell in row
+        ):
+            break
+        num_headers += 1
+
+    grid = [[cell.text if cell is not None else "" for cell in row] for row in grid]
+
+    columns = None
+    if num_headers > 0:
+        columns = ["" for _ in range(num_cols)]
+        for row in grid[:num_headers]:
+            for j, text in enumerate(row):
+                columns[j] += f".{text}" if columns[j] != "" else text
+
+    return columns, grid[num_headers:]
+
+
+def _is_number(value: str) -> bool:
+    try:
+        number = float(value)
+    except (ValueError, TypeError):
+        return False
+    return not (math.isinf(number) or math.isnan(number)) or value.lower() in (
+        "inf",
+        "-inf",
+        "nan",
+    )
+
+
+def _is_int(value: str) -> bool:
+    try:
+        int(value)
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+def _cell_type(value: str) -> int:
+    if not value:
+        return _NONE
+    if value in ("True", "False"):
+        return _BOOL
+    if _is_int(value) or (_THOUSANDS.match(value) and "." not in value):
+        return _INT
+    if _is_number(value) or _THOUSANDS.match(value):
+        return _FLOAT
+    return _STR
+
+
+def _format_float(value: str) -> str:
+    if not value:
+        return value
+    try:
+        return format(float(value.replace(",", "")), "g")
+    except (ValueError, TypeError):
+        return value
+
+
+def _after_point(value: str) -> int:
+    if not (_is_number(value) or _THOUSANDS.match(value)) or _is_int(value):
+        return -1
+    pos = value.rfind(".")
+    if pos < 0:
+        pos = value.lower().rfind("e")
+    return len(value) - pos - 1 if pos >= 0 else -1
+
+
+def _align_column(values: List[str], numeric: bool, min_width: int) -> List[str]:
+    if numeric:
+        # Line numbers up on the decimal point, then flush right
+        decimals = [_after_point(value) for value in values]
+        max_decimals = max(decimals)
+        values = [
+            value + " " * (max_decimals - dec) for value, dec in zip(values, decimals)
+        ]
+        width = max(max(map(len, values)), min_width)
+        return [value.rjust(width) for value in values]
+
+    values = [value.strip() for value in values]
+    width = max(max(map(len, values)), min_width)
+    return [value.ljust(width) for value in values]
+
+
+def _plain_text(columns: Optional[List[str]], rows: List[List[str]]) -> bool:
+    """
+    Whether every character is one column wide and printable. Other tables
+    hit tabulate's multiline, ANSI or wide-character handling.
+    """
+    chars = set()
+    for row in rows:
+        for value in row:
+            chars.update(value)
+    if columns:
+        for value in columns:
+            chars.update(value)
+    for char in chars:
+        code = ord(char)
+        if code < 0x20 or 0x7F <= code < 0xA0:
+            return False
+        if code >= 0x1100 or (
+            code > 0x7F and unicodedata.category(char) in _NARROW_EXCLUDED
+        ):
+            return False
+    return True
+
+
+def to_markdown(columns: Optional[List[str]], rows: List[List[str]]) -> str:
+    """
+    Render a table exactly like DataFrame(rows, columns).to_markdown(), that
+    is tabulate's "pipe" format with a row index and number parsing, without
+    building the DataFrame. Only valid for tables accepted by _plain_text.
+    """
+    num_cols = len(columns) if columns is not None else len(rows[0])
+    headers = [""] + (
+        columns if columns is not None else list(map(str, range(num_cols)))
+    )
+
+    body_columns = [[str(index) for index in range(len(rows))]]
+    numeric = [True]
+    for j in range(num_cols):
+        values = [row[j] for row in rows]
+        column_type = max(map(_cell_type, values), default=_BOOL)
+        column_type = max(column_type, _BOOL)
+        if column_type == _FLOAT:
+            values = [_format_float(value) for value in values]
+        body_columns.append(values)
+        numeric.append(column_type in (_INT, _FLOAT))
+
+    aligned = []
+    widths = []
+    for header, values, is_numeric in zip(headers, body_columns, numeric):
+        values = _align_column(values, is_numeric, len(header) + 2)
+        width = len(values[0])
+        aligned.append(values)
+        widths.append(width)
+
+    header_cells = [
+        header.rjust(width) if is_numeric else header.ljust(width)
+        for header, width, is_numeric in zip(headers, widths, numeric)
+    ]
+    separator = [
+        "-" * (width + 1) + ":" if is_numeric else ":" + "-" * (width + 1)
+        for width, is_numeric in zip(widths, numeric)
+    ]
+
+    lines = [
+        "| " + " | ".join(header_cells) + " |",
+        "|" + "|".join(separator) + "|",
+    ]
+    for row in zip(*aligned):
+        lines.append("| " + " | ".join(row) + " |")
+    return "\n".join(lines)
+
+
+def to_csv(columns: Optional[List[str]], rows: List[List[str]]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if columns is not None:
+        writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def to_json(element: TableItem) -> str:
+    """
+    Compact structured cells: one [row, col, row_span, col_span, text, kind]
+    entry per cell, kind being "column_header", "row_header", "row_section"
+    or "" for body cells.
+    """
+    cells = []
+    for cell in element.data.table_cells:
+        if cell.column_header:
+            kind = "column_header"
+        elif cell.row_header:
+            kind = "row_header"
+        elif cell.row_section:
+            kind = "row_section"
+        else:
+            kind = ""
+        cells.append(
+            [
+                cell.start_row_offset_idx,
+                cell.start_col_offset_idx,
+                cell.end_row_offset_idx - cell.start_row_offset_idx,
+                cell.end_col_offset_idx - cell.start_col_offset_idx,
+                cell.text,
+                kind,
+            ]
+        )
+    return json.dumps(
+        {
+            "num_rows": element.data.num_rows,
+            "num_cols": element.data.num_cols,
+            "cells": cells,
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+
+
+def serialize_table(
+    element: TableItem, document: DoclingDocument, table_format: str = "markdown"
+) -> str:
+    """
+    Serialize a table straight from its docling cells.
+
+    Args:
+        element: The table to serialize
+        document: The document containing the table
+        table_format: "markdown" (same output as the DataFrame's to_markdown),
+            "csv" or "json"
+
+    Returns:
+        str: The serialized table
+    """
+    if table_format == "json":
+        return to_json(element)
+    if table_format not in TABLE_FORMATS:
+        raise ValueError(f"Unsupported table format: {table_format}")
+
+    if element.data.num_rows == 0 or element.data.num_cols == 0:
+        columns, rows = None, []
+    else:
+        columns, rows = table_frame(element)
+
+    if table_format == "csv":
+        return to_csv(columns, rows)
+
+    if not rows or not _plain_text(columns, rows):
+        # Empty tables and multiline, ANSI or wide-character text take
+        # tabulate's special paths; leave those to it
+        return element.export_to_dataframe().to_markdown()
+    return to_markdown(columns, rows)
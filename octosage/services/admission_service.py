@@ -0,0 +1,300 @@
+import asyncio
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from octosage.settings import settings
+from octosage.utils.metrics import registry
+
+ADMISSION_QUEUE_DEPTH = registry.gauge(
+    "octosage_admission_queue_depth", "Conversions waiting for admission"
+)
+ADMISSION_RUNNING = registry.gauge(
+    "octosage_admission_running", "Conversions admitted and running"
+)
+ADMISSION_WAIT_SECONDS = registry.histogram(
+    "octosage_admission_wait_seconds", "Time conversions waited for admission"
+)
+ADMISSION_REJECTED = registry.counter(
+    "octosage_admission_rejected_total", "Conversions rejected early", ["reason"]
+)
+
+PRIORITY_WEIGHTS = {"low": 0.5, "normal": 1.0, "high": 2.0}
+
+# Weight of the latest run in the estimate correction
+_CORRECTION_ALPHA = 0.2
+
+
+class AdmissionRejected(Exception):
+    """A conversion that should be retried later instead of queued"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Conversion not admitted: {reason}")
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+@dataclass
+class Cost:
+    pages: int
+    size_bytes: int
+    # Estimated conversion time, before correction
+    seconds: float
+
+
+def count_pages(source: str) -> Optional[int]:
+    """Page count of a PDF from its page tree, None for other formats"""
+    if Path(source).suffix.lower() != ".pdf":
+        return None
+    import pypdfium2 as pdfium
+
+    try:
+        pdf = pdfium.PdfDocument(source)
+    except pdfium.PdfiumError:
+        return None
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+class _Job:
+    __slots__ = (
+        "client",
+        "estimate",
+        "seconds",
+        "start_tag",
+        "finish_tag",
+        "seq",
+        "future",
+    )
+
+    def __init__(self, client, estimate, seconds, start_tag, finish_tag, seq, future):
+        self.client = client
+        # Uncorrected and corrected estimates of the run time
+        self.estimate = estimate
+        self.seconds = seconds
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.seq = seq
+        self.future = future
+
+
+class AdmissionScheduler:
+    """
+    Admission control in front of the conversion pipeline.
+
+    Each conversion is costed from its page count and file size before it
+    starts, then waits for a slot under a global and a per-client
+    concurrency limit. Waiting conversions are served by weighted fair
+    queuing: a client's conversions get virtual finish tags advancing by
+    cost / weight, and the smallest tag goes next, so a client's huge scan
+    does not hold up everyone else's small documents. A conversion whose
+    estimated wait exceeds its deadline is rejected before it queues.
+
+    Runs on the event loop: admit() is async and no state is shared with
+    worker threads.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        max_per_client: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        client_weights: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Args:
+            max_concurrent: Conversions running at once
+            max_per_client: Conversions of one client running at once
+            max_queue: Waiting conversions beyond which new ones are rejected
+            client_weights: Share of each client relative to the default 1.0
+        """
+        self.max_concurrent = max_concurrent or settings.ADMISSION_MAX_CONCURRENT
+        self.max_per_client = max_per_client or settings.ADMISSION_MAX_PER_CLIENT
+        self.max_queue = max_queue or settings.ADMISSION_MAX_QUEUE
+        self.client_weights = (
+            settings.ADMISSION_CLIENT_WEIGHTS
+            if client_weights is None
+            else client_weights
+        )
+        self._waiting: List[_Job] = []
+        # Job to its start time
+        self._running: Dict[_Job, float] = {}
+        self._running_by_client: Dict[str, int] = {}
+        self._last_finish: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        # Observed / estimated conversion time, learned from finished runs
+        self.correction = 1.0
+
+    def estimate(self, sources: Iterable[str]) -> Cost:
+        """
+        Cost of converting the given files. PDFs are costed by their page
+        count; other formats by their size.
+
+        Blocking (PDFs are opened to count pages); run it off the loop.
+        """
+        pages = 0
+        size_bytes = 0
+        for source in sources:
+            size = os.path.getsize(source)
+            size_bytes += size
+            page_count = count_pages(str(source))
+            if page_count is None:
+                page_count = max(1, size // settings.ADMISSION_BYTES_PER_PAGE)
+            pages += page_count
+        seconds = (
+            pages * settings.ADMISSION_SECONDS_PER_PAGE
+            + size_bytes / (1024 * 1024) * settings.ADMISSION_SECONDS_PER_MB
+        )
+        return Cost(pages=pages, size_bytes=size_bytes, seconds=seconds)
+
+    def estimated_wait(self, finish_tag: float = math.inf) -> float:
+        """
+        Seconds until a conversion with the given finish tag would start:
+        the remaining work of running conversions and of those queued
+        ahead, spread over the global slots.
+        """
+        now = time.monotonic()
+        running = sum(
+            max(job.seconds - (now - started), 0.0)
+            for job, started in self._running.items()
+        )
+        ahead = sum(
+            job.seconds for job in self._waiting if job.finish_tag <= finish_tag
+        )
+        if not ahead and len(self._running) < self.max_concurrent:
+            return 0.0
+        return (running + ahead) / self.max_concurrent
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiting)
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        client: str,
+        cost: Cost,
+        priority: str = "normal",
+        deadline: Optional[float] = None,
+    ):
+        """
+        Wait for a slot, then hold it for the enclosed block.
+
+        Args:
+            client: Identity the per-client limit and fair share apply to
+            cost: Estimate of the conversion, from estimate()
+            priority: "low", "normal" or "high"; scales the client's weight
+            deadline: Seconds the caller is willing to wait to start
+
+        Raises:
+            AdmissionRejected: The queue is full, the estimated wait is over
+                the deadline, or the deadline passed while waiting
+        """
+        if priority not in PRIORITY_WEIGHTS:
+            raise ValueError(f"Unsupported priority: {priority}")
+        seconds = cost.seconds * self.correction
+        weight = self.client_weights.get(client, 1.0) * PRIORITY_WEIGHTS[priority]
+        start_tag = max(self._virtual_time, self._last_finish.get(client, 0.0))
+        finish_tag = start_tag + seconds / weight
+
+        # Decide before queueing, so rejected work leaves no trace
+        if len(self._waiting) >= self.max_queue:
+            ADMISSION_REJECTED.inc(reason="queue_full")
+            raise AdmissionRejected("queue_full", self.estimated_wait())
+        if deadline is not None:
+            wait = self.estimated_wait(finish_tag)
+            if wait > deadline:
+                ADMISSION_REJECTED.inc(reason="deadline")
+                raise AdmissionRejected("deadline", wait - deadline)
+
+        job = _Job(
+            client,
+            cost.seconds,
+            seconds,
+            start_tag,
+            finish_tag,
+            next(self._seq),
+            asyncio.get_running_loop().create_future(),
+        )
+        self._last_finish[client] = finish_tag
+        self._waiting.append(job)
+        enqueued = time.monotonic()
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(job.future), timeout=deadline)
+        except asyncio.TimeoutError:
+            self._withdraw(job)
+            ADMISSION_REJECTED.inc(reason="deadline")
+            raise AdmissionRejected("deadline", self.estimated_wait(finish_tag))
+        except BaseException:
+            # The request went away while waiting
+            self._withdraw(job)
+            raise
+        ADMISSION_WAIT_SECONDS.observe(time.monotonic() - enqueued)
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(job, time.monotonic() - started)
+
+    def _dispatch(self):
+        """Start the waiting jobs with the smallest finish tags that fit"""
+        while self._waiting and len(self._running) < self.max_concurrent:
+            eligible = [
+                job
+                for job in self._waiting
+                if self._running_by_client.get(job.client, 0) < self.max_per_client
+            ]
+            if not eligible:
+                break
+            job = min(eligible, key=lambda job: (job.finish_tag, job.seq))
+            self._waiting.remove(job)
+            self._running[job] = time.monotonic()
+            self._running_by_client[job.client] = (
+                self._running_by_client.get(job.client, 0) + 1
+            )
+            self._virtual_time = max(self._virtual_time, job.start_tag)
+            job.future.set_result(None)
+        self._update_gauges()
+
+    def _withdraw(self, job: _Job):
+        """Drop a job that will not run, whether it got a slot or not"""
+        if job in self._waiting:
+            self._waiting.remove(job)
+            self._dispatch()
+        elif job in self._running:
+            self._release(job, None)
+
+    def _release(self, job: _Job, elapsed: Optional[float]):
+        del self._running[job]
+        self._running_by_client[job.client] -= 1
+        if not self._running_by_client[job.client]:
+            del self._running_by_client[job.client]
+        if elapsed is not None and job.estimate > 0:
+            ratio = elapsed / job.estimate
+            self.correction = min(
+                max(
+                    (1 - _CORRECTION_ALPHA) * self.correction
+                    + _CORRECTION_ALPHA * ratio,
+                    0.1,
+                ),
+                10.0,
+            )
+        if not self._waiting and not self._running:
+            # Idle: past usage no longer counts against anyone
+            self._last_finish.clear()
+        self._dispatch()
+
+    def _update_gauges(self):
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiting))
+        ADMISSION_RUNNING.set(len(self._running))
@@ -0,0 +1,389 @@
+import hashlib
+import json
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from octosage.services.intermediate_service import conversion_key
+from octosage.services.search_service import index_transformed
+from octosage.settings import settings
+from octosage.storage.base import BaseStorage
+from octosage.storage.factory import get_storage
+
+SUPPORTED_SUFFIXES = {".pdf", ".docx", ".pptx"}
+
+# Per-process warm pipeline of a pool worker, created by the pool initializer
+_pipeline = None
+
+
+class BatchPipeline:
+    """
+    Warm DocConverter/SortOperation pipeline reused for every document
+    handled by one process.
+    """
+
+    def __init__(self, options: dict):
+        # Imported here so the parent process does not pay for the models
+        from octosage.converters.doc_converter import DocConverter
+        from octosage.operations.sort_operation import SortOperation
+        from octosage.operations.sort_scheduler import SortScheduler
+
+        self.options = options
+        self.transform = options.get("transform", False)
+        self.converter = DocConverter(
+            languages=options.get("languages", ["tr", "en"]),
+            force_full_page_ocr=options.get("force_full_page_ocr", True),
+            images_scale=options.get("images_scale", 2.0),
+            num_threads=options.get("num_threads", 4),
+            ocr_mode=options.get("ocr_mode"),
+            ocr_engine=options.get("ocr_engine"),
+            bounded_memory=options.get("bounded_memory"),
+            store_intermediates=options.get("store_intermediates"),
+            table_format=options.get("table_format"),
+            incremental=options.get("incremental"),
+            image_scale_mode=options.get("image_scale_mode"),
+            extraction_profile=options.get("extraction_profile"),
+            include_labels=options.get("include_labels"),
+            exclude_labels=options.get("exclude_labels"),
+        )
+        # A private scheduler keeps LayoutReader resident between documents
+        self.scheduler = SortScheduler(max_wait_ms=0)
+        self.scheduler.start()
+        self.sort_operator = SortOperation(
+            scheduler=self.scheduler, profile=self.converter.profile
+        )
+
+    def run(self, source: str) -> dict:
+        from octosage.operations.transform_operation import TransformOperation
+
+        result = self.converter.convert(source)
+        result = self.sort_operator.sort(result)
+        self.converter.save_sorted(result)
+        if self.transform:
+            result = TransformOperation(result).transform()
+        return result
+
+    def close(self):
+        self.scheduler.stop()
+
+
+def _init_worker(options: dict):
+    global _pipeline
+    if _pipeline is not None:
+        if _pipeline.options == options:
+            return
+        _pipeline.close()
+    _pipeline = BatchPipeline(options)
+
+
+def _process_file(
+    source: str,
+    file_hash: str,
+    pipeline: Optional[BatchPipeline] = None,
+    options: Optional[dict] = None,
+) -> dict:
+    """
+    Run one document through a pipeline: the one given, or this worker's,
+    rebuilt first when options differ from those it was built with
+    """
+    started = time.perf_counter()
+    try:
+        if options is not None:
+            _init_worker(options)
+        result = (pipeline or _pipeline).run(source)
+        return {
+            "source": source,
+            "sha256": file_hash,
+            "status": "success",
+            "result": result,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+    except Exception as e:
+        return {
+            "source": source,
+            "sha256": file_hash,
+            "status": "failed",
+            "error": str(e),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def collect_sources(
+    inputs: Iterable[str], list_file: Optional[str] = None
+) -> List[Path]:
+    """
+    Expand files, directories and a list file (one path per line) into
+    the ordered, de-duplicated set of supported documents.
+    """
+    paths = [Path(p) for p in inputs]
+    if list_file:
+        with open(list_file, "r", encoding="utf-8") as f:
+            paths.extend(Path(line.strip()) for line in f if line.strip())
+
+    sources = []
+    seen = set()
+    for path in paths:
+        if path.is_dir():
+            candidates = sorted(
+                p
+                for p in path.rglob("*")
+                if p.is_file() and p.suffix.lower() in SUPPORTED_SUFFIXES
+            )
+        else:
+            candidates = [path]
+        for candidate in candidates:
+            key = candidate.resolve()
+            if key not in seen:
+                seen.add(key)
+                sources.append(candidate)
+    return sources
+
+
+class BatchManifest:
+    """
+    Append-only JSONL manifest keyed by file content hash and the key of
+    the options it was processed with. Every finished document is recorded
+    as soon as its result is stored, so an interrupted run resumes without
+    reprocessing it, and a document seen before with the same options
+    points at its earlier output.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[tuple, dict] = {}
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from an interrupted write
+                        continue
+                    self.entries[_entry_key(entry)] = entry
+
+    def get(self, file_hash: str, key: str) -> Optional[dict]:
+        return self.entries.get((file_hash, key))
+
+    def is_done(self, file_hash: str, key: str) -> bool:
+        entry = self.get(file_hash, key)
+        return entry is not None and entry["status"] == "success"
+
+    def record(self, entries: List[dict]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self.entries[_entry_key(entry)] = entry
+            f.flush()
+
+
+def _entry_key(entry: dict) -> tuple:
+    # Entries written before options were keyed have no conversion_key and
+    # match no run
+    return entry["sha256"], entry.get("conversion_key")
+
+
+class BatchPool:
+    """
+    Worker processes shared by every batch run of a server. Each keeps its
+    pipeline warm between runs and only rebuilds it for a task whose
+    options differ from the last one's.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = max(workers or settings.BATCH_WORKERS, 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Started on first use, so the server does not spawn workers (and
+        # import docling in them) unless batches are actually run
+        with self._lock:
+            if self._executor is None:
+                # spawn: forked workers cannot safely reuse an initialised
+                # CUDA context
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def map(self, options: dict, pending: List[tuple]) -> Iterator[dict]:
+        """Results of (source, file hash) pairs, in order"""
+        sources = [source for source, _ in pending]
+        hashes = [file_hash for _, file_hash in pending]
+        return self._get_executor().map(
+            _process_file,
+            sources,
+            hashes,
+            repeat(None),
+            repeat(options),
+        )
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+class BatchService:
+    """
+    Process many documents through one warm pipeline per worker process
+    and write each result as a JSONL part into storage.
+    """
+
+    def __init__(
+        self,
+        options: Optional[dict] = None,
+        storage: Optional[BaseStorage] = None,
+        manifest_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        run_name: Optional[str] = None,
+        pool: Optional[BatchPool] = None,
+    ):
+        """
+        Args:
+            options: DocConverter parameters plus an optional "transform" flag
+            storage: Destination for the JSONL result parts
+            manifest_path: Local path of the resume manifest
+            workers: Number of worker processes; 1 runs in this process
+            run_name: Prefix of the stored JSONL parts
+            pool: Long-lived workers to run on instead of starting new ones;
+                workers is then ignored
+        """
+        self.options = options or {}
+        self.storage = storage or get_storage()
+        self.manifest = BatchManifest(manifest_path or settings.BATCH_MANIFEST_PATH)
+        self.workers = workers or settings.BATCH_WORKERS
+        # Manifest entries only count for runs with the same options
+        self.conversion_key = conversion_key(self.options)
+        self.run_name = run_name or time.strftime("%Y%m%d%H%M%S")
+        # Parts are named by run as well, so runs sharing a name or started
+        # in the same second never overwrite each other's results
+        self.run_id = uuid.uuid4().hex[:12]
+        self.pool = pool
+        self._part = 0
+
+    def run(self, sources: Iterable[Path]) -> dict:
+        """
+        Process all sources not already finished in the manifest with the
+        same options.
+
+        Returns:
+            dict: Counts of processed, skipped and failed documents, the
+            stored JSONL parts, and for every skipped document the part
+            holding its result
+        """
+        summary = {
+            "conversion_key": self.conversion_key,
+            "processed": 0,
+            "skipped": 0,
+            "failed": 0,
+            "outputs": [],
+            "previous": [],
+        }
+
+        pending = []
+        skipped = []
+        seen = set()
+        for source in sources:
+            file_hash = file_sha256(source)
+            if self.manifest.is_done(file_hash, self.conversion_key) or (
+                file_hash in seen
+            ):
+                skipped.append((str(source), file_hash))
+                continue
+            seen.add(file_hash)
+            pending.append((str(source), file_hash))
+
+        if pending:
+            for record in self._iter_results(pending):
+                if record["status"] == "success":
+                    summary["processed"] += 1
+                else:
+                    summary["failed"] += 1
+                summary["outputs"].append(self._flush(record))
+
+        summary["skipped"] = len(skipped)
+        for source, file_hash in skipped:
+            # Duplicates within this run point at the copy processed now
+            entry = self.manifest.get(file_hash, self.conversion_key)
+            summary["previous"].append(
+                {
+                    "source": source,
+                    "sha256": file_hash,
+                    "status": entry["status"] if entry else None,
+                    "output": entry["output"] if entry else None,
+                }
+            )
+        return summary
+
+    def _iter_results(self, pending: List[tuple]):
+        if self.pool is not None:
+            yield from self.pool.map(self.options, pending)
+            return
+
+        if self.workers <= 1:
+            # A pipeline of its own: concurrent runs in this process must
+            # not share, or close, each other's
+            pipeline = BatchPipeline(self.options)
+            try:
+                for source, file_hash in pending:
+                    yield _process_file(source, file_hash, pipeline)
+            finally:
+                pipeline.close()
+            return
+
+        # spawn: forked workers cannot safely reuse an initialised CUDA context
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.options,),
+        ) as pool:
+            sources = [source for source, _ in pending]
+            hashes = [file_hash for _, file_hash in pending]
+            yield from pool.map(_process_file, sources, hashes)
+
+    def _flush(self, record: dict) -> str:
+        """
+        Store a finished document as a JSONL part, record it in the manifest
+        and add a transformed result to the search index
+        """
+        self._part += 1
+        payload = json.dumps(record, ensure_ascii=False) + "\n"
+        output = self.storage.save_file(
+            payload.encode("utf-8"),
+            f"batch_{self.run_name}_{self.run_id}_{self._part:05d}.jsonl",
+        )
+        self.manifest.record(
+            [
+                {
+                    "sha256": record["sha256"],
+                    "conversion_key": self.conversion_key,
+                    "source": record["source"],
+                    "status": record["status"],
+                    "output": output,
+                }
+            ]
+        )
+        if self.options.get("transform") and record["status"] == "success":
+            index_transformed([record["result"]])
+        return output
@@ -0,0 +1,170 @@
+import hashlib
+import json
+from typing import TYPE_CHECKING, Optional, Union
+
+from octosage.storage.base import BaseStorage
+from octosage.storage.factory import get_storage
+from octosage.utils.metrics import timed
+from octosage.utils.spatial_index import SpatialIndex
+
+if TYPE_CHECKING:
+    from docling_core.types.doc import DoclingDocument
+
+PREFIX = "intermediates"
+
+
+def conversion_key(options: dict) -> str:
+    """Stable digest of the conversion options that affect the output"""
+    encoded = json.dumps(options, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def _decode_result(content: Union[str, bytes]) -> dict:
+    result = json.loads(content)
+    # JSON turns the integer page numbers into strings
+    result["metadata"]["pages"] = {
+        int(page_no): page for page_no, page in result["metadata"]["pages"].items()
+    }
+    return result
+
+
+class IntermediateService:
+    """
+    Stores what a conversion produced so sorting and transforming can be
+    re-run without converting the source again. Objects are keyed by the
+    source's binary hash and a digest of the conversion options:
+
+        intermediates/{hash}/{key}/document.json   docling's JSON export
+        intermediates/{hash}/{key}/elements.json   ProcessManager output
+        intermediates/{hash}/{key}/sorted.json     SortOperation output
+        intermediates/{hash}/{key}/index.json      SpatialIndex of sorted.json
+    """
+
+    def __init__(self, storage: Optional[BaseStorage] = None):
+        self.storage = storage or get_storage()
+
+    def _filename(self, document_hash, key: str, name: str) -> str:
+        return f"{PREFIX}/{document_hash}/{key}/{name}.json"
+
+    def _save_json(self, document_hash, key: str, name: str, data: dict):
+        content = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.storage.save_file(content, self._filename(document_hash, key, name))
+
+    def save_conversion(
+        self, document: Optional["DoclingDocument"], result: dict, options: dict
+    ) -> str:
+        """
+        Store the DoclingDocument and the pre-sort elements of a conversion,
+        adding the conversion key to the result's metadata. Incremental
+        conversions have no document covering every page; only their
+        elements are stored.
+
+        Returns:
+            str: Conversion key to pass to load_* and re-runs
+        """
+        key = conversion_key(options)
+        result["metadata"]["conversion_key"] = key
+        document_hash = result["metadata"]["hash"]
+        with timed("intermediate_save"):
+            if document is not None:
+                self._save_json(
+                    document_hash, key, "document", document.export_to_dict()
+                )
+            self._save_json(document_hash, key, "elements", result)
+        return key
+
+    def save_sorted(self, sorted_result: dict):
+        """Store a sort result next to the elements it was sorted from"""
+        metadata = sorted_result["metadata"]
+        with timed("intermediate_save"):
+            self._save_json(
+                metadata["hash"], metadata["conversion_key"], "sorted", sorted_result
+            )
+        self.save_index(sorted_result)
+
+    def save_index(self, sorted_result: dict) -> SpatialIndex:
+        """Build and store the spatial index of a sort result"""
+        metadata = sorted_result["metadata"]
+        with timed("spatial_index"):
+            index = SpatialIndex.build(sorted_result)
+        with timed("intermediate_save"):
+            self._save_json(
+                metadata["hash"], metadata["conversion_key"], "index", index.to_dict()
+            )
+        return index
+
+    def load_document(self, document_hash, key: str) -> "DoclingDocument":
+        from docling_core.types.doc import DoclingDocument
+
+        content = self._read_text(self._filename(document_hash, key, "document"))
+        return DoclingDocument.model_validate_json(content)
+
+    def _read_text(self, filename: str) -> str:
+        """
+        Decode a stored object straight from the backend's read buffer, a
+        map of the file for large local objects, instead of a bytes copy
+        """
+        view = self.storage.read_view(filename)
+        try:
+            return str(view, "utf-8")
+        finally:
+            view.release()
+
+    def load_elements(self, document_hash, key: str) -> dict:
+        with timed("intermediate_load"):
+            content = self._read_text(self._filename(document_hash, key, "elements"))
+            return _decode_result(content)
+
+    def load_sorted(self, document_hash, key: str) -> Optional[dict]:
+        try:
+            with timed("intermediate_load"):
+                content = self._read_text(self._filename(document_hash, key, "sorted"))
+        except FileNotFoundError:
+            return None
+        return _decode_result(content)
+
+    def load_index(self, document_hash, key: str) -> SpatialIndex:
+        """
+        Spatial index of the stored sort result, built and stored now for
+        results saved before indexes were
+
+        Raises:
+            FileNotFoundError: No sort result is stored
+        """
+        try:
+            with timed("intermediate_load"):
+                content = self._read_text(self._filename(document_hash, key, "index"))
+        except FileNotFoundError:
+            sorted_result = self.load_sorted(document_hash, key)
+            if sorted_result is None:
+                raise
+            return self.save_index(sorted_result)
+        return SpatialIndex.from_dict(json.loads(content))
+
+    def sort(self, document_hash, key: str, scheduler=None) -> dict:
+        """Re-run SortOperation on the stored elements and store the result"""
+        from octosage.operations.sort_operation import SortOperation
+
+        sorted_result = SortOperation(scheduler=scheduler).sort(
+            self.load_elements(document_hash, key)
+        )
+        self.save_sorted(sorted_result)
+        return sorted_result
+
+    def transform(
+        self, document_hash, key: str, resort: bool = False, scheduler=None
+    ) -> dict:
+        """
+        Re-run TransformOperation, on the stored sort result unless resort
+        is set or none was stored.
+        """
+        from octosage.operations.transform_operation import TransformOperation
+
+        sorted_result = None if resort else self.load_sorted(document_hash, key)
+        if sorted_result is None:
+            sorted_result = self.sort(document_hash, key, scheduler=scheduler)
+        from octosage.services.search_service import index_transformed
+
+        transformed_result = TransformOperation(sorted_result).transform()
+        index_transformed([transformed_result])
+        return transformed_result
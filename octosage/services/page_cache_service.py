@@ -0,0 +1,152 @@
+import json
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from octosage.storage.base import BaseStorage
+from octosage.storage.factory import get_storage
+from octosage.utils.metrics import timed
+
+PREFIX = "pages"
+
+# Fields re-stitched when a page is reused in another revision; paths are
+# stored as object names and reissued, as presigned URLs expire
+_PAGE_FIELDS = ("page", "group_id", "orders", "path")
+
+
+def _element_key(element: dict) -> str:
+    return json.dumps(
+        {k: v for k, v in element.items() if k not in _PAGE_FIELDS},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+
+
+class PageCacheService:
+    """
+    Stores the conversion of single pages keyed by page fingerprint and a
+    digest of the conversion options, so a revised document only converts
+    its changed pages:
+
+        pages/{key}/{fingerprint}.json
+
+    A record holds the page metadata, the page's ProcessManager elements
+    (with the group ids of the conversion that produced them, identified
+    by "source", and image paths as object names) and, once the document
+    was sorted, each element's order under the sort mode that produced it.
+    """
+
+    def __init__(self, storage: Optional[BaseStorage] = None):
+        self.storage = storage or get_storage()
+
+    def _filename(self, key: str, fingerprint: str) -> str:
+        return f"{PREFIX}/{key}/{fingerprint}.json"
+
+    def load_page(self, key: str, fingerprint: str) -> Optional[dict]:
+        """Stored record of a page, its image paths issued afresh"""
+        try:
+            content = self.storage.get_file(self._filename(key, fingerprint))
+        except FileNotFoundError:
+            return None
+        record = json.loads(content)
+        for element in record["elements"]:
+            if element.get("path"):
+                # Records written before paths were stored by name hold the
+                # path itself, which object_name maps back
+                element["path"] = self.storage.file_url(
+                    self.storage.object_name(element["path"])
+                )
+        orders = record.get("orders")
+        if orders is not None and not isinstance(orders, dict):
+            # Orders stored before they were kept per sort mode
+            del record["orders"]
+        return record
+
+    def save_page(self, key: str, fingerprint: str, record: dict):
+        record = {
+            **record,
+            "elements": [
+                (
+                    {**element, "path": self.storage.object_name(element["path"])}
+                    if element.get("path")
+                    else element
+                )
+                for element in record["elements"]
+            ],
+        }
+        content = json.dumps(record, ensure_ascii=False).encode("utf-8")
+        self.storage.save_file(content, self._filename(key, fingerprint))
+
+    def load_pages(self, key: str, fingerprints: Dict[int, str]) -> Dict[int, dict]:
+        """Stored records of the pages that have one, by page number"""
+        records = {}
+        with timed("page_cache_load"):
+            for page_no, fingerprint in fingerprints.items():
+                record = self.load_page(key, fingerprint)
+                if record is not None:
+                    records[page_no] = record
+        return records
+
+    def save_pages(self, key: str, source: str, result: dict):
+        """
+        Store a record for every fingerprinted page of a processed result
+        that was not itself reused.
+
+        Args:
+            key: Conversion key of the options used
+            source: Identifier of the conversion the group ids belong to
+            result: ProcessManager output, page numbers already final
+        """
+        page_elements = defaultdict(list)
+        for element in result["elements"]:
+            page_elements[element["page"]].append(element)
+
+        with timed("page_cache_save"):
+            for page_no, page in result["metadata"]["pages"].items():
+                if page.get("reused") or "fingerprint" not in page:
+                    continue
+                record = {
+                    "source": source,
+                    "page": {
+                        k: v
+                        for k, v in page.items()
+                        if k not in ("fingerprint", "reused")
+                    },
+                    "elements": page_elements[page_no],
+                }
+                self.save_page(key, page["fingerprint"], record)
+
+    def save_orders(self, sorted_result: dict):
+        """
+        Add the orders of a sort result to the records of its pages that do
+        not have them for its sort mode yet. Sorting drops and reorders
+        elements, so orders are matched back to the stored elements by
+        content.
+        """
+        metadata = sorted_result["metadata"]
+        key = metadata.get("conversion_key")
+        mode = metadata.get("sort_boxes", {}).get("mode")
+        if key is None or mode is None:
+            return
+
+        sorted_by_page = defaultdict(lambda: defaultdict(list))
+        for element in sorted_result["elements"]:
+            if "orders" in element:
+                sorted_by_page[element["page"]][_element_key(element)].append(
+                    element["orders"]
+                )
+
+        with timed("page_cache_save"):
+            for page_no, page in metadata["pages"].items():
+                if "fingerprint" not in page:
+                    continue
+                record = self.load_page(key, page["fingerprint"])
+                if record is None or mode in record.get("orders", {}):
+                    continue
+                orders_by_key = sorted_by_page.get(page_no, {})
+                orders: List[Optional[float]] = []
+                for element in record["elements"]:
+                    candidates = orders_by_key.get(_element_key(element))
+                    # None marks elements sorting leaves out
+                    orders.append(candidates.pop(0) if candidates else None)
+                record["orders"] = {**record.get("orders", {}), mode: orders}
+                self.save_page(key, page["fingerprint"], record)
@@ -4,7 +4,9 @@ from reportlab.lib.colors import blue
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 import io
+from collections import defaultdict
 from reportlab.lib.colors import blue, red, green, purple, orange, HexColor
+from octosage.utils.metrics import timed
 
 
 class PDFDrawingService:
@@ -45,9 +47,19 @@ class PDFDrawingService:
 
     def draw_annotations(self, pdf_path: str, elements: list) -> bytes:
         """Draw annotations on PDF with element boxes and information"""
+        with timed("draw_annotations"):
+            return self._draw_annotations(pdf_path, elements)
+
+    def _draw_annotations(self, pdf_path: str, elements: list) -> bytes:
         reader = PdfReader(pdf_path)
         writer = PdfWriter()
 
+        # One pass over the elements instead of one per page
+        elements_by_page = defaultdict(list)
+        for element in elements:
+            if element.get("bbox") is not None:
+                elements_by_page[element.get("page")].append(element)
+
         for page_num in range(len(reader.pages)):
             page = reader.pages[page_num]
             page_width = float(page.mediabox.width)
@@ -57,7 +69,7 @@ class PDFDrawingService:
             can = canvas.Canvas(packet, pagesize=(page_width, page_height))
             can.setFont("DejaVuSans", self.font_size)  # Use smaller font size
 
-            page_elements = [e for e in elements if e.get("page") == page_num + 1]
+            page_elements = elements_by_page.get(page_num + 1, [])
 
             for idx, element in enumerate(page_elements, 1):
                 bbox = element["bbox"]
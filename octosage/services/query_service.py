@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from octosage.services.intermediate_service import IntermediateService
+from octosage.settings import settings
+from octosage.utils.metrics import timed
+from octosage.utils.spatial_index import SpatialIndex
+
+
+class QueryService:
+    """
+    Answers region queries over stored sort results: elements overlapping
+    or inside a rectangle, elements holding a point, and the elements
+    nearest to a point. The indexes and element lists of recently queried
+    documents stay in memory, so repeated queries skip storage and only
+    touch the grid cells involved.
+    """
+
+    def __init__(
+        self,
+        intermediates: Optional[IntermediateService] = None,
+        max_documents: Optional[int] = None,
+    ):
+        self.intermediates = intermediates or IntermediateService()
+        self.max_documents = max_documents or settings.QUERY_CACHE_DOCUMENTS
+        self._documents: "OrderedDict[tuple, Tuple[SpatialIndex, list]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self, document_hash, key: str) -> Tuple[SpatialIndex, list]:
+        cache_key = (str(document_hash), key)
+        with self._lock:
+            if cache_key in self._documents:
+                self._documents.move_to_end(cache_key)
+                return self._documents[cache_key]
+
+        sorted_result = self.intermediates.load_sorted(document_hash, key)
+        if sorted_result is None:
+            raise FileNotFoundError(f"No stored sort result for {document_hash}")
+        index = self.intermediates.load_index(document_hash, key)
+        loaded = (index, sorted_result["elements"])
+        with self._lock:
+            self._documents[cache_key] = loaded
+            while len(self._documents) > self.max_documents:
+                self._documents.popitem(last=False)
+        return loaded
+
+    def discard(self, document_hash, key: str):
+        """Forget a document whose stored sort result was replaced"""
+        with self._lock:
+            self._documents.pop((str(document_hash), key), None)
+
+    def query(
+        self,
+        document_hash,
+        key: str,
+        page: int,
+        bbox: Optional[Sequence[float]] = None,
+        point: Optional[Tuple[float, float]] = None,
+        nearest: int = 0,
+        contained: bool = False,
+    ) -> dict:
+        """
+        Args:
+            document_hash: Binary hash of the source document
+            key: Conversion key the result was stored under
+            page: Page number, 1-based
+            bbox: Rectangle (left, top, right, bottom) in bbox coordinates
+            point: (x, y) for point and nearest queries
+            nearest: Return this many elements nearest to point instead of
+                those holding it
+            contained: With bbox, only elements entirely inside it
+
+        Returns:
+            dict: Matching elements with their position ("index") in the
+                stored sort result, nearest first or in reading order
+        """
+        if bbox is None and point is None:
+            raise ValueError("A bbox or a point is required")
+        with timed("query_load"):
+            index, elements = self._load(document_hash, key)
+
+        started = time.perf_counter()
+        distances: List[Tuple[int, float]] = []
+        if bbox is not None:
+            ids = index.query(page, bbox, contained)
+        elif nearest > 0:
+            distances = index.nearest(page, point[0], point[1], nearest)
+            ids = [element_id for element_id, _ in distances]
+        else:
+            ids = index.at_point(page, point[0], point[1])
+        took_us = (time.perf_counter() - started) * 1e6
+
+        matches = [{"index": element_id, **elements[element_id]} for element_id in ids]
+        for match, (_, distance) in zip(matches, distances):
+            match["distance"] = round(distance, 3)
+        return {"page": page, "elements": matches, "took_us": round(took_us, 1)}
@@ -0,0 +1,518 @@
+import fcntl
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+from array import array
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from octosage.settings import settings
+from octosage.utils.metrics import timed
+
+# Transformed chunk fields that are searched, with their BM25 weight
+FIELD_WEIGHTS = {"content": 1.0, "title": 2.0, "page_header": 1.5}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+MANIFEST = "index.json"
+LOCK = "index.lock"
+SEGMENT_PREFIX = "seg_"
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Case-folded word tokens"""
+    if not text:
+        return []
+    return _TOKEN.findall(text.casefold())
+
+
+def _weighted_terms(chunk: dict) -> Counter:
+    """Term frequencies of a chunk, each field counted at its weight"""
+    terms = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        for term in tokenize(chunk.get(field)):
+            terms[term] += weight
+    return terms
+
+
+def _write_array(path: Path, typecode: str, values: Iterable):
+    data = array(typecode, values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    with open(path, "wb") as f:
+        data.tofile(f)
+
+
+class _MappedArray:
+    """Read-only little-endian array backed by an mmap of a whole file"""
+
+    def __init__(self, path: Path, typecode: str):
+        self._map = None
+        size = path.stat().st_size
+        if size == 0 or sys.byteorder != "little":
+            # mmap cannot map empty files; big-endian hosts read a copy
+            data = array(typecode)
+            with open(path, "rb") as f:
+                data.frombytes(f.read())
+            if sys.byteorder != "little":
+                data.byteswap()
+            self.values = data
+            return
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.values = memoryview(self._map).cast(typecode)
+
+    def close(self):
+        if self._map is not None:
+            self.values.release()
+            self._map.close()
+            self._map = None
+
+
+class Segment:
+    """
+    One immutable batch of indexed chunks:
+
+        meta.json      chunk count, total length, documents [hash, filename]
+        terms.json     term -> [postings offset, postings count]
+        postings.ids   chunk number of each posting (uint32)
+        postings.tf    weighted term frequency of each posting (float32)
+        lengths.bin    weighted length of each chunk (float32)
+        docs.bin       document number of each chunk (uint32)
+        chunks.jsonl   the chunks, with offsets.bin (uint64) to seek to one
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        with open(path / "meta.json", "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        with open(path / "terms.json", "r", encoding="utf-8") as f:
+            self.terms: Dict[str, List[int]] = json.load(f)
+        self.documents = [tuple(doc) for doc in self.meta["documents"]]
+        self._ids = _MappedArray(path / "postings.ids", "I")
+        self._tfs = _MappedArray(path / "postings.tf", "f")
+        self._lengths = _MappedArray(path / "lengths.bin", "f")
+        self._docs = _MappedArray(path / "docs.bin", "I")
+        self._offsets = _MappedArray(path / "offsets.bin", "Q")
+        self._chunks = open(path / "chunks.jsonl", "rb")
+        self._chunks_lock = threading.Lock()
+        # Searches reading the segment, and whether it left the index; both
+        # guarded by the SearchIndex lock
+        self.readers = 0
+        self.retired = False
+
+    @property
+    def chunk_count(self) -> int:
+        return self.meta["chunks"]
+
+    @property
+    def total_length(self) -> float:
+        return self.meta["total_length"]
+
+    def document_frequency(self, term: str) -> int:
+        entry = self.terms.get(term)
+        return entry[1] if entry else 0
+
+    def postings(self, term: str):
+        """(chunk numbers, weighted frequencies) of a term, as array views"""
+        entry = self.terms.get(term)
+        if entry is None:
+            return (), ()
+        offset, count = entry
+        return (
+            self._ids.values[offset : offset + count],
+            self._tfs.values[offset : offset + count],
+        )
+
+    def length(self, chunk_no: int) -> float:
+        return self._lengths.values[chunk_no]
+
+    def document(self, chunk_no: int) -> int:
+        return self._docs.values[chunk_no]
+
+    def chunk(self, chunk_no: int) -> dict:
+        start = self._offsets.values[chunk_no]
+        end = self._offsets.values[chunk_no + 1]
+        with self._chunks_lock:
+            self._chunks.seek(start)
+            return json.loads(self._chunks.read(end - start))
+
+    def iter_chunks(self):
+        """(document number, chunk) of every chunk, in order"""
+        for chunk_no in range(self.chunk_count):
+            yield self.document(chunk_no), self.chunk(chunk_no)
+
+    def close(self):
+        for mapped in (self._ids, self._tfs, self._lengths, self._docs, self._offsets):
+            mapped.close()
+        self._chunks.close()
+
+    @staticmethod
+    def write(path: Path, documents: List[tuple], chunks: List[tuple]):
+        """
+        Args:
+            path: New segment directory
+            documents: (hash, filename) of each document
+            chunks: (document number, chunk) pairs
+        """
+        path.mkdir(parents=True)
+        postings = defaultdict(list)
+        lengths = []
+        offsets = [0]
+        with open(path / "chunks.jsonl", "wb") as f:
+            for chunk_no, (_, chunk) in enumerate(chunks):
+                terms = _weighted_terms(chunk)
+                for term, tf in terms.items():
+                    postings[term].append((chunk_no, tf))
+                lengths.append(sum(terms.values()))
+                f.write(json.dumps(chunk, ensure_ascii=False).encode("utf-8") + b"\n")
+                offsets.append(f.tell())
+
+        terms = {}
+        ids = array("I")
+        tfs = array("f")
+        for term in sorted(postings):
+            terms[term] = [len(ids), len(postings[term])]
+            for chunk_no, tf in postings[term]:
+                ids.append(chunk_no)
+                tfs.append(tf)
+        _write_array(path / "postings.ids", "I", ids)
+        _write_array(path / "postings.tf", "f", tfs)
+        _write_array(path / "lengths.bin", "f", lengths)
+        _write_array(path / "docs.bin", "I", (doc_no for doc_no, _ in chunks))
+        _write_array(path / "offsets.bin", "Q", offsets)
+        with open(path / "terms.json", "w", encoding="utf-8") as f:
+            json.dump(terms, f, ensure_ascii=False, separators=(",", ":"))
+        with open(path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "chunks": len(chunks),
+                    "total_length": sum(lengths),
+                    "documents": [list(doc) for doc in documents],
+                },
+                f,
+                ensure_ascii=False,
+            )
+
+
+class SearchIndex:
+    """
+    Local BM25 index over transformed chunks, built incrementally: every
+    add() writes a new segment, and once there are more than max_segments
+    they are merged into one. A document added again replaces its earlier
+    version, which stays in its segment as deleted until the next merge.
+
+    index.json lists the live segments and deleted document hashes. Writes
+    hold a file lock, so processes sharing the directory do not interleave
+    them; readers pick up new segments when index.json changes, holding
+    the lock shared so a merge cannot remove segments they are opening.
+    """
+
+    def __init__(self, root: str, max_segments: Optional[int] = None):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_segments = max_segments or settings.SEARCH_MAX_SEGMENTS
+        self._segments: Dict[str, Segment] = {}
+        self._manifest = {"segments": [], "deleted": {}, "next": 0}
+        self._manifest_mtime = None
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def _file_lock(self, operation: int):
+        with open(self.root / LOCK, "a") as lock_file:
+            fcntl.flock(lock_file, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _write_lock(self):
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            self._refresh()
+            self._remove_orphans()
+            yield
+
+    def _manifest_changed(self) -> bool:
+        try:
+            mtime = (self.root / MANIFEST).stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        return mtime != self._manifest_mtime
+
+    def _sync(self):
+        """Pick up index.json changes; the caller holds self._lock"""
+        if self._manifest_changed():
+            with self._file_lock(fcntl.LOCK_SH):
+                self._refresh()
+
+    def _refresh(self):
+        """
+        Reload index.json and open or close segments if it changed; the
+        caller holds the file lock
+        """
+        path = self.root / MANIFEST
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._manifest_mtime:
+            return
+        with open(path, "r", encoding="utf-8") as f:
+            self._manifest = json.load(f)
+        self._manifest_mtime = mtime
+        live = set(self._manifest["segments"])
+        for name in list(self._segments):
+            if name not in live:
+                self._retire(self._segments.pop(name))
+        for name in self._manifest["segments"]:
+            if name not in self._segments:
+                self._segments[name] = Segment(self.root / name)
+
+    def _retire(self, segment: Segment):
+        """Close a segment once no search reads it any more"""
+        segment.retired = True
+        if not segment.readers:
+            segment.close()
+
+    def _remove_orphans(self):
+        """
+        Delete segment directories index.json does not list, left by a
+        write that failed before the manifest was saved; the caller holds
+        the file lock exclusively
+        """
+        live = set(self._manifest["segments"])
+        for path in self.root.glob(f"{SEGMENT_PREFIX}*"):
+            if path.name not in live:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _segment_name(self) -> str:
+        name = f"{SEGMENT_PREFIX}{self._manifest['next']:06d}"
+        self._manifest["next"] += 1
+        return name
+
+    def _save_manifest(self):
+        fd, temp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f)
+        os.replace(temp_path, self.root / MANIFEST)
+        self._manifest_mtime = None
+        self._refresh()
+
+    def add(self, results: Iterable[dict]):
+        """
+        Index TransformOperation results, replacing earlier versions of
+        the same documents
+        """
+        documents = []
+        chunks = []
+        for result in results:
+            metadata = result["metadata"]
+            doc_no = len(documents)
+            documents.append((str(metadata["hash"]), metadata.get("filename")))
+            chunks.extend((doc_no, chunk) for chunk in result["elements"])
+        if not documents:
+            return
+
+        with timed("search_index"), self._write_lock():
+            name = self._segment_name()
+            Segment.write(self.root / name, documents, chunks)
+            self._segments[name] = Segment(self.root / name)
+            added = {document_hash for document_hash, _ in documents}
+            for segment_name in self._manifest["segments"]:
+                segment = self._segments[segment_name]
+                replaced = [h for h, _ in segment.documents if h in added]
+                if replaced:
+                    deleted = self._manifest["deleted"].setdefault(segment_name, [])
+                    deleted.extend(h for h in replaced if h not in deleted)
+            self._manifest["segments"].append(name)
+            if len(self._manifest["segments"]) > self.max_segments:
+                self._merge()
+            self._save_manifest()
+
+    def _merge(self):
+        """Rewrite the live chunks of every segment as one segment"""
+        documents = []
+        chunks = []
+        for segment_name in self._manifest["segments"]:
+            segment = self._segments[segment_name]
+            deleted = set(self._manifest["deleted"].get(segment_name, ()))
+            doc_map = {}
+            for doc_no, chunk in segment.iter_chunks():
+                document = segment.documents[doc_no]
+                if document[0] in deleted:
+                    continue
+                if doc_no not in doc_map:
+                    doc_map[doc_no] = len(documents)
+                    documents.append(document)
+                chunks.append((doc_map[doc_no], chunk))
+
+        name = self._segment_name()
+        Segment.write(self.root / name, documents, chunks)
+        old = self._manifest["segments"]
+        self._manifest = {
+            "segments": [name],
+            "deleted": {},
+            "next": self._manifest["next"],
+        }
+        self._save_manifest()
+        for segment_name in old:
+            shutil.rmtree(self.root / segment_name, ignore_errors=True)
+
+    def search(
+        self,
+        query: str,
+        documents: Optional[Iterable[str]] = None,
+        limit: int = 10,
+    ) -> List[dict]:
+        """
+        Args:
+            query: Free text; chunks are scored on any of its terms
+            documents: Hashes to search in; all documents when None
+            limit: Number of hits, at most SEARCH_MAX_LIMIT
+
+        Returns:
+            list: Chunks with their score, document hash and filename,
+                best first
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        limit = min(max(limit, 1), settings.SEARCH_MAX_LIMIT)
+        wanted = None if documents is None else {str(h) for h in documents}
+
+        with timed("search"), self._reading() as (segments, deleted):
+            return self._search(terms, wanted, limit, segments, deleted)
+
+    @contextmanager
+    def _reading(self):
+        """
+        The live segments and deleted hashes, kept open until the block
+        ends even if the index changes meanwhile
+        """
+        with self._lock:
+            self._sync()
+            segments = [
+                (name, self._segments[name]) for name in self._manifest["segments"]
+            ]
+            deleted = {
+                name: set(hashes) for name, hashes in self._manifest["deleted"].items()
+            }
+            for _, segment in segments:
+                segment.readers += 1
+        try:
+            yield segments, deleted
+        finally:
+            with self._lock:
+                for _, segment in segments:
+                    segment.readers -= 1
+                    if segment.retired and not segment.readers:
+                        segment.close()
+
+    def _search(
+        self,
+        terms: List[str],
+        wanted: Optional[set],
+        limit: int,
+        segments: List[tuple],
+        deleted: Dict[str, set],
+    ) -> List[dict]:
+        """BM25 scoring over the segments of one _reading snapshot"""
+        chunk_count = sum(segment.chunk_count for _, segment in segments)
+        if not chunk_count:
+            return []
+        average_length = (
+            sum(segment.total_length for _, segment in segments) / chunk_count
+        )
+        idf = {}
+        for term in terms:
+            df = sum(segment.document_frequency(term) for _, segment in segments)
+            idf[term] = math.log(1 + (chunk_count - df + 0.5) / (df + 0.5))
+
+        scored = []
+        for name, segment in segments:
+            removed = deleted.get(name, ())
+            allowed = {
+                doc_no
+                for doc_no, (document_hash, _) in enumerate(segment.documents)
+                if document_hash not in removed
+                and (wanted is None or document_hash in wanted)
+            }
+            if not allowed:
+                continue
+            scores = defaultdict(float)
+            for term in terms:
+                ids, tfs = segment.postings(term)
+                for chunk_no, tf in zip(ids, tfs):
+                    if segment.document(chunk_no) not in allowed:
+                        continue
+                    norm = (
+                        1
+                        - BM25_B
+                        + BM25_B * segment.length(chunk_no) / (average_length or 1.0)
+                    )
+                    scores[chunk_no] += (
+                        idf[term] * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+                    )
+            scored.extend((score, name, chunk_no) for chunk_no, score in scores.items())
+
+        by_name = dict(segments)
+        hits = []
+        for score, name, chunk_no in heapq.nlargest(limit, scored):
+            segment = by_name[name]
+            document_hash, filename = segment.documents[segment.document(chunk_no)]
+            hits.append(
+                {
+                    "score": round(score, 4),
+                    "document": document_hash,
+                    "filename": filename,
+                    **segment.chunk(chunk_no),
+                }
+            )
+        return hits
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._sync()
+            segments = [self._segments[name] for name in self._manifest["segments"]]
+            deleted = sum(len(hashes) for hashes in self._manifest["deleted"].values())
+            return {
+                "segments": len(segments),
+                "chunks": sum(segment.chunk_count for segment in segments),
+                "documents": sum(len(segment.documents) for segment in segments)
+                - deleted,
+            }
+
+
+_search_index: Optional[SearchIndex] = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index() -> Optional[SearchIndex]:
+    """Process-wide search index from settings, or None when disabled"""
+    global _search_index
+    if not settings.SEARCH_INDEX:
+        return None
+    with _search_index_lock:
+        if _search_index is None:
+            _search_index = SearchIndex(settings.SEARCH_INDEX_DIR)
+        return _search_index
+
+
+def index_transformed(results: Iterable[dict]):
+    """Add transformed results to the search index when it is enabled"""
+    search_index = get_search_index()
+    if search_index is not None:
+        search_index.add(results)
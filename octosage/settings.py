@@ -1,20 +1,103 @@
-import torch
 import os
 from dotenv import find_dotenv
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
     BASE_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     OUTPUT_DIR: str = os.path.join(BASE_DIR, "output")
-    DEVICE: str = "cuda:0" if torch.cuda.is_available() else "cpu"
+    # Detected on first use (octosage.utils.device) when unset
+    DEVICE: Optional[str] = None
+    # Local model artifacts fetched by `octosage prefetch`
+    MODEL_DIR: str = os.path.join(BASE_DIR, "models")
+    MODEL_OFFLINE: bool = False
+    LAYOUTREADER_MODEL: str = "hantian/layoutreader"
+    LAYOUTREADER_REVISION: Optional[str] = None
     S3_KEY: str = "minio"
     S3_SECRET: str = "minio_secret"
     S3_REGION: str = "us-east-1"
     S3_BUCKET: str = "octosage"
     S3_ENDPOINT: str = "http://0.0.0.0:9000"
+    # Backend ("s3", "local" or "memory"), optionally with "+cache" to put
+    # the disk read cache in front of it, e.g. "s3+cache"
     DRIVE: str = "s3"
+    STORAGE_CACHE_DIR: str = os.path.join(BASE_DIR, "cache", "storage")
+    STORAGE_CACHE_MAX_MB: int = 2048
+    # Cached objects are re-checked against the backend's ETag after this long
+    STORAGE_CACHE_VALIDATE_SECONDS: float = 60.0
+    # Hard-link identical objects to one copy in local storage. Off by
+    # default: a file changed in place outside LocalStorage would change
+    # every object linked to it
+    LOCAL_DEDUP: bool = False
+    # Local objects at least this large are read through mmap
+    LOCAL_MMAP_MIN_BYTES: int = 1024 * 1024
+    SORT_BATCHING: bool = False
+    SORT_BATCH_MAX_SIZE: int = 8
+    SORT_BATCH_MAX_WAIT_MS: float = 10.0
+    # Pages whose boxes match a cached page reuse its LayoutReader order;
+    # 0 entries disables the cache, a tolerance (in 0-1000 page units)
+    # lets near-identical layouts match too
+    SORT_ORDER_CACHE_SIZE: int = 4096
+    SORT_ORDER_CACHE_TOLERANCE: int = 0
+    SORT_ORDER_CACHE_DIR: Optional[str] = None
+    SORT_ORDER_CACHE_MAX_MB: int = 256
+    # "flat" or "hierarchical" (groups sorted as one unit, boxes per unit
+    # capped at SORT_MAX_UNIT_BOXES)
+    SORT_MODE: str = "flat"
+    SORT_MAX_UNIT_BOXES: int = 4
+    OCR_MODE: str = "on"
+    OCR_ENGINE: str = "easyocr"
+    TESSERACT_PATH: Optional[str] = None
+    OCR_AUTO_MIN_CHARS: int = 100
+    OCR_AUTO_MAX_BITMAP_COVERAGE: float = 0.5
+    BOUNDED_MEMORY: bool = False
+    MEMORY_CEILING_MB: Optional[int] = None
+    MEMORY_WAIT_TIMEOUT: float = 300.0
+    STORE_INTERMEDIATES: bool = False
+    # Stored results whose spatial index /documents/{hash}/query keeps loaded
+    QUERY_CACHE_DOCUMENTS: int = 64
+    # Local BM25 index over transformed chunks, served by /search
+    SEARCH_INDEX: bool = False
+    SEARCH_INDEX_DIR: str = os.path.join(BASE_DIR, "search_index")
+    SEARCH_MAX_SEGMENTS: int = 8
+    SEARCH_MAX_LIMIT: int = 100
+    INCREMENTAL: bool = False
+    # "fixed" crops pictures/tables at images_scale; "adaptive" picks a scale
+    # per element from its size and a pixel budget
+    IMAGE_SCALE_MODE: str = "fixed"
+    IMAGE_PIXEL_BUDGET: int = 1_000_000
+    IMAGE_MIN_SCALE: float = 0.5
+    IMAGE_MAX_SCALE: Optional[float] = None
+    IMAGE_FLAT_THRESHOLD: Optional[float] = 1.0
+    PAGE_FINGERPRINT_SCALE: float = 0.25
+    # "full", "text+tables" or "text-only", plus docling label filters
+    EXTRACTION_PROFILE: str = "full"
+    INCLUDE_LABELS: Optional[List[str]] = None
+    EXCLUDE_LABELS: Optional[List[str]] = None
+    TABLE_FORMAT: str = "markdown"
+    PROCESS_WORKERS: int = 4
+    PROFILING_ADMIN_TOKEN: Optional[str] = None
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_FORMAT: str = "collapsed"
+    PROFILING_INTERVAL_MS: float = 5.0
+    # Admission control in front of conversions: concurrency limits, fair
+    # queuing across clients and cost estimates from page count and size.
+    # Clients are told apart by peer address; X-Octosage-Client is only
+    # trusted from the proxies (addresses or networks) listed here
+    ADMISSION_CONTROL: bool = False
+    ADMISSION_TRUSTED_PROXIES: List[str] = []
+    ADMISSION_MAX_CONCURRENT: int = 4
+    ADMISSION_MAX_PER_CLIENT: int = 2
+    ADMISSION_MAX_QUEUE: int = 256
+    ADMISSION_SECONDS_PER_PAGE: float = 1.0
+    ADMISSION_SECONDS_PER_MB: float = 0.1
+    # Page estimate of formats whose pages are not counted
+    ADMISSION_BYTES_PER_PAGE: int = 100_000
+    ADMISSION_CLIENT_WEIGHTS: Dict[str, float] = {}
+    BATCH_WORKERS: int = 2
+    BATCH_MANIFEST_PATH: str = os.path.join(OUTPUT_DIR, "batch_manifest.jsonl")
 
     class Config:
         env_file = find_dotenv("local.env")
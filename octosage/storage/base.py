@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Optional, Tuple
 
 
 class BaseStorage(ABC):
@@ -15,3 +16,47 @@ class BaseStorage(ABC):
         Retrieve file content by path/identifier
         """
         pass
+
+    def read_view(self, file_path: str) -> memoryview:
+        """
+        Retrieve file content as a read-only buffer; backends that can serve
+        it without copying override this
+        """
+        return memoryview(self.get_file(file_path))
+
+    def object_name(self, file_path: str) -> str:
+        """
+        Filename an object was saved under, from the path save_file returned
+        """
+        return file_path
+
+    def file_url(self, filename: str) -> str:
+        """
+        Path to hand out for a stored object, as save_file returns it;
+        backends whose paths expire issue a fresh one
+        """
+        return filename
+
+    def stat_file(self, file_path: str) -> Optional[str]:
+        """
+        Version tag (ETag) of the stored object without reading it, or None
+        if the backend has no such notion
+        """
+        return None
+
+    def store_file(self, content: bytes, filename: str) -> Tuple[str, Optional[str]]:
+        """
+        Save file content and return its path together with the version tag
+        of the object written
+        """
+        path = self.save_file(content, filename)
+        return path, self.stat_file(filename)
+
+    def fetch_file(self, file_path: str) -> Tuple[bytes, Optional[str]]:
+        """
+        Retrieve file content together with its version tag
+        """
+        # Tag first: if the object changes in between, the tag is stale
+        # rather than the content
+        etag = self.stat_file(file_path)
+        return self.get_file(file_path), etag
@@ -0,0 +1,276 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from octosage.storage.base import BaseStorage
+from octosage.utils.metrics import (
+    DISK_CACHE_BYTES,
+    STORAGE_CACHE_BYTES_SAVED,
+    STORAGE_CACHE_REQUESTS,
+)
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    etag: Optional[str]
+    sha256: str
+    size: int
+    # time.monotonic() of the last check against the backend, 0 if never
+    validated_at: float = 0.0
+
+
+class _Flight:
+    """One backend fetch that concurrent misses for the same key wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class DiskCache:
+    """
+    Size-bounded LRU of objects on local disk. Each object is stored as a
+    data file and a JSON sidecar holding its key, ETag and SHA-256; content
+    whose hash no longer matches is dropped instead of served.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, name: str = "storage"):
+        """
+        Args:
+            root: Cache directory, rebuilt into the index on start
+            max_bytes: Total size of cached content to keep
+            name: Label of the cache in metrics
+        """
+        self.name = name
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._load()
+
+    def _data_path(self, key: str) -> Path:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def _load(self):
+        found = []
+        for meta_path in self.root.glob("*/*/*.json"):
+            data_path = meta_path.with_suffix("")
+            try:
+                meta = json.loads(meta_path.read_text())
+                stat = data_path.stat()
+            except (OSError, ValueError):
+                meta_path.unlink(missing_ok=True)
+                continue
+            found.append((stat.st_mtime, CacheEntry(**meta)))
+        # Least recently stored first; access order is not kept across restarts
+        for _, entry in sorted(found, key=lambda item: item[0]):
+            self.entries[entry.key] = entry
+            self.total_bytes += entry.size
+        DISK_CACHE_BYTES.set(self.total_bytes, cache=self.name)
+
+    def _write_atomic(self, content: bytes, target: Path):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(content)
+            os.replace(temp_name, target)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+    def _remove(self, entry: CacheEntry):
+        """Drop an entry; the caller holds the lock"""
+        self.entries.pop(entry.key, None)
+        self.total_bytes -= entry.size
+        data_path = self._data_path(entry.key)
+        data_path.with_suffix(".json").unlink(missing_ok=True)
+        data_path.unlink(missing_ok=True)
+
+    def get(self, key: str) -> Optional[Tuple[bytes, CacheEntry]]:
+        """Cached content and its entry, or None if absent or corrupt"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+        try:
+            content = self._data_path(key).read_bytes()
+        except FileNotFoundError:
+            # Evicted between the lookup and the read
+            return None
+        if hashlib.sha256(content).hexdigest() != entry.sha256:
+            self.discard(key)
+            return None
+        return content, entry
+
+    def put(self, key: str, content: bytes, etag: Optional[str], validated: bool):
+        if len(content) > self.max_bytes:
+            return
+        entry = CacheEntry(
+            key=key,
+            etag=etag,
+            sha256=hashlib.sha256(content).hexdigest(),
+            size=len(content),
+            validated_at=time.monotonic() if validated else 0.0,
+        )
+        data_path = self._data_path(key)
+        meta = {"key": key, "etag": etag, "sha256": entry.sha256, "size": entry.size}
+        # Content first: a sidecar only ever describes complete data
+        self._write_atomic(content, data_path)
+        self._write_atomic(json.dumps(meta).encode(), data_path.with_suffix(".json"))
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous.size
+            self.entries[key] = entry
+            self.total_bytes += entry.size
+            while self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self.entries.values())))
+            DISK_CACHE_BYTES.set(self.total_bytes, cache=self.name)
+
+    def discard(self, key: str):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self._remove(entry)
+            DISK_CACHE_BYTES.set(self.total_bytes, cache=self.name)
+
+    def mark_validated(self, key: str, etag: Optional[str]):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry.etag = etag
+                entry.validated_at = time.monotonic()
+
+    def single_flight(self, key: str, fetch: Callable[[], bytes]) -> bytes:
+        """
+        Run fetch for key unless another thread already is; concurrent
+        callers share that call's result (or exception).
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            self.record_hit(len(flight.result), "coalesced")
+            return flight.result
+
+        try:
+            flight.result = fetch()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def record_hit(self, size: int, result: str = "hit"):
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += size
+        STORAGE_CACHE_REQUESTS.inc(result=result)
+        STORAGE_CACHE_BYTES_SAVED.inc(size)
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+        STORAGE_CACHE_REQUESTS.inc(result="miss")
+
+    def hit_rate(self) -> float:
+        with self._lock:
+            total = self.hits + self.misses
+            return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class CachingStorage(BaseStorage):
+    """
+    Read-through, write-through cache in front of another storage backend.
+
+    Reads of one key are coalesced into a single backend fetch. A cached
+    object is served as is for validate_seconds after it was last checked;
+    after that its ETag is compared with the backend's (a metadata request,
+    not a download) and it is fetched again if it changed or either side
+    has no ETag.
+    """
+
+    def __init__(
+        self, storage: BaseStorage, cache: DiskCache, validate_seconds: float = 0.0
+    ):
+        self.storage = storage
+        self.cache = cache
+        self.validate_seconds = validate_seconds
+
+    def save_file(self, content: bytes, filename: str) -> str:
+        path, etag = self.storage.store_file(content, filename)
+        self.cache.put(filename, content, etag=etag, validated=True)
+        return path
+
+    def get_file(self, file_path: str) -> bytes:
+        return self.cache.single_flight(file_path, lambda: self._read(file_path))
+
+    def _read(self, file_path: str) -> bytes:
+        cached = self.cache.get(file_path)
+        if cached is not None:
+            content, entry = cached
+            if time.monotonic() - entry.validated_at < self.validate_seconds:
+                self.cache.record_hit(len(content))
+                return content
+
+            # Without a tag on both sides nothing proves the copy current,
+            # so it is fetched again
+            etag = self.storage.stat_file(file_path)
+            if etag is not None and etag == entry.etag:
+                self.cache.mark_validated(file_path, etag)
+                self.cache.record_hit(len(content))
+                return content
+            self.cache.discard(file_path)
+
+        self.cache.record_miss()
+        content, etag = self.storage.fetch_file(file_path)
+        self.cache.put(file_path, content, etag, validated=True)
+        return content
+
+    def stat_file(self, file_path: str) -> Optional[str]:
+        return self.storage.stat_file(file_path)
+
+    def object_name(self, file_path: str) -> str:
+        return self.storage.object_name(file_path)
+
+    def file_url(self, filename: str) -> str:
+        return self.storage.file_url(filename)
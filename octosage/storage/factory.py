@@ -0,0 +1,65 @@
+import threading
+from typing import Optional
+from octosage.storage.base import BaseStorage
+from octosage.storage.cache import CachingStorage, DiskCache
+from octosage.storage.local import LocalStorage
+from octosage.storage.memory import MemoryStorage
+from octosage.settings import settings
+
+# Process-wide in-memory storage, shared like a real bucket would be
+_memory_storage = MemoryStorage()
+
+# Process-wide disk cache, created on first use of a "+cache" drive
+_disk_cache: Optional[DiskCache] = None
+_disk_cache_lock = threading.Lock()
+
+
+def get_memory_storage() -> MemoryStorage:
+    return _memory_storage
+
+
+def get_disk_cache() -> DiskCache:
+    global _disk_cache
+    with _disk_cache_lock:
+        if _disk_cache is None:
+            _disk_cache = DiskCache(
+                settings.STORAGE_CACHE_DIR,
+                max_bytes=settings.STORAGE_CACHE_MAX_MB * 1024 * 1024,
+            )
+        return _disk_cache
+
+
+def _backend(drive: str) -> BaseStorage:
+    if drive == "local":
+        return LocalStorage(
+            settings.OUTPUT_DIR,
+            dedup=settings.LOCAL_DEDUP,
+            mmap_min_bytes=settings.LOCAL_MMAP_MIN_BYTES,
+        )
+    if drive == "memory":
+        return get_memory_storage()
+
+    # minio is only needed when S3 is in use
+    from octosage.storage.s3 import S3Storage
+
+    return S3Storage(
+        bucket_name=settings.S3_BUCKET,
+        access_key=settings.S3_KEY,
+        secret_key=settings.S3_SECRET,
+        endpoint_url=settings.S3_ENDPOINT,
+    )
+
+
+def get_storage() -> BaseStorage:
+    """
+    Build the storage backend selected by settings.DRIVE
+    """
+    drive, *options = settings.DRIVE.split("+")
+    storage = _backend(drive)
+    if "cache" in options:
+        storage = CachingStorage(
+            storage,
+            get_disk_cache(),
+            validate_seconds=settings.STORAGE_CACHE_VALIDATE_SECONDS,
+        )
+    return storage
@@ -1,19 +1,257 @@
+import errno
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
 from pathlib import Path
-import uuid
+from typing import Iterable, List, Optional
 from octosage.storage.base import BaseStorage
 
+OBJECTS_DIR = "objects"
+BLOBS_DIR = "blobs"
+TMP_DIR = "tmp"
+LAYOUT_DIRS = (OBJECTS_DIR, BLOBS_DIR, TMP_DIR)
+
+
+def _shard(digest: str) -> Path:
+    return Path(digest[:2]) / digest[2:4]
+
 
 class LocalStorage(BaseStorage):
-    def __init__(self, base_path: Path):
+    """
+    Filesystem storage. Objects live under objects/ in two levels of
+    subdirectories picked by a hash of their name, so no directory grows
+    past a few thousand entries. Writes go to tmp/ and are renamed into
+    place, so readers never see partial files. With dedup, identical
+    contents are stored once under blobs/ and hard-linked to every name;
+    objects must then only be replaced, never modified in place.
+    """
+
+    def __init__(
+        self,
+        base_path: Path,
+        dedup: bool = False,
+        mmap_min_bytes: int = 1024 * 1024,
+        mmap_cache_size: int = 64,
+    ):
+        """
+        Args:
+            base_path: Root directory
+            dedup: Hard-link objects with identical content to one blob
+            mmap_min_bytes: Objects at least this large are read through mmap
+            mmap_cache_size: Number of open maps kept for repeated reads
+        """
         self.base_path = Path(base_path) if isinstance(base_path, str) else base_path
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.dedup = dedup
+        self.mmap_min_bytes = mmap_min_bytes
+        self.mmap_cache_size = mmap_cache_size
+        self._maps = OrderedDict()
+        self._maps_lock = threading.Lock()
+
+    def object_path(self, filename: str) -> Path:
+        digest = hashlib.sha1(filename.encode("utf-8")).hexdigest()
+        return self.base_path / OBJECTS_DIR / _shard(digest) / filename
+
+    def _blob_path(self, content: bytes) -> Path:
+        digest = hashlib.sha256(content).hexdigest()
+        return self.base_path / BLOBS_DIR / _shard(digest) / digest
+
+    def _temp_path(self) -> Path:
+        tmp_dir = self.base_path / TMP_DIR
+        tmp_dir.mkdir(exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=tmp_dir)
+        os.close(fd)
+        return Path(name)
+
+    def _write_atomic(self, content: bytes, target: Path):
+        temp_path = self._temp_path()
+        try:
+            with temp_path.open("wb") as fp:
+                fp.write(content)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, target)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+    def _link_atomic(self, source: Path, target: Path) -> bool:
+        """Hard-link source to target atomically; False if links are unsupported"""
+        temp_path = self._temp_path()
+        temp_path.unlink()
+        try:
+            os.link(source, temp_path)
+        except OSError as e:
+            # ENOENT: the blob was collected since save_file checked for it
+            if e.errno in (
+                errno.EXDEV,
+                errno.EPERM,
+                errno.EMLINK,
+                errno.ENOTSUP,
+                errno.ENOENT,
+            ):
+                return False
+            raise
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, target)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        return True
 
     def save_file(self, content: bytes, filename: str) -> str:
-        filename = self.base_path / filename
-        with filename.open("wb") as fp:
-            fp.write(content)
-        return str(filename)
+        target = self.object_path(filename)
+        if self.dedup:
+            blob = self._blob_path(content)
+            if not blob.exists():
+                self._write_atomic(content, blob)
+            if self._link_atomic(blob, target):
+                return str(target)
+
+        self._write_atomic(content, target)
+        return str(target)
+
+    def _resolve(self, file_path: str) -> Path:
+        """
+        Accept the path returned by save_file, the filename given to it, or
+        a path from the flat layout used before objects were sharded.
+        """
+        path = Path(file_path)
+        if path.is_absolute():
+            if path.exists():
+                return path
+            try:
+                path = path.relative_to(self.base_path)
+            except ValueError:
+                return path
+
+        sharded = self.object_path(str(path))
+        if sharded.exists() or not (self.base_path / path).exists():
+            return sharded
+        return self.base_path / path
+
+    def object_name(self, file_path: str) -> str:
+        try:
+            relative = Path(file_path).relative_to(self.base_path / OBJECTS_DIR)
+        except ValueError:
+            return file_path
+        # Drop the two shard directories
+        return Path(*relative.parts[2:]).as_posix()
+
+    def file_url(self, filename: str) -> str:
+        return str(self.object_path(filename))
 
     def get_file(self, file_path: str) -> bytes:
-        with open(file_path, "rb") as f:
+        path = self._resolve(file_path)
+        with open(path, "rb") as f:
             return f.read()
+
+    def stat_file(self, file_path: str) -> Optional[str]:
+        # Objects are replaced, never rewritten, so the inode names a version
+        stat = self._resolve(file_path).stat()
+        return f"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+    def read_view(self, file_path: str) -> memoryview:
+        """
+        Read without copying: large objects are served from a read-only map
+        of the file, kept open for repeated reads. Objects are replaced, never
+        rewritten in place, so a map stays valid for the inode it was made from.
+        """
+        path = self._resolve(file_path)
+        stat = path.stat()
+        # Empty files cannot be mapped
+        if stat.st_size < self.mmap_min_bytes or stat.st_size == 0:
+            return memoryview(path.read_bytes())
+
+        key = (str(path), stat.st_ino, stat.st_mtime_ns)
+        with self._maps_lock:
+            mapped = self._maps.get(key)
+            if mapped is not None:
+                self._maps.move_to_end(key)
+                return memoryview(mapped)
+
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with self._maps_lock:
+            self._maps[key] = mapped
+            # Evicted maps close once the last view of them is released
+            while len(self._maps) > self.mmap_cache_size:
+                self._maps.popitem(last=False)
+        return memoryview(mapped)
+
+    def collect_garbage(self) -> int:
+        """Remove blobs no object links to any more; returns how many"""
+        removed = 0
+        blobs_dir = self.base_path / BLOBS_DIR
+        if not blobs_dir.exists():
+            return 0
+        for blob in blobs_dir.glob("*/*/*"):
+            if blob.stat().st_nlink == 1:
+                blob.unlink()
+                removed += 1
+        return removed
+
+
+def _flat_files(base_path: Path, skip: Iterable[Path]) -> List[Path]:
+    skip = {path.resolve() for path in skip}
+    files = []
+    for root, dirs, names in os.walk(base_path):
+        root = Path(root)
+        if root == base_path:
+            dirs[:] = [name for name in dirs if name not in LAYOUT_DIRS]
+        for name in names:
+            path = root / name
+            if path.resolve() not in skip:
+                files.append(path)
+    return files
+
+
+def migrate_flat_layout(
+    storage: LocalStorage,
+    skip: Optional[Iterable[Path]] = None,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Move objects of the old flat layout (base_path/filename) into the
+    sharded layout, deduplicating them on the way.
+
+    Args:
+        storage: Storage whose base_path holds the flat layout
+        skip: Files under base_path that are not storage objects (manifests etc.)
+        dry_run: Only count what would be moved
+
+    Returns:
+        dict: Number of files and bytes moved
+    """
+    base_path = storage.base_path
+    moved = 0
+    moved_bytes = 0
+    for path in _flat_files(base_path, skip or []):
+        filename = path.relative_to(base_path).as_posix()
+        moved += 1
+        moved_bytes += path.stat().st_size
+        if dry_run:
+            continue
+
+        if storage.dedup:
+            storage.save_file(path.read_bytes(), filename)
+            path.unlink()
+        else:
+            target = storage.object_path(filename)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(path, target)
+
+    if not dry_run:
+        # Drop directories the flat layout left empty
+        for root, dirs, names in os.walk(base_path, topdown=False):
+            root = Path(root)
+            if root == base_path or root.relative_to(base_path).parts[0] in LAYOUT_DIRS:
+                continue
+            if not any(root.iterdir()):
+                root.rmdir()
+
+    return {"files": moved, "bytes": moved_bytes, "dry_run": dry_run}
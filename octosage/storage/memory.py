@@ -0,0 +1,38 @@
+import threading
+from typing import Dict
+from octosage.storage.base import BaseStorage
+
+
+class MemoryStorage(BaseStorage):
+    """
+    In-process storage keeping objects in a dict. Meant for benchmarks,
+    load tests and local runs without MinIO.
+    """
+
+    def __init__(self):
+        self.files: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def save_file(self, content: bytes, filename: str) -> str:
+        with self._lock:
+            self.files[filename] = bytes(content)
+        return f"memory://{filename}"
+
+    def get_file(self, file_path: str) -> bytes:
+        filename = file_path.replace("memory://", "", 1)
+        with self._lock:
+            try:
+                return self.files[filename]
+            except KeyError:
+                raise FileNotFoundError(file_path)
+
+    def object_name(self, file_path: str) -> str:
+        return file_path.replace("memory://", "", 1)
+
+    def file_url(self, filename: str) -> str:
+        return f"memory://{filename}"
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(len(content) for content in self.files.values())
@@ -1,7 +1,13 @@
 from minio import Minio
+from minio.error import S3Error
 from octosage.storage.base import BaseStorage
 from io import BytesIO
 from datetime import timedelta
+from typing import Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+# How long presigned URLs handed out for objects stay valid
+URL_EXPIRY = timedelta(days=1)
 
 
 class S3Storage(BaseStorage):
@@ -34,42 +40,95 @@ class S3Storage(BaseStorage):
         """
         Save file to Minio and return a presigned URL
         """
+        return self.store_file(content, filename)[0]
+
+    def store_file(self, content: bytes, filename: str) -> Tuple[str, Optional[str]]:
+        """
+        Save file to Minio and return a presigned URL along with the ETag of
+        the uploaded object
+        """
         try:
             # BytesIO kullanarak bytes'ı stream'e çevir
             file_data = BytesIO(content)
             file_size = len(content)
 
             # Upload the file
-            self.client.put_object(
+            written = self.client.put_object(
                 bucket_name=self.bucket_name,
                 object_name=filename,
                 data=file_data,
                 length=file_size,
             )
 
-            # Generate presigned URL (24 saat geçerli)
-            presigned_url = self.client.presigned_get_object(
-                bucket_name=self.bucket_name,
-                object_name=filename,
-                expires=timedelta(days=1),  # 24 saat için timedelta kullanıyoruz
-            )
-
-            return presigned_url
+            return self.file_url(filename), _etag(written.etag)
 
         except Exception as e:
             raise Exception(f"Failed to upload file to Minio: {str(e)}")
 
+    def object_name(self, file_path: str) -> str:
+        """
+        Object name from a presigned URL (path-style: /bucket/object)
+        """
+        if "://" not in file_path:
+            return file_path
+        path = unquote(urlparse(file_path).path).lstrip("/")
+        prefix = f"{self.bucket_name}/"
+        return path[len(prefix) :] if path.startswith(prefix) else path
+
+    def file_url(self, filename: str) -> str:
+        """
+        Fresh presigned URL of an object, valid for URL_EXPIRY
+        """
+        return self.client.presigned_get_object(
+            bucket_name=self.bucket_name,
+            object_name=filename,
+            expires=URL_EXPIRY,
+        )
+
     def get_file(self, file_path: str) -> bytes:
         """
         Get file from Minio
         """
+        return self.fetch_file(file_path)[0]
+
+    def fetch_file(self, file_path: str) -> Tuple[bytes, Optional[str]]:
+        """
+        Get file from Minio along with the ETag of the version read
+        """
         try:
             # Get object data
             data = self.client.get_object(
                 bucket_name=self.bucket_name, object_name=file_path
             )
-            # Read all data and return as bytes
-            return data.read()
+            try:
+                # Read all data and return as bytes
+                return data.read(), _etag(data.headers.get("ETag"))
+            finally:
+                data.close()
+                data.release_conn()
 
+        except S3Error as e:
+            if e.code == "NoSuchKey":
+                raise FileNotFoundError(file_path) from e
+            raise Exception(f"Failed to download file from Minio: {str(e)}")
         except Exception as e:
             raise Exception(f"Failed to download file from Minio: {str(e)}")
+
+    def stat_file(self, file_path: str) -> Optional[str]:
+        """
+        ETag of an object, from a HEAD request
+        """
+        try:
+            stat = self.client.stat_object(
+                bucket_name=self.bucket_name, object_name=file_path
+            )
+            return _etag(stat.etag)
+
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                raise FileNotFoundError(file_path) from e
+            raise Exception(f"Failed to stat file on Minio: {str(e)}")
+
+
+def _etag(value: Optional[str]) -> Optional[str]:
+    return value.strip('"') if value else None
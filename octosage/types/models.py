@@ -6,7 +6,7 @@ from typing import List, Optional, Tuple, Union
 class BaseElement:
     label: str
     bbox: Optional[Tuple[float, float, float, float]]
-    page: int
+    page: Optional[int]  # None for elements without provenance
     type: str
     group_id: Optional[str] = None
 
@@ -32,7 +32,7 @@ class PictureElement(BaseElement):
 
 @dataclass
 class TableElement(BaseElement):
-    data: str = None  # CSV formatted data
+    data: str = None  # Serialized table: markdown, CSV or JSON
     captions: Optional[str] = None  # varsayılan değer ekledim
     type: str = "table"
     path: Optional[str] = None
@@ -0,0 +1,99 @@
+from dataclasses import dataclass, replace
+from typing import FrozenSet, Iterable, Optional
+
+
+@dataclass(frozen=True)
+class ExtractionProfile:
+    """
+    What a conversion extracts. Work a profile leaves out is switched off
+    where it starts: docling does not crop or render images nobody keeps,
+    tables skip structure recognition and serialization, and elements of
+    filtered labels never reach a processor or the sorter.
+    """
+
+    name: str
+    pictures: bool = True
+    tables: bool = True
+    table_images: bool = True
+    # Labels to keep (None keeps all) and to drop, as docling names them
+    include_labels: Optional[FrozenSet[str]] = None
+    exclude_labels: FrozenSet[str] = frozenset()
+
+    def allows(self, label: str) -> bool:
+        if label in self.exclude_labels:
+            return False
+        return self.include_labels is None or label in self.include_labels
+
+    @property
+    def keeps_pictures(self) -> bool:
+        return self.pictures and self.allows("picture")
+
+    @property
+    def keeps_tables(self) -> bool:
+        return self.tables and self.allows("table")
+
+    @property
+    def keeps_table_images(self) -> bool:
+        return self.keeps_tables and self.table_images
+
+    @property
+    def needs_images(self) -> bool:
+        return self.keeps_pictures or self.keeps_table_images
+
+    @property
+    def is_default(self) -> bool:
+        return self == PROFILES[DEFAULT_PROFILE]
+
+    def with_labels(
+        self,
+        include_labels: Optional[Iterable[str]] = None,
+        exclude_labels: Optional[Iterable[str]] = None,
+    ) -> "ExtractionProfile":
+        return replace(
+            self,
+            include_labels=(
+                self.include_labels
+                if include_labels is None
+                else frozenset(include_labels)
+            ),
+            exclude_labels=self.exclude_labels | frozenset(exclude_labels or ()),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "pictures": self.pictures,
+            "tables": self.tables,
+            "table_images": self.table_images,
+            "include_labels": (
+                None if self.include_labels is None else sorted(self.include_labels)
+            ),
+            "exclude_labels": sorted(self.exclude_labels),
+        }
+
+
+PROFILES = {
+    "text-only": ExtractionProfile(
+        "text-only", pictures=False, tables=False, table_images=False
+    ),
+    "text+tables": ExtractionProfile("text+tables", pictures=False, table_images=False),
+    "full": ExtractionProfile("full"),
+}
+DEFAULT_PROFILE = "full"
+
+
+def get_profile(
+    name: Optional[str] = None,
+    include_labels: Optional[Iterable[str]] = None,
+    exclude_labels: Optional[Iterable[str]] = None,
+) -> ExtractionProfile:
+    """
+    Args:
+        name: One of PROFILES; the default profile when None
+        include_labels: Keep only elements of these labels
+        exclude_labels: Drop elements of these labels
+    """
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unsupported extraction profile: {name}")
+    return PROFILES[name].with_labels(include_labels, exclude_labels)
@@ -0,0 +1,25 @@
+import sys
+from functools import lru_cache
+
+from octosage.settings import settings
+
+
+@lru_cache(maxsize=None)
+def get_device() -> str:
+    """
+    Device for models: settings.DEVICE when set, otherwise CUDA if torch
+    sees it. torch is imported here on first use, not at startup.
+    """
+    if settings.DEVICE:
+        return settings.DEVICE
+
+    import torch
+
+    return "cuda:0" if torch.cuda.is_available() else "cpu"
+
+
+def empty_device_cache():
+    """Release cached CUDA memory, without importing torch if nothing used it"""
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
@@ -1,8 +1,10 @@
 from collections import defaultdict
-from typing import List, Dict
+from typing import TYPE_CHECKING, List, Dict
 
 import torch
-from transformers import LayoutLMv3ForTokenClassification
+
+if TYPE_CHECKING:
+    from transformers import LayoutLMv3ForTokenClassification
 
 MAX_LEN = 510
 CLS_TOKEN_ID = 0
@@ -74,8 +76,36 @@ def boxes2inputs(boxes: List[List[int]]) -> Dict[str, torch.Tensor]:
     }
 
 
+def boxes2batch_inputs(batch: List[List[List[int]]]) -> Dict[str, torch.Tensor]:
+    """
+    Build a padded batch of model inputs from several box sequences.
+
+    Padding follows DataCollator: empty boxes, EOS input ids and a zero
+    attention mask, so each sequence yields the same logits as on its own.
+    """
+    max_len = max(len(boxes) for boxes in batch) + 2
+    bbox = []
+    input_ids = []
+    attention_mask = []
+    for boxes in batch:
+        pad = max_len - len(boxes) - 2
+        bbox.append([[0, 0, 0, 0]] + boxes + [[0, 0, 0, 0]] + [[0, 0, 0, 0]] * pad)
+        input_ids.append(
+            [CLS_TOKEN_ID]
+            + [UNK_TOKEN_ID] * len(boxes)
+            + [EOS_TOKEN_ID]
+            + [EOS_TOKEN_ID] * pad
+        )
+        attention_mask.append([1] + [1] * len(boxes) + [1] + [0] * pad)
+    return {
+        "bbox": torch.tensor(bbox),
+        "attention_mask": torch.tensor(attention_mask),
+        "input_ids": torch.tensor(input_ids),
+    }
+
+
 def prepare_inputs(
-    inputs: Dict[str, torch.Tensor], model: LayoutLMv3ForTokenClassification
+    inputs: Dict[str, torch.Tensor], model: "LayoutLMv3ForTokenClassification"
 ) -> Dict[str, torch.Tensor]:
     ret = {}
     for k, v in inputs.items():
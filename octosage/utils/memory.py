@@ -0,0 +1,73 @@
+import gc
+import os
+import threading
+import time
+from typing import Optional
+
+from octosage.utils.metrics import peak_rss_bytes, registry
+
+MEMORY_WAIT_SECONDS = registry.counter(
+    "octosage_memory_wait_seconds_total",
+    "Time intake was held back by the memory ceiling",
+)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_bytes() -> int:
+    """Current resident set size, falling back to the peak where /proc is missing"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return peak_rss_bytes()
+
+
+def wait_for_memory(
+    ceiling_bytes: Optional[int], timeout: float = 300.0, interval: float = 0.05
+):
+    """
+    Block while RSS is above the ceiling, so intake slows down instead of
+    the process being OOM-killed. Gives up after timeout and lets the work
+    proceed.
+    """
+    if not ceiling_bytes or current_rss_bytes() <= ceiling_bytes:
+        return
+
+    started = time.monotonic()
+    gc.collect()
+    while current_rss_bytes() > ceiling_bytes:
+        if time.monotonic() - started >= timeout:
+            break
+        time.sleep(interval)
+        interval = min(interval * 2, 1.0)
+    MEMORY_WAIT_SECONDS.inc(time.monotonic() - started)
+
+
+class RssSampler:
+    """Track the highest RSS seen while the block runs"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak_bytes = current_rss_bytes()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="rss-sampler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, current_rss_bytes())
+        return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak_bytes = max(self.peak_bytes, current_rss_bytes())
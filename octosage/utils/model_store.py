@@ -0,0 +1,249 @@
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from octosage.settings import settings
+
+LOCK_FILE = "models.lock.json"
+LAYOUTREADER_DIR = "layoutreader"
+DOCLING_DIR = "docling"
+EASYOCR_DIR = "easyocr"
+
+# safetensors dtype codes mapped to torch dtype names
+SAFETENSORS_DTYPES = {
+    "F64": "float64",
+    "F32": "float32",
+    "F16": "float16",
+    "BF16": "bfloat16",
+    "I64": "int64",
+    "I32": "int32",
+    "I16": "int16",
+    "I8": "int8",
+    "U8": "uint8",
+    "BOOL": "bool",
+}
+
+
+class ModelStore:
+    """
+    Local directory of model artifacts with a lock file pinning the
+    revision each one was fetched at. Everything is downloaded once by
+    prefetch; loading never touches the network.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.MODEL_DIR)
+
+    @property
+    def lock_path(self) -> Path:
+        return self.root / LOCK_FILE
+
+    def read_lock(self) -> Dict[str, dict]:
+        if not self.lock_path.exists():
+            return {}
+        return json.loads(self.lock_path.read_text())
+
+    def _write_lock(self, name: str, entry: dict):
+        lock = self.read_lock()
+        lock[name] = entry
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.lock_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(lock, indent=2, sort_keys=True) + "\n")
+        tmp_path.replace(self.lock_path)
+
+    def path(self, name: str) -> Optional[Path]:
+        """Directory of a prefetched artifact, or None if it is not in the store"""
+        if name not in self.read_lock():
+            return None
+        path = self.root / name
+        return path if path.exists() else None
+
+    def require(self, name: str) -> Optional[Path]:
+        """
+        Like path(), but in offline mode a missing artifact is an error
+        instead of a signal to fall back to downloading.
+        """
+        path = self.path(name)
+        if path is None and settings.MODEL_OFFLINE:
+            raise FileNotFoundError(
+                f"Model artifact '{name}' is not in {self.root}; "
+                "run `octosage prefetch` on a host with network access"
+            )
+        return path
+
+    def prefetch_layoutreader(
+        self, repo_id: Optional[str] = None, revision: Optional[str] = None
+    ) -> dict:
+        """
+        Download LayoutReader at a pinned commit and make sure its weights
+        are stored as safetensors.
+        """
+        from huggingface_hub import HfApi, snapshot_download
+
+        repo_id = repo_id or settings.LAYOUTREADER_MODEL
+        revision = revision or settings.LAYOUTREADER_REVISION
+        commit = HfApi().model_info(repo_id, revision=revision).sha
+
+        locked = self.read_lock().get(LAYOUTREADER_DIR)
+        path = self.root / LAYOUTREADER_DIR
+        if locked and locked["revision"] == commit and path.exists():
+            return locked
+
+        snapshot_download(repo_id, revision=commit, local_dir=path)
+        _ensure_safetensors(path)
+        entry = {"source": repo_id, "revision": commit}
+        self._write_lock(LAYOUTREADER_DIR, entry)
+        return entry
+
+    def prefetch_docling(self) -> dict:
+        """Download the layout and table models of the installed docling"""
+        from importlib.metadata import version
+
+        path = self.root / DOCLING_DIR
+        docling_version = version("docling")
+        locked = self.read_lock().get(DOCLING_DIR)
+        if locked and locked["revision"] == docling_version and path.exists():
+            return locked
+
+        try:
+            from docling.utils.model_downloader import download_models
+
+            download_models(output_dir=path, with_easyocr=False)
+        except ImportError:
+            # Older docling releases only ship the Hugging Face snapshot
+            from docling.pipeline.standard_pdf_pipeline import StandardPdfPipeline
+
+            StandardPdfPipeline.download_models_hf(local_dir=path)
+
+        entry = {"source": "docling", "revision": docling_version}
+        self._write_lock(DOCLING_DIR, entry)
+        return entry
+
+    def prefetch_easyocr(self, languages: List[str]) -> dict:
+        """Download the EasyOCR detection and recognition models for languages"""
+        import easyocr
+        from importlib.metadata import version
+
+        path = self.root / EASYOCR_DIR
+        languages = sorted(languages)
+        easyocr_version = version("easyocr")
+        locked = self.read_lock().get(EASYOCR_DIR)
+        if (
+            locked
+            and locked["revision"] == easyocr_version
+            and set(languages) <= set(locked["languages"])
+            and path.exists()
+        ):
+            return locked
+
+        if locked and locked["revision"] == easyocr_version:
+            languages = sorted(set(languages) | set(locked["languages"]))
+        path.mkdir(parents=True, exist_ok=True)
+        # EasyOCR downloads every model it needs while building a reader
+        easyocr.Reader(
+            languages,
+            gpu=False,
+            model_storage_directory=str(path),
+            download_enabled=True,
+        )
+        entry = {
+            "source": "easyocr",
+            "revision": easyocr_version,
+            "languages": languages,
+        }
+        self._write_lock(EASYOCR_DIR, entry)
+        return entry
+
+
+def _ensure_safetensors(path: Path):
+    """Convert a pytorch_model.bin checkpoint to model.safetensors in place"""
+    if (path / "model.safetensors").exists():
+        return
+    checkpoint = path / "pytorch_model.bin"
+    if not checkpoint.exists():
+        raise FileNotFoundError(f"No model weights found in {path}")
+
+    import torch
+    from safetensors.torch import save_file
+
+    state_dict = torch.load(checkpoint, map_location="cpu", weights_only=True)
+    save_file(
+        {k: v.contiguous() for k, v in state_dict.items()}, path / "model.safetensors"
+    )
+    checkpoint.unlink()
+
+
+def load_safetensors_mmap(path: Path) -> dict:
+    """
+    Load a safetensors file as tensors viewing a memory map of the file.
+
+    The map is copy-on-write, so pages stay in the shared page cache for
+    every process loading the same file until a process writes to them.
+
+    Returns:
+        dict: Parameter name to tensor
+    """
+    import torch
+
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    (header_size,) = struct.unpack("<Q", buffer[:8])
+    header = json.loads(buffer[8 : 8 + header_size])
+    header.pop("__metadata__", None)
+    data_start = 8 + header_size
+
+    tensors = {}
+    for name, info in header.items():
+        dtype = getattr(torch, SAFETENSORS_DTYPES[info["dtype"]])
+        begin, end = info["data_offsets"]
+        itemsize = torch.empty((), dtype=dtype).element_size()
+        tensor = torch.frombuffer(
+            buffer,
+            dtype=dtype,
+            count=(end - begin) // itemsize,
+            offset=data_start + begin,
+        )
+        tensors[name] = tensor.reshape(info["shape"])
+    return tensors
+
+
+def layoutreader_revision(store: Optional[ModelStore] = None) -> str:
+    """
+    Source and revision of the LayoutReader weights load_layoutreader
+    picks: those pinned in the lock file, else the configured hub revision
+    """
+    store = store or ModelStore()
+    locked = store.read_lock().get(LAYOUTREADER_DIR)
+    if locked is not None:
+        return f"{locked['source']}@{locked['revision']}"
+    return f"{settings.LAYOUTREADER_MODEL}@{settings.LAYOUTREADER_REVISION or 'main'}"
+
+
+def load_layoutreader(store: Optional[ModelStore] = None):
+    """
+    Load LayoutReader from the store with memory-mapped weights, or from
+    the Hugging Face hub at the pinned revision when it was not prefetched.
+    """
+    from transformers import LayoutLMv3Config, LayoutLMv3ForTokenClassification
+
+    store = store or ModelStore()
+    path = store.require(LAYOUTREADER_DIR)
+    if path is None:
+        return LayoutLMv3ForTokenClassification.from_pretrained(
+            settings.LAYOUTREADER_MODEL, revision=settings.LAYOUTREADER_REVISION
+        )
+
+    from transformers.modeling_utils import no_init_weights
+
+    config = LayoutLMv3Config.from_pretrained(path, local_files_only=True)
+    # Parameters are replaced by the mapped tensors, so skip initializing them
+    with no_init_weights():
+        model = LayoutLMv3ForTokenClassification(config)
+    state_dict = load_safetensors_mmap(path / "model.safetensors")
+    missing, _ = model.load_state_dict(state_dict, strict=False, assign=True)
+    if missing:
+        raise ValueError(f"LayoutReader weights in {path} are missing {missing}")
+    return model.eval()
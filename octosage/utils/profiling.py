@@ -0,0 +1,121 @@
+import cProfile
+import marshal
+import os
+import sys
+import threading
+import uuid
+from collections import Counter
+from typing import Any, Callable, Optional, Tuple
+
+from octosage.storage.base import BaseStorage
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling thread stacks at a fixed interval.
+    Samples are aggregated as collapsed stacks, the input format of flame
+    graph tools (flamegraph.pl, speedscope, inferno).
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        thread_id: Optional[int] = None,
+        all_threads: bool = False,
+    ):
+        """
+        Args:
+            interval: Seconds between samples
+            thread_id: Thread to sample; defaults to the thread entering
+            all_threads: Sample every thread instead, e.g. to see work
+                handed to the element and sort pools. Each stack is rooted
+                at its thread's name, so threads stay apart in flame graphs.
+        """
+        self.interval = interval
+        self.thread_id = thread_id
+        self.all_threads = all_threads
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def __enter__(self):
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._sampler = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._sampler.join()
+        return False
+
+    def _run(self):
+        sampler_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if not self.all_threads:
+                frame = frames.get(self.thread_id)
+                if frame is not None:
+                    self.samples[_collapse(frame)] += 1
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in frames.items():
+                if thread_id == sampler_id:
+                    continue
+                name = names.get(thread_id, f"thread-{thread_id}")
+                self.samples[f"{name};{_collapse(frame)}"] += 1
+
+    def collapsed(self) -> str:
+        """Render samples as collapsed stacks, one 'frame;frame count' per line"""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.samples.most_common()
+        )
+
+
+def _collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(
+            f"{code.co_name} ({os.path.basename(code.co_filename)}"
+            f":{code.co_firstlineno})"
+        )
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+def profile_call(
+    func: Callable, *args, fmt: str = "collapsed", interval: float = 0.005
+) -> Tuple[Any, bytes, str]:
+    """
+    Run func under a profiler.
+
+    Args:
+        func: Callable to profile; runs in the calling thread
+        fmt: "collapsed" for sampled flame graph stacks of every thread, so
+            work func hands to worker pools shows up too (along with that
+            of concurrent requests); "pstats" for a deterministic cProfile
+            dump of the calling thread only, loadable with pstats.Stats
+        interval: Sampling interval for the collapsed format
+
+    Returns:
+        tuple: Result of func, profile artifact bytes and file extension
+    """
+    if fmt == "pstats":
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, *args)
+        profiler.create_stats()
+        return result, marshal.dumps(profiler.stats), "pstats"
+
+    with SamplingProfiler(interval=interval, all_threads=True) as profiler:
+        result = func(*args)
+    return result, profiler.collapsed().encode("utf-8"), "collapsed.txt"
+
+
+def save_profile(storage: BaseStorage, content: bytes, extension: str) -> str:
+    """Store a profile artifact and return its path/identifier"""
+    return storage.save_file(content, f"profile_{uuid.uuid4().hex}.{extension}")
@@ -0,0 +1,243 @@
+import heapq
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Average number of elements per grid cell the grid is sized for
+ELEMENTS_PER_CELL = 2
+MAX_GRID_SIZE = 64
+
+Rect = Tuple[float, float, float, float]
+
+
+def normalize_rect(bbox: Sequence[float]) -> Rect:
+    """(x0, y0, x1, y1) with x0 <= x1 and y0 <= y1, whatever the origin"""
+    left, top, right, bottom = bbox
+    return (
+        min(left, right),
+        min(top, bottom),
+        max(left, right),
+        max(top, bottom),
+    )
+
+
+def _distance(rect: Rect, x: float, y: float) -> float:
+    """Distance from a point to a rectangle, 0 inside it"""
+    dx = max(rect[0] - x, 0.0, x - rect[2])
+    dy = max(rect[1] - y, 0.0, y - rect[3])
+    return math.hypot(dx, dy)
+
+
+class PageGrid:
+    """
+    Uniform grid over one page: each cell lists the elements whose bbox
+    overlaps it. Elements past the page edge are kept in the border cells.
+    """
+
+    __slots__ = ("width", "height", "cols", "rows", "cells", "rects", "ids")
+
+    def __init__(
+        self,
+        width: float,
+        height: float,
+        rects: List[Rect],
+        ids: List[int],
+        cols: Optional[int] = None,
+        cells: Optional[Dict[int, List[int]]] = None,
+    ):
+        """
+        Args:
+            width: Page width in the elements' units
+            height: Page height in the elements' units
+            rects: Normalized bboxes of the page's elements
+            ids: Identifier of each bbox, e.g. its position in the result
+            cols: Cells per side; sized from the element count when None
+            cells: Prebuilt cell lists (from to_dict) instead of indexing
+        """
+        self.width = max(width, 1e-6)
+        self.height = max(height, 1e-6)
+        self.rects = rects
+        self.ids = ids
+        if cols is None:
+            cols = math.ceil(math.sqrt(len(rects) / ELEMENTS_PER_CELL))
+            cols = min(max(cols, 1), MAX_GRID_SIZE)
+        self.cols = self.rows = cols
+        if cells is None:
+            cells = defaultdict(list)
+            for slot, rect in enumerate(rects):
+                c0, r0, c1, r1 = self._cell_range(rect)
+                for row in range(r0, r1 + 1):
+                    for col in range(c0, c1 + 1):
+                        cells[row * self.cols + col].append(slot)
+            cells = dict(cells)
+        self.cells = cells
+
+    def _col(self, x: float) -> int:
+        return min(max(int(x / self.width * self.cols), 0), self.cols - 1)
+
+    def _row(self, y: float) -> int:
+        return min(max(int(y / self.height * self.rows), 0), self.rows - 1)
+
+    def _cell_range(self, rect: Rect) -> Tuple[int, int, int, int]:
+        return (
+            self._col(rect[0]),
+            self._row(rect[1]),
+            self._col(rect[2]),
+            self._row(rect[3]),
+        )
+
+    def _candidates(self, rect: Rect) -> set:
+        c0, r0, c1, r1 = self._cell_range(rect)
+        slots = set()
+        for row in range(r0, r1 + 1):
+            for col in range(c0, c1 + 1):
+                slots.update(self.cells.get(row * self.cols + col, ()))
+        return slots
+
+    def intersecting(self, rect: Rect, contained: bool = False) -> List[int]:
+        """
+        Ids of the elements overlapping rect, or only of those lying
+        entirely inside it when contained is set, in id order
+        """
+        x0, y0, x1, y1 = rect
+        found = []
+        for slot in self._candidates(rect):
+            ex0, ey0, ex1, ey1 = self.rects[slot]
+            if contained:
+                hit = ex0 >= x0 and ey0 >= y0 and ex1 <= x1 and ey1 <= y1
+            else:
+                hit = ex0 <= x1 and ex1 >= x0 and ey0 <= y1 and ey1 >= y0
+            if hit:
+                found.append(self.ids[slot])
+        return sorted(found)
+
+    def at_point(self, x: float, y: float) -> List[int]:
+        """Ids of the elements whose bbox holds the point"""
+        return self.intersecting((x, y, x, y))
+
+    def nearest(self, x: float, y: float, k: int = 1) -> List[Tuple[int, float]]:
+        """
+        The k elements closest to a point, as (id, distance) pairs, nearest
+        first. Searches rings of cells outwards from the point's cell and
+        stops once no unvisited cell can hold anything closer.
+        """
+        if not self.rects or k <= 0:
+            return []
+        col, row = self._col(x), self._row(y)
+        step = min(self.width / self.cols, self.height / self.rows)
+        seen = set()
+        best = []  # max-heap of (-distance, -id)
+        for ring in range(max(self.cols, self.rows)):
+            for slot in self._ring(col, row, ring):
+                if slot in seen:
+                    continue
+                seen.add(slot)
+                entry = (-_distance(self.rects[slot], x, y), -self.ids[slot])
+                if len(best) < k:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+            # Cells past this ring are at least ring * step away
+            if len(best) == k and -best[0][0] <= ring * step:
+                break
+        return [
+            (-neg_id, -neg_distance)
+            for neg_distance, neg_id in sorted(best, reverse=True)
+        ]
+
+    def _ring(self, col: int, row: int, ring: int) -> Iterable[int]:
+        """Slots listed in the cells at Chebyshev distance ring from a cell"""
+        for r in range(row - ring, row + ring + 1):
+            if not 0 <= r < self.rows:
+                continue
+            edge = r in (row - ring, row + ring)
+            cols = (
+                range(col - ring, col + ring + 1) if edge else (col - ring, col + ring)
+            )
+            for c in cols:
+                if 0 <= c < self.cols:
+                    yield from self.cells.get(r * self.cols + c, ())
+
+    def to_dict(self) -> dict:
+        return {
+            "width": self.width,
+            "height": self.height,
+            "cols": self.cols,
+            "rects": [list(rect) for rect in self.rects],
+            "ids": self.ids,
+            "cells": {str(cell): slots for cell, slots in self.cells.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PageGrid":
+        return cls(
+            data["width"],
+            data["height"],
+            [tuple(rect) for rect in data["rects"]],
+            data["ids"],
+            cols=data["cols"],
+            cells={int(cell): slots for cell, slots in data["cells"].items()},
+        )
+
+
+class SpatialIndex:
+    """
+    Per-page spatial index over the element bboxes of a result, answering
+    region, point and nearest-element queries. Ids are positions in the
+    result's element list; coordinates are those of the bboxes.
+    """
+
+    VERSION = 1
+
+    def __init__(self, pages: Dict[int, PageGrid]):
+        self.pages = pages
+
+    @classmethod
+    def build(cls, result: dict) -> "SpatialIndex":
+        """Index a ProcessManager or SortOperation result"""
+        page_rects = defaultdict(list)
+        page_ids = defaultdict(list)
+        for position, element in enumerate(result["elements"]):
+            if element.get("bbox") is None or element.get("page") is None:
+                continue
+            page_rects[element["page"]].append(normalize_rect(element["bbox"]))
+            page_ids[element["page"]].append(position)
+
+        pages = {}
+        for page_no, rects in page_rects.items():
+            page = result["metadata"]["pages"].get(page_no, {})
+            width = page.get("width") or max(rect[2] for rect in rects)
+            height = page.get("height") or max(rect[3] for rect in rects)
+            pages[page_no] = PageGrid(width, height, rects, page_ids[page_no])
+        return cls(pages)
+
+    def query(self, page: int, bbox: Sequence[float], contained: bool = False):
+        grid = self.pages.get(page)
+        return grid.intersecting(normalize_rect(bbox), contained) if grid else []
+
+    def at_point(self, page: int, x: float, y: float) -> List[int]:
+        grid = self.pages.get(page)
+        return grid.at_point(x, y) if grid else []
+
+    def nearest(self, page: int, x: float, y: float, k: int = 1):
+        grid = self.pages.get(page)
+        return grid.nearest(x, y, k) if grid else []
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.VERSION,
+            "pages": {str(page): grid.to_dict() for page, grid in self.pages.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SpatialIndex":
+        if data.get("version") != cls.VERSION:
+            raise ValueError(
+                f"Unsupported spatial index version: {data.get('version')}"
+            )
+        return cls(
+            {
+                int(page): PageGrid.from_dict(grid)
+                for page, grid in data["pages"].items()
+            }
+        )
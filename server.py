@@ -1,20 +1,45 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Header, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import List
+from typing import List, Literal, Optional
 from pathlib import Path
 import tempfile
 import shutil
 import json
-from octosage.converters.doc_converter import DocConverter
-from octosage.operations.sort_operation import SortOperation
+import hmac
+import ipaddress
+import random
 from octosage.operations.transform_operation import TransformOperation
 from octosage.settings import settings
-import torch, gc
-from fastapi.responses import Response
-from octosage.services.pdf_drawing_service import PDFDrawingService
-
-order_model = None
+import gc
+import time
+from fastapi import Request
+from fastapi.responses import Response, PlainTextResponse
+from octosage.services.admission_service import (
+    PRIORITY_WEIGHTS,
+    AdmissionRejected,
+    AdmissionScheduler,
+)
+from octosage.services.batch_service import BatchPool, BatchService
+from octosage.services.intermediate_service import IntermediateService
+from octosage.services.query_service import QueryService
+from octosage.services.search_service import get_search_index, index_transformed
+from octosage.storage.factory import get_storage
+from octosage.utils.device import empty_device_cache
+from octosage.utils.memory import RssSampler
+from octosage.utils.profiling import profile_call, save_profile
+from octosage.utils.metrics import (
+    registry,
+    collect_timings,
+    REQUEST_SECONDS,
+    REQUESTS_IN_FLIGHT,
+)
+
+sort_scheduler = None
+admission = None
+query_service = None
+batch_pool = None
 
 
 @asynccontextmanager
@@ -22,30 +47,284 @@ async def lifespan(app: FastAPI):
     """
     Lifespan context manager for startup and shutdown events
     """
+    global sort_scheduler, admission, query_service, batch_pool
+
     # Startup: Create output directory
     Path(settings.OUTPUT_DIR).mkdir(parents=True, exist_ok=True)
+
+    # Shared LayoutReader scheduler batching sort jobs across requests
+    if settings.SORT_BATCHING:
+        from octosage.operations.sort_scheduler import SortScheduler
+
+        sort_scheduler = SortScheduler()
+        sort_scheduler.start()
+
+    # Concurrency limits and fair queuing in front of conversions
+    if settings.ADMISSION_CONTROL:
+        admission = AdmissionScheduler()
+
+    # Keeps the spatial indexes of recently queried documents loaded
+    query_service = QueryService()
+
+    # Batch worker processes, kept warm across /process/batch requests
+    batch_pool = BatchPool()
     yield
-    # Cleanup code (if any) would go here
+    batch_pool.shutdown()
+    batch_pool = None
+    admission = None
+    if sort_scheduler is not None:
+        sort_scheduler.stop()
+        sort_scheduler = None
 
 
 app = FastAPI(lifespan=lifespan)
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    if request.url.path == "/metrics":
+        return await call_next(request)
+
+    started = time.perf_counter()
+    status = 500
+    REQUESTS_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        # The route template, not the raw path, keeps document hashes out
+        # of the labels
+        route = request.scope.get("route")
+        endpoint = route.path if route is not None else "unmatched"
+        REQUEST_SECONDS.observe(
+            time.perf_counter() - started, endpoint=endpoint, status=status
+        )
+
+
+@app.get("/health")
+async def health():
+    """
+    Liveness check; answers without loading any model
+    """
+    return {"status": "ok"}
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus-compatible metrics
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 class DocumentProcessingRequest(BaseModel):
     languages: List[str] = ["tr", "en"]
     force_full_page_ocr: bool = True
     images_scale: float = 2.0
     num_threads: int = 4
+    ocr_mode: Literal["on", "auto", "off"] = "on"
+    ocr_engine: Literal["easyocr", "tesseract", "none"] = "easyocr"
+    bounded_memory: bool = False
+    store_intermediates: bool = False
+    table_format: Literal["markdown", "csv", "json"] = "markdown"
+    incremental: bool = False
+    image_scale_mode: Literal["fixed", "adaptive"] = "fixed"
+    extraction_profile: Literal["full", "text+tables", "text-only"] = "full"
+    include_labels: Optional[List[str]] = None
+    exclude_labels: Optional[List[str]] = None
+
+
+def convert_and_sort(source: str, params: DocumentProcessingRequest) -> dict:
+    """
+    Run conversion and sorting for a saved upload.
+    Blocking; called from a worker thread so requests can overlap.
+    """
+    # docling, torch and transformers load on the first document, not at startup
+    from octosage.converters.doc_converter import DocConverter
+    from octosage.operations.sort_operation import SortOperation
+
+    converter = DocConverter(
+        languages=params.languages,
+        force_full_page_ocr=params.force_full_page_ocr,
+        images_scale=params.images_scale,
+        num_threads=params.num_threads,
+        ocr_mode=params.ocr_mode,
+        ocr_engine=params.ocr_engine,
+        bounded_memory=params.bounded_memory,
+        store_intermediates=params.store_intermediates,
+        table_format=params.table_format,
+        incremental=params.incremental,
+        image_scale_mode=params.image_scale_mode,
+        extraction_profile=params.extraction_profile,
+        include_labels=params.include_labels,
+        exclude_labels=params.exclude_labels,
+    )
+
+    # Dökümanı işle
+    result = converter.convert(source)
+
+    if sort_scheduler is None:
+        empty_device_cache()
+        gc.collect()
+
+    # Sırala
+    sort_operator = SortOperation(scheduler=sort_scheduler, profile=converter.profile)
+    sorted_result = sort_operator.sort(result)
+    converter.save_sorted(sorted_result)
+    if query_service is not None and "conversion_key" in sorted_result["metadata"]:
+        # A stored result may have been replaced
+        query_service.discard(
+            sorted_result["metadata"]["hash"],
+            sorted_result["metadata"]["conversion_key"],
+        )
+    return sorted_result
+
+
+def process_pipeline(
+    source: str, params: DocumentProcessingRequest, draw_annotations: bool
+) -> tuple:
+    """Convert and sort, then optionally draw annotations on the source PDF"""
+    sorted_result = convert_and_sort(source, params)
+
+    annotated_pdf = None
+    if draw_annotations:
+        from octosage.services.pdf_drawing_service import PDFDrawingService
+
+        drawing_service = PDFDrawingService()
+        annotated_pdf = drawing_service.draw_annotations(
+            source, sorted_result["elements"]
+        )
+    return sorted_result, annotated_pdf
+
+
+def transform_pipeline(source: str, params: DocumentProcessingRequest) -> dict:
+    """Convert and sort, then transform"""
+    sorted_result = convert_and_sort(source, params)
+    transform_operator = TransformOperation(sorted_result)
+    transformed_result = transform_operator.transform()
+    if "conversion_key" in sorted_result["metadata"]:
+        # Lets clients re-run from the stored intermediates later
+        transformed_result["metadata"]["conversion_key"] = sorted_result["metadata"][
+            "conversion_key"
+        ]
+    index_transformed([transformed_result])
+    return transformed_result
+
+
+def parse_labels(labels: Optional[str]) -> Optional[List[str]]:
+    """Label filter form fields are JSON lists, like languages"""
+    return json.loads(labels) if labels else None
+
+
+@asynccontextmanager
+async def admitted(
+    request: Request,
+    sources: List[Path],
+    client: Optional[str],
+    priority: str,
+    deadline: Optional[float],
+):
+    """
+    Hold an admission slot while converting the given files. Conversions
+    that should be retried later get a 429 with Retry-After.
+    """
+    if priority not in PRIORITY_WEIGHTS:
+        raise HTTPException(status_code=422, detail=f"Unsupported priority: {priority}")
+    if admission is None:
+        yield
+        return
+
+    cost = await run_in_threadpool(admission.estimate, sources)
+    client = client_key(request, client)
+    try:
+        async with admission.admit(client, cost, priority, deadline):
+            yield
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+def client_key(request: Request, header: Optional[str]) -> str:
+    """
+    Client a request is queued under: the X-Octosage-Client header when it
+    comes through a trusted proxy, otherwise the peer address
+    """
+    peer = request.client.host if request.client else None
+    if header and peer and is_trusted_proxy(peer):
+        return header
+    return peer or "anonymous"
+
+
+def is_trusted_proxy(address: str) -> bool:
+    try:
+        peer = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(
+        peer in ipaddress.ip_network(network, strict=False)
+        for network in settings.ADMISSION_TRUSTED_PROXIES
+    )
+
+
+def should_profile(profile_token: Optional[str]) -> bool:
+    """
+    Profile when the admin header carries the configured token, otherwise
+    sample requests at PROFILING_SAMPLE_RATE.
+    """
+    if profile_token and settings.PROFILING_ADMIN_TOKEN:
+        if hmac.compare_digest(profile_token, settings.PROFILING_ADMIN_TOKEN):
+            return True
+    return random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+def run_pipeline(func, *args, profile: bool = False) -> tuple:
+    """
+    Run a blocking pipeline function, optionally under the profiler.
+
+    Returns:
+        tuple: Result of func and the stored profile reference (or None)
+    """
+    if not profile:
+        return func(*args), None
+
+    result, content, extension = profile_call(
+        func,
+        *args,
+        fmt=settings.PROFILING_FORMAT,
+        interval=settings.PROFILING_INTERVAL_MS / 1000,
+    )
+    return result, save_profile(get_storage(), content, extension)
 
 
 @app.post("/process")
 async def process_and_sort(
+    request: Request,
     file: UploadFile = File(...),
     languages: str = Form(default='["tr", "en"]'),
     force_full_page_ocr: bool = Form(default=True),
     images_scale: float = Form(default=2.0),
     num_threads: int = Form(default=4),
+    ocr_mode: str = Form(default=settings.OCR_MODE),
+    ocr_engine: str = Form(default=settings.OCR_ENGINE),
+    bounded_memory: bool = Form(default=settings.BOUNDED_MEMORY),
+    store_intermediates: bool = Form(default=settings.STORE_INTERMEDIATES),
+    table_format: str = Form(default=settings.TABLE_FORMAT),
+    incremental: bool = Form(default=settings.INCREMENTAL),
+    image_scale_mode: str = Form(default=settings.IMAGE_SCALE_MODE),
+    extraction_profile: str = Form(default=settings.EXTRACTION_PROFILE),
+    include_labels: Optional[str] = Form(default=None),
+    exclude_labels: Optional[str] = Form(default=None),
+    priority: str = Form(default="normal"),
+    deadline_seconds: Optional[float] = Form(default=None),
     draw_annotations: bool = Form(default=False),  # Yeni parametre
+    timings: bool = Form(default=False),
+    x_octosage_profile: Optional[str] = Header(default=None),
+    x_octosage_client: Optional[str] = Header(default=None),
 ):
     try:
         languages_list = json.loads(languages)
@@ -54,6 +333,16 @@ async def process_and_sort(
             force_full_page_ocr=force_full_page_ocr,
             images_scale=images_scale,
             num_threads=num_threads,
+            ocr_mode=ocr_mode,
+            ocr_engine=ocr_engine,
+            bounded_memory=bounded_memory,
+            store_intermediates=store_intermediates,
+            table_format=table_format,
+            incremental=incremental,
+            image_scale_mode=image_scale_mode,
+            extraction_profile=extraction_profile,
+            include_labels=parse_labels(include_labels),
+            exclude_labels=parse_labels(exclude_labels),
         )
 
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -63,53 +352,82 @@ async def process_and_sort(
             with open(temp_file_path, "wb") as buffer:
                 shutil.copyfileobj(file.file, buffer)
 
-            # Converter'ı başlat
-            converter = DocConverter(
-                languages=params.languages,
-                force_full_page_ocr=params.force_full_page_ocr,
-                images_scale=params.images_scale,
-                num_threads=params.num_threads,
-            )
-
-            # Dökümanı işle
-            result = converter.convert(str(temp_file_path))
+            async with admitted(
+                request,
+                [temp_file_path],
+                x_octosage_client,
+                priority,
+                deadline_seconds,
+            ):
+                with collect_timings() as stage_timings, RssSampler() as rss:
+                    # Eğer annotation istendiyse, aynı thread'de çizilir
+                    (sorted_result, annotated_pdf), profile_ref = (
+                        await run_in_threadpool(
+                            run_pipeline,
+                            process_pipeline,
+                            str(temp_file_path),
+                            params,
+                            draw_annotations,
+                            profile=should_profile(x_octosage_profile),
+                        )
+                    )
 
-            torch.cuda.empty_cache()
-            gc.collect()
-
-            # Sırala
-            sort_operator = SortOperation()
-            sorted_result = sort_operator.sort(result)
-
-            # Eğer annotation istendiyse
             if draw_annotations:
-                drawing_service = PDFDrawingService()
-                annotated_pdf = drawing_service.draw_annotations(
-                    str(temp_file_path), sorted_result["elements"]
-                )
-
+                headers = {
+                    "Content-Disposition": f'attachment; filename="annotated_{file.filename}"'
+                }
+                if timings:
+                    headers["X-Octosage-Timings"] = json.dumps(stage_timings)
+                if profile_ref:
+                    headers["X-Octosage-Profile-Ref"] = profile_ref
+                headers["X-Octosage-Peak-RSS"] = str(rss.peak_bytes)
                 return Response(
                     content=annotated_pdf,
                     media_type="application/pdf",
-                    headers={
-                        "Content-Disposition": f'attachment; filename="annotated_{file.filename}"'
-                    },
+                    headers=headers,
                 )
 
             # Normal sonuç dönüşü
-            return {"status": "success", "result": sorted_result}
-
+            response = {
+                "status": "success",
+                "result": sorted_result,
+                "peak_rss_bytes": rss.peak_bytes,
+            }
+            if timings:
+                response["timings"] = stage_timings
+            if profile_ref:
+                response["profile"] = profile_ref
+            return response
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/transform")
 async def process_and_transform(
+    request: Request,
     file: UploadFile = File(...),
     languages: str = Form(default='["tr", "en"]'),
     force_full_page_ocr: bool = Form(default=True),
     images_scale: float = Form(default=2.0),
     num_threads: int = Form(default=4),
+    ocr_mode: str = Form(default=settings.OCR_MODE),
+    ocr_engine: str = Form(default=settings.OCR_ENGINE),
+    bounded_memory: bool = Form(default=settings.BOUNDED_MEMORY),
+    store_intermediates: bool = Form(default=settings.STORE_INTERMEDIATES),
+    table_format: str = Form(default=settings.TABLE_FORMAT),
+    incremental: bool = Form(default=settings.INCREMENTAL),
+    image_scale_mode: str = Form(default=settings.IMAGE_SCALE_MODE),
+    extraction_profile: str = Form(default=settings.EXTRACTION_PROFILE),
+    include_labels: Optional[str] = Form(default=None),
+    exclude_labels: Optional[str] = Form(default=None),
+    priority: str = Form(default="normal"),
+    deadline_seconds: Optional[float] = Form(default=None),
+    timings: bool = Form(default=False),
+    x_octosage_profile: Optional[str] = Header(default=None),
+    x_octosage_client: Optional[str] = Header(default=None),
 ):
     """
     Process and transform a document
@@ -124,6 +442,16 @@ async def process_and_transform(
             force_full_page_ocr=force_full_page_ocr,
             images_scale=images_scale,
             num_threads=num_threads,
+            ocr_mode=ocr_mode,
+            ocr_engine=ocr_engine,
+            bounded_memory=bounded_memory,
+            store_intermediates=store_intermediates,
+            table_format=table_format,
+            incremental=incremental,
+            image_scale_mode=image_scale_mode,
+            extraction_profile=extraction_profile,
+            include_labels=parse_labels(include_labels),
+            exclude_labels=parse_labels(exclude_labels),
         )
 
         # Create a temporary directory to store the uploaded file
@@ -134,26 +462,243 @@ async def process_and_transform(
             with open(temp_file_path, "wb") as buffer:
                 shutil.copyfileobj(file.file, buffer)
 
-            # Initialize converter with parameters
-            converter = DocConverter(
-                languages=params.languages,
-                force_full_page_ocr=params.force_full_page_ocr,
-                images_scale=params.images_scale,
-                num_threads=params.num_threads,
+            async with admitted(
+                request,
+                [temp_file_path],
+                x_octosage_client,
+                priority,
+                deadline_seconds,
+            ):
+                with collect_timings() as stage_timings, RssSampler() as rss:
+                    # Convert and sort first (as in the original code), then transform
+                    transformed_result, profile_ref = await run_in_threadpool(
+                        run_pipeline,
+                        transform_pipeline,
+                        str(temp_file_path),
+                        params,
+                        profile=should_profile(x_octosage_profile),
+                    )
+
+            response = {
+                "status": "success",
+                "result": transformed_result,
+                "peak_rss_bytes": rss.peak_bytes,
+            }
+            if timings:
+                response["timings"] = stage_timings
+            if profile_ref:
+                response["profile"] = profile_ref
+            return response
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/process/batch")
+async def process_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    languages: str = Form(default='["tr", "en"]'),
+    force_full_page_ocr: bool = Form(default=True),
+    images_scale: float = Form(default=2.0),
+    num_threads: int = Form(default=4),
+    ocr_mode: str = Form(default=settings.OCR_MODE),
+    ocr_engine: str = Form(default=settings.OCR_ENGINE),
+    bounded_memory: bool = Form(default=settings.BOUNDED_MEMORY),
+    store_intermediates: bool = Form(default=settings.STORE_INTERMEDIATES),
+    table_format: str = Form(default=settings.TABLE_FORMAT),
+    incremental: bool = Form(default=settings.INCREMENTAL),
+    image_scale_mode: str = Form(default=settings.IMAGE_SCALE_MODE),
+    extraction_profile: str = Form(default=settings.EXTRACTION_PROFILE),
+    include_labels: Optional[str] = Form(default=None),
+    exclude_labels: Optional[str] = Form(default=None),
+    priority: str = Form(default="normal"),
+    deadline_seconds: Optional[float] = Form(default=None),
+    transform: bool = Form(default=False),
+    x_octosage_client: Optional[str] = Header(default=None),
+):
+    """
+    Process many documents on the warm batch workers. Each result is
+    written as a JSONL part into storage; documents already finished in
+    the batch manifest with the same options are skipped, and the summary
+    points at the parts holding their results.
+    """
+    try:
+        params = DocumentProcessingRequest(
+            languages=json.loads(languages),
+            force_full_page_ocr=force_full_page_ocr,
+            images_scale=images_scale,
+            num_threads=num_threads,
+            ocr_mode=ocr_mode,
+            ocr_engine=ocr_engine,
+            bounded_memory=bounded_memory,
+            store_intermediates=store_intermediates,
+            table_format=table_format,
+            incremental=incremental,
+            image_scale_mode=image_scale_mode,
+            extraction_profile=extraction_profile,
+            include_labels=parse_labels(include_labels),
+            exclude_labels=parse_labels(exclude_labels),
+        )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            sources = []
+            for index, upload in enumerate(files):
+                # Separate directories keep uploads with equal names apart
+                temp_file_path = Path(temp_dir) / str(index) / upload.filename
+                temp_file_path.parent.mkdir()
+                with open(temp_file_path, "wb") as buffer:
+                    shutil.copyfileobj(upload.file, buffer)
+                sources.append(temp_file_path)
+
+            service = BatchService(
+                options={**params.dict(), "transform": transform}, pool=batch_pool
+            )
+            async with admitted(
+                request, sources, x_octosage_client, priority, deadline_seconds
+            ):
+                summary = await run_in_threadpool(service.run, sources)
+
+        return {"status": "success", "result": summary}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/documents/{document_hash}/sort")
+async def resort_document(
+    document_hash: str,
+    conversion_key: str = Form(...),
+    timings: bool = Form(default=False),
+):
+    """
+    Re-run sorting on the intermediates stored by an earlier /process or
+    /transform call with store_intermediates, without converting again
+    """
+    try:
+        service = IntermediateService()
+        with collect_timings() as stage_timings:
+            sorted_result = await run_in_threadpool(
+                service.sort, document_hash, conversion_key, scheduler=sort_scheduler
+            )
+        query_service.discard(document_hash, conversion_key)
+
+        response = {"status": "success", "result": sorted_result}
+        if timings:
+            response["timings"] = stage_timings
+        return response
+
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="No stored conversion found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/documents/{document_hash}/transform")
+async def retransform_document(
+    document_hash: str,
+    conversion_key: str = Form(...),
+    resort: bool = Form(default=False),
+    timings: bool = Form(default=False),
+):
+    """
+    Re-run transform on stored intermediates, reusing the stored sort result
+    unless resort is set
+    """
+    try:
+        service = IntermediateService()
+        with collect_timings() as stage_timings:
+            transformed_result = await run_in_threadpool(
+                service.transform,
+                document_hash,
+                conversion_key,
+                resort=resort,
+                scheduler=sort_scheduler,
             )
+        if resort:
+            query_service.discard(document_hash, conversion_key)
 
-            # Process document
-            result = converter.convert(str(temp_file_path))
+        response = {"status": "success", "result": transformed_result}
+        if timings:
+            response["timings"] = stage_timings
+        return response
 
-            # Sort first (as in the original code)
-            sort_operator = SortOperation()
-            sorted_result = sort_operator.sort(result)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="No stored conversion found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-            # Then transform
-            transform_operator = TransformOperation(sorted_result)
-            transformed_result = transform_operator.transform()
 
-            return {"status": "success", "result": transformed_result}
+@app.post("/documents/{document_hash}/query")
+async def query_document(
+    document_hash: str,
+    conversion_key: str = Form(...),
+    page: int = Form(...),
+    bbox: Optional[str] = Form(default=None),
+    x: Optional[float] = Form(default=None),
+    y: Optional[float] = Form(default=None),
+    nearest: int = Form(default=0),
+    contained: bool = Form(default=False),
+):
+    """
+    Elements of a stored sort result on one page: those overlapping bbox
+    (a JSON [left, top, right, bottom] in element bbox coordinates), or
+    only those inside it with contained; those holding the point (x, y);
+    or the `nearest` elements closest to it
+    """
+    point = None
+    if x is not None and y is not None:
+        point = (x, y)
+    try:
+        parsed_bbox = json.loads(bbox) if bbox else None
+        if parsed_bbox is not None and len(parsed_bbox) != 4:
+            raise ValueError("bbox must have 4 values")
+        if parsed_bbox is None and point is None:
+            raise ValueError("A bbox or both x and y are required")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        result = await run_in_threadpool(
+            query_service.query,
+            document_hash,
+            conversion_key,
+            page,
+            bbox=parsed_bbox,
+            point=point,
+            nearest=nearest,
+            contained=contained,
+        )
+        return {"status": "success", "result": result}
+
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="No stored sort result found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/search")
+async def search_documents(
+    q: str,
+    document: List[str] = Query(default=[]),
+    limit: int = Query(default=10, ge=1, le=settings.SEARCH_MAX_LIMIT),
+):
+    """
+    BM25 search over the chunks of transformed documents, optionally
+    restricted to the given document hashes
+    """
+    search_index = get_search_index()
+    if search_index is None:
+        raise HTTPException(status_code=404, detail="Search index is disabled")
+    try:
+        hits = await run_in_threadpool(
+            search_index.search, q, documents=document or None, limit=limit
+        )
+        return {"status": "success", "query": q, "results": hits}
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))